@@ -0,0 +1,161 @@
+# Disponibilidade da agenda: conflitos de horário e próximos horários livres.
+#
+# O estabelecimento é tratado como um único profissional: dois agendamentos
+# não podem se sobrepor. Cada agendamento tem início (data_hora) e fim,
+# calculado pela duração do serviço.
+#
+# Para a verificação ao vivo, os agendamentos de cada dia ficam em cache
+# numa lista ordenada pelo início, com o maior fim acumulado até cada
+# posição. Uma busca binária acha os que começam antes do fim pedido e a
+# varredura para trás termina assim que o maior fim acumulado não alcança o
+# início pedido. Na gravação a verificação é refeita no banco, dentro da
+# mesma transação do INSERT, junto com a mensagem de confirmação.
+#
+# As ocorrências de séries recorrentes (recorrencia.py) ocupam a agenda como
+# os agendamentos gravados; elas entram na ocupação do dia com o id negativo
+# da série.
+
+from bisect import bisect_left
+from datetime import datetime, time, timedelta
+
+import streamlit as st
+
+import dados
+import mensageria
+import recorrencia
+
+EXPEDIENTE = (time(8, 0), time(18, 0))
+PASSO_MINUTOS = 15
+DIAS_BUSCA = 14
+DURACAO_MAXIMA = timedelta(days=1)
+HORIZONTE_SERIES = timedelta(days=365)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _ocupacao_dia(_conn, versao, dia):
+    # Agendamentos que ocupam algum momento do dia, inclusive os que começaram
+    # no dia anterior
+    linhas = _conn.execute('''
+        SELECT data_hora, fim, id FROM agendamentos
+        WHERE data_hora >= ? AND data_hora < ? AND fim > ?
+        ORDER BY data_hora
+    ''', ((dia - DURACAO_MAXIMA).isoformat(), (dia + timedelta(days=1)).isoformat(), dia.isoformat())).fetchall()
+    intervalos = [(datetime.fromisoformat(i), datetime.fromisoformat(f), id_agendamento)
+                  for i, f, id_agendamento in linhas]
+    inicio_dia = datetime.combine(dia, time.min)
+    ocorrencias = recorrencia.expandir(_conn, inicio_dia, inicio_dia + timedelta(days=1), sobrepondo=True)
+    if ocorrencias:
+        intervalos = sorted(intervalos + [(inicio, fim, -id_serie) for id_serie, _, _, inicio, fim in ocorrencias])
+    maior_fim = []
+    for _, fim, _ in intervalos:
+        maior_fim.append(max(fim, maior_fim[-1]) if maior_fim else fim)
+    return intervalos, maior_fim
+
+
+def ocupacao_dia(conn, dia):
+    return _ocupacao_dia(conn, dados.versao(conn, "agendamentos"), dia)
+
+
+def _conflitos_no_dia(ocupacao, inicio, fim):
+    intervalos, maior_fim = ocupacao
+    i = bisect_left(intervalos, (fim,)) - 1
+    encontrados = []
+    while i >= 0 and maior_fim[i] > inicio:
+        if intervalos[i][1] > inicio:
+            encontrados.append(intervalos[i])
+        i -= 1
+    return encontrados
+
+
+def conflitos(conn, inicio, fim):
+    # Agendamentos (inicio, fim, id) que se sobrepõem a [inicio, fim)
+    encontrados = {}
+    dia = inicio.date()
+    while dia <= (fim - timedelta(microseconds=1)).date():
+        for intervalo in _conflitos_no_dia(ocupacao_dia(conn, dia), inicio, fim):
+            encontrados[intervalo[2]] = intervalo
+        dia += timedelta(days=1)
+    return sorted(encontrados.values())
+
+
+def _arredondar(momento, passo):
+    # Próximo múltiplo do passo a partir da meia-noite
+    meia_noite = datetime.combine(momento.date(), time.min)
+    passos = -((meia_noite - momento) // passo)  # divisão arredondada para cima
+    return meia_noite + passos * passo
+
+
+def proximos_horarios(conn, a_partir, duracao_minutos, quantidade=5):
+    # Primeiros horários livres, dentro do expediente, a partir de a_partir
+    passo = timedelta(minutes=PASSO_MINUTOS)
+    duracao = timedelta(minutes=duracao_minutos)
+    sugestoes = []
+    dia = a_partir.date()
+    for _ in range(DIAS_BUSCA):
+        ocupacao = ocupacao_dia(conn, dia)
+        candidato = max(datetime.combine(dia, EXPEDIENTE[0]), _arredondar(a_partir, passo))
+        fechamento = datetime.combine(dia, EXPEDIENTE[1])
+        while candidato + duracao <= fechamento:
+            ocupados = _conflitos_no_dia(ocupacao, candidato, candidato + duracao)
+            if ocupados:
+                # Pula direto para o fim do agendamento que bloqueia o horário
+                candidato = _arredondar(max(fim for _, fim, _ in ocupados), passo)
+                continue
+            sugestoes.append(candidato)
+            if len(sugestoes) == quantidade:
+                return sugestoes
+            candidato += passo
+        dia += timedelta(days=1)
+    return sugestoes
+
+
+def primeiro_ocupado(conn, inicio, fim):
+    # (início, fim) do primeiro agendamento gravado, ou ocorrência de série,
+    # que se sobrepõe a [inicio, fim); None se o horário estiver livre. Lê o
+    # banco, sem cache: é a verificação feita dentro da transação de gravação.
+    gravado = conn.execute('''
+        SELECT data_hora, fim FROM agendamentos
+        WHERE data_hora < ? AND data_hora >= ? AND fim > ?
+        ORDER BY data_hora LIMIT 1
+    ''', (fim.isoformat(), (inicio - DURACAO_MAXIMA).isoformat(), inicio.isoformat())).fetchone()
+    if gravado:
+        return datetime.fromisoformat(gravado[0]), datetime.fromisoformat(gravado[1])
+    return recorrencia.primeiro_conflito(conn, inicio, fim)
+
+
+def conflitos_serie(conn, inicio, duracao_minutos, frequencia, ate=None):
+    # Ocorrências de uma série nova que cairiam sobre horários ocupados, nos
+    # próximos HORIZONTE_SERIES. Séries sem fim só são conferidas até aí;
+    # depois disso, cada agendamento novo é que confere as séries.
+    duracao = timedelta(minutes=duracao_minutos)
+    if not timedelta(0) < duracao <= DURACAO_MAXIMA:
+        raise ValueError("Duração do serviço inválida.")
+    return [ocorrencia
+            for ocorrencia in recorrencia.ocorrencias(inicio, frequencia, ate, inicio, inicio + HORIZONTE_SERIES)
+            if primeiro_ocupado(conn, ocorrencia, ocorrencia + duracao)]
+
+
+def agendar(conn, cliente_id, servico_id, inicio, duracao_minutos, observacoes=None):
+    # Grava o agendamento se o horário estiver livre; senão levanta ValueError.
+    # A transação começa com BEGIN IMMEDIATE (ver dados.transacao), o que
+    # serializa as gravações: duas sessões não conseguem reservar o mesmo
+    # horário ao mesmo tempo.
+    duracao = timedelta(minutes=duracao_minutos)
+    if not timedelta(0) < duracao <= DURACAO_MAXIMA:
+        raise ValueError("Duração do serviço inválida.")
+    fim = inicio + duracao
+
+    with dados.transacao(conn, "agendamentos") as cursor:
+        ocupado = primeiro_ocupado(cursor, inicio, fim)
+        if ocupado:
+            raise ValueError(
+                f"Horário indisponível: já existe um agendamento das {ocupado[0]:%H:%M} às {ocupado[1]:%H:%M}."
+            )
+        cursor.execute('''
+            INSERT INTO agendamentos (cliente_id, servico_id, data_hora, fim, observacoes)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (cliente_id, servico_id, inicio.isoformat(), fim.isoformat(), observacoes))
+        agendamento_id = cursor.lastrowid
+        # A confirmação entra na caixa de saída na mesma transação
+        mensageria.enfileirar_confirmacao(cursor, agendamento_id)
+    return agendamento_id
@@ -0,0 +1,137 @@
+# Cópia analítica do banco, só para leitura.
+#
+# O Dashboard e os resumos do Financeiro leem uma cópia do banco feita pela
+# API de backup do SQLite, e não o arquivo em que Agendar e os formulários
+# gravam. A cópia é aberta com immutable=1: o SQLite não pega bloqueio nenhum
+# nela, e uma leitura longa não atrasa checkpoints nem gravações do banco
+# principal.
+#
+# A cópia é refeita quando passa de IDADE_MAXIMA ou quando o banco recebeu
+# ESCRITAS_MAXIMAS gravações desde que ela foi tirada (soma das versões em
+# versoes_dados). A nova cópia é montada num arquivo temporário e trocada
+# com a anterior por os.replace, então quem está lendo não vê a troca pela
+# metade; enquanto ela é montada, em segundo plano, as telas seguem com a
+# cópia anterior. Se a atualização falhar, a próxima tentativa espera
+# ESPERA_APOS_FALHA, e a espera dobra a cada nova falha até ESPERA_MAXIMA.
+
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.request import pathname2url
+
+from conexao import CACHE_PAGINAS_KB, MMAP_BYTES, abrir_conexao, caminho_banco
+
+IDADE_MAXIMA = timedelta(minutes=5)
+ESCRITAS_MAXIMAS = 200
+ESPERA_APOS_FALHA = timedelta(seconds=30)
+ESPERA_MAXIMA = timedelta(minutes=30)
+
+log = logging.getLogger(__name__)
+
+_travas = {}
+_trava_travas = threading.Lock()
+# caminho -> (momento da última falha, falhas seguidas)
+_falhas = {}
+
+
+def caminho_copia(caminho):
+    raiz, extensao = os.path.splitext(caminho)
+    return f"{raiz}.analitico{extensao or '.db'}"
+
+
+def _trava(caminho):
+    with _trava_travas:
+        return _travas.setdefault(caminho, threading.Lock())
+
+
+def escritas(conn):
+    return conn.execute("SELECT COALESCE(SUM(versao), 0) FROM versoes_dados").fetchone()[0]
+
+
+def atualizar(caminho, esperar=True):
+    # Refaz a cópia do banco em caminho. Com esperar=False não faz nada se
+    # outra atualização da mesma cópia já estiver em andamento.
+    trava = _trava(caminho)
+    if not trava.acquire(blocking=esperar):
+        return False
+    copia = caminho_copia(caminho)
+    temporario = f"{copia}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        origem = abrir_conexao(caminho)
+        destino = sqlite3.connect(temporario)
+        try:
+            # Uma etapa só: a transação de leitura na origem dura o tempo da
+            # cópia e, com WAL, não impede as gravações
+            origem.backup(destino)
+            destino.execute("PRAGMA journal_mode=DELETE")
+            destino.execute("CREATE TABLE copia_info (criada_em TEXT NOT NULL, escritas INTEGER NOT NULL)")
+            destino.execute("INSERT INTO copia_info VALUES (?, ?)",
+                            (datetime.now().isoformat(timespec="seconds"), escritas(destino)))
+            destino.commit()
+        finally:
+            destino.close()
+            origem.close()
+        os.replace(temporario, copia)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    finally:
+        trava.release()
+    return True
+
+
+def _atualizar_em_segundo_plano(caminho):
+    # Chamada a cada leitura de uma cópia vencida: não inicia outra thread
+    # se já houver uma atualização em andamento ou se a última falhou há
+    # pouco tempo
+    if _trava(caminho).locked():
+        return
+    if caminho in _falhas:
+        momento, seguidas = _falhas[caminho]
+        if datetime.now() - momento < min(ESPERA_APOS_FALHA * 2 ** (seguidas - 1), ESPERA_MAXIMA):
+            return
+
+    def tarefa():
+        try:
+            atualizar(caminho, esperar=False)
+        except Exception:
+            seguidas = _falhas.get(caminho, (None, 0))[1] + 1
+            _falhas[caminho] = (datetime.now(), seguidas)
+            log.exception("Falha ao atualizar a cópia analítica de %s (%d seguida(s))", caminho, seguidas)
+        else:
+            _falhas.pop(caminho, None)
+    threading.Thread(target=tarefa, name="sips-copia-analitica", daemon=True).start()
+
+
+def _abrir_copia(copia, classe):
+    uri = "file:" + pathname2url(os.path.abspath(copia)) + "?immutable=1"
+    conn = sqlite3.connect(uri, uri=True, factory=classe, check_same_thread=False)
+    conn.execute(f"PRAGMA cache_size=-{CACHE_PAGINAS_KB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+    return conn
+
+
+@contextmanager
+def leitura(conn):
+    # (conexão com a cópia analítica do banco de conn, momento da cópia).
+    # A primeira cópia é feita na hora; as seguintes, em segundo plano.
+    caminho = caminho_banco(conn)
+    copia = caminho_copia(caminho)
+    if not os.path.exists(copia):
+        atualizar(caminho)
+    leitor = _abrir_copia(copia, type(conn))
+    try:
+        criada_em, escritas_copia = leitor.execute("SELECT criada_em, escritas FROM copia_info").fetchone()
+        criada_em = datetime.fromisoformat(criada_em)
+        if datetime.now() - criada_em > IDADE_MAXIMA or escritas(conn) - escritas_copia >= ESCRITAS_MAXIMAS:
+            _atualizar_em_segundo_plano(caminho)
+        if hasattr(leitor, "registro"):
+            # Conexão do profiler: as consultas na cópia entram no mesmo registro
+            leitor.registro = conn.registro
+        yield leitor, criada_em
+    finally:
+        leitor.close()
@@ -0,0 +1,435 @@
+# API HTTP para integrações: clientes, serviços, agendamentos, séries
+# recorrentes e livro-caixa de cada prestador, sem passar pela interface do
+# Streamlit.
+#
+# As rotas usam as mesmas operações das telas (operacoes.py) e as mesmas
+# leituras (dados.py). Elas são assíncronas; o trabalho no SQLite, que
+# bloqueia, roda no pool de threads do anyio, e cada thread tem a sua conexão
+# com cada banco (prestadores.ConexoesLRU). As gravações de um mesmo banco
+# passam por uma trava do processo: o SQLite aceita um escritor por vez, e
+# esperar na trava sai mais barato que esperar no busy_timeout.
+#
+# Para volume, use as rotas /lote: até MAXIMO_LOTE itens num commit só
+# (dados.em_lote), em vez de um commit, e um fsync, por item. Em
+# /agendamentos/lote um horário ocupado recusa só aquele item.
+#
+# Dependências em requirements-api.txt. Para rodar:
+#     uvicorn api:app --port 8000
+# Com SIPS_API_TOKEN definido, toda requisição precisa do cabeçalho
+# "Authorization: Bearer <token>". Os prestadores são os de prestadores.py;
+# sem catálogo, o banco único responde como /padrao.
+
+import logging
+import os
+import secrets
+import threading
+from contextlib import asynccontextmanager, closing
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Literal
+
+import anyio
+from fastapi import Body, Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+# dados.py usa st.cache_data, que fora do Streamlit guarda o cache em memória
+# (o esperado aqui) e avisa disso ao decorar cada função. O filtro precisa
+# vir antes do import de dados.
+logging.getLogger("streamlit.runtime.caching.cache_data_api").addFilter(
+    lambda registro: registro.levelno >= logging.ERROR)
+
+import dados
+import mensageria
+import operacoes
+import prestadores
+from conexao import abrir_conexao
+from migracoes import aplicar_migracoes
+
+MAXIMO_LOTE = 1000
+TAMANHO_MAXIMO_PAGINA = 500
+
+_conexoes = prestadores.ConexoesLRU(prestadores.MAXIMO_CONEXOES)
+_travas = {}
+_trava_travas = threading.Lock()
+
+
+# ------------------------------------------------------------------ modelos
+
+class Cliente(BaseModel):
+    nome: str = Field(min_length=1)
+    telefone: str = Field(min_length=1)
+    cpf: str = Field(min_length=1)
+    endereco: str = Field(min_length=1)
+    email: str = Field(min_length=1)
+    nascimento: date
+    observacoes: str | None = None
+
+
+class Servico(BaseModel):
+    nome: str = Field(min_length=1)
+    duracao: int = Field(gt=0, le=24 * 60)
+    preco: float = Field(ge=0)
+
+
+class Agendamento(BaseModel):
+    cliente_id: int
+    servico_id: int
+    inicio: datetime
+    pagamento: str = operacoes.PAGAMENTO_PADRAO
+    observacoes: str | None = None
+
+
+class Finalizacao(BaseModel):
+    valor: float | None = Field(default=None, gt=0)
+
+
+class Serie(BaseModel):
+    cliente_id: int
+    servico_id: int
+    inicio: datetime
+    frequencia: Literal["semanal", "quinzenal", "mensal"]
+    ate: date | None = None
+    pagamento: str = operacoes.PAGAMENTO_PADRAO
+    observacoes: str | None = None
+
+
+class Remarcacao(BaseModel):
+    inicio: datetime
+    observacoes: str | None = None
+
+
+class Encerramento(BaseModel):
+    ate: date
+
+
+class Lancamento(BaseModel):
+    data: date
+    descricao: str = Field(min_length=1)
+    tipo: Literal["Entrada", "Saída"]
+    valor: float = Field(gt=0)
+    categoria: str = Field(min_length=1)
+    pagamento: str = operacoes.PAGAMENTO_PADRAO
+    observacao: str | None = None
+
+
+# -------------------------------------------------------------- infraestrutura
+
+def _autorizar(request: Request):
+    token = os.environ.get("SIPS_API_TOKEN")
+    if token and not secrets.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+        raise HTTPException(401, "Token inválido.")
+
+
+@lru_cache(maxsize=None)
+def _preparar(caminho):
+    # Cria a pasta e migra cada banco na primeira requisição do processo,
+    # como sips.preparar_banco
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    with closing(abrir_conexao(caminho)) as conn:
+        aplicar_migracoes(conn)
+    return caminho
+
+
+def banco(prestador: str):
+    try:
+        return _preparar(prestadores.caminho(prestador))
+    except KeyError:
+        raise HTTPException(404, f"Prestador {prestador} não encontrado.")
+
+
+def _trava(caminho):
+    with _trava_travas:
+        return _travas.setdefault(caminho, threading.Lock())
+
+
+async def executar(caminho, funcao, *args, escrita=False):
+    # Roda funcao(conn, *args) numa thread, com a conexão dessa thread
+    def tarefa():
+        chave = (caminho, threading.get_ident())
+        with _conexoes.emprestar(chave, lambda: abrir_conexao(caminho)) as conn:
+            if not escrita:
+                return funcao(conn, *args)
+            with _trava(caminho):
+                return funcao(conn, *args)
+    return await anyio.to_thread.run_sync(tarefa)
+
+
+def _registros(df):
+    # DataFrame como lista de dicionários, com None no lugar de NaN
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _hora_local(momento):
+    # O banco guarda horários locais sem fuso
+    return momento.astimezone().replace(tzinfo=None) if momento.tzinfo else momento
+
+
+@asynccontextmanager
+async def _ciclo_de_vida(app):
+    # Com um enviador configurado, a API também despacha a caixa de saída
+    # (ver mensageria.py); a reserva das mensagens permite rodar junto com o
+    # despachante do Streamlit
+    enviador = mensageria.enviador_configurado()
+    parar = mensageria.iniciar_despachante(prestadores.caminhos_ativos, enviador) if enviador else None
+    yield
+    if parar:
+        parar.set()
+    _conexoes.fechar()
+
+
+app = FastAPI(title="SIPS API", dependencies=[Depends(_autorizar)], lifespan=_ciclo_de_vida)
+
+
+@app.exception_handler(ValueError)
+async def _regra_violada(request, erro):
+    return JSONResponse(status_code=422, content={"detail": str(erro)})
+
+
+@app.exception_handler(LookupError)
+async def _nao_encontrado(request, erro):
+    return JSONResponse(status_code=404, content={"detail": str(erro.args[0] if erro.args else erro)})
+
+
+# ---------------------------------------------------------------- clientes
+
+_CAMPOS_CLIENTE = ("id", "nome", "telefone", "cpf", "endereco", "email", "nascimento", "observacoes")
+
+
+def _obter_cliente(conn, id_cliente):
+    cliente = dados.obter_cliente(conn, id_cliente)
+    if cliente is None:
+        raise LookupError(f"Cliente {id_cliente} não encontrado.")
+    return dict(zip(_CAMPOS_CLIENTE, cliente))
+
+
+def _alterar_cliente(conn, id_cliente, cliente):
+    _obter_cliente(conn, id_cliente)
+    operacoes.alterar_cliente(conn, id_cliente, **cliente.model_dump())
+
+
+def _incluir_clientes(conn, clientes):
+    with dados.em_lote(conn):
+        return [operacoes.incluir_cliente(conn, **cliente.model_dump()) for cliente in clientes]
+
+
+def _listar_clientes(conn, busca, apos, tamanho):
+    if busca:
+        # Por relevância, sem paginação
+        campos = ("id", "nome", "telefone", "cpf", "email")
+        return {"itens": [dict(zip(campos, l)) for l in dados.buscar_clientes(conn, busca, tamanho)],
+                "proxima": None}
+    linhas, tem_proxima = dados.pagina_clientes(conn, apos, tamanho)
+    return {"itens": [dict(zip(_CAMPOS_CLIENTE, l)) for l in linhas],
+            "proxima": linhas[-1][0] if tem_proxima else None}
+
+
+@app.get("/{prestador}/clientes")
+async def listar_clientes(caminho: str = Depends(banco), busca: str | None = None, apos: int | None = None,
+                          tamanho: int = Query(dados.TAMANHO_PAGINA, ge=1, le=TAMANHO_MAXIMO_PAGINA)):
+    # Sem busca, paginado por id: passe em apos o "proxima" da página anterior
+    return await executar(caminho, _listar_clientes, busca, apos, tamanho)
+
+
+@app.get("/{prestador}/clientes/{id_cliente}")
+async def obter_cliente(id_cliente: int, caminho: str = Depends(banco)):
+    return await executar(caminho, _obter_cliente, id_cliente)
+
+
+@app.post("/{prestador}/clientes", status_code=201)
+async def incluir_cliente(cliente: Cliente, caminho: str = Depends(banco)):
+    ids = await executar(caminho, _incluir_clientes, [cliente], escrita=True)
+    return {"id": ids[0]}
+
+
+@app.post("/{prestador}/clientes/lote", status_code=201)
+async def incluir_clientes(clientes: list[Cliente] = Body(max_length=MAXIMO_LOTE), caminho: str = Depends(banco)):
+    return {"ids": await executar(caminho, _incluir_clientes, clientes, escrita=True)}
+
+
+@app.put("/{prestador}/clientes/{id_cliente}", status_code=204)
+async def alterar_cliente(id_cliente: int, cliente: Cliente, caminho: str = Depends(banco)):
+    await executar(caminho, _alterar_cliente, id_cliente, cliente, escrita=True)
+    return Response(status_code=204)
+
+
+@app.delete("/{prestador}/clientes/{id_cliente}", status_code=204)
+async def excluir_cliente(id_cliente: int, caminho: str = Depends(banco)):
+    await executar(caminho, operacoes.excluir_cliente, id_cliente, escrita=True)
+    return Response(status_code=204)
+
+
+# ---------------------------------------------------------------- serviços
+
+def _listar_servicos(conn, busca, tamanho):
+    campos = ("id", "nome", "duracao", "preco")
+    return [dict(zip(campos, l)) for l in dados.buscar_servicos(conn, busca, tamanho)]
+
+
+def _incluir_servico(conn, servico):
+    return operacoes.incluir_servico(conn, servico.nome, servico.duracao, servico.preco)
+
+
+@app.get("/{prestador}/servicos")
+async def listar_servicos(caminho: str = Depends(banco), busca: str = "",
+                          tamanho: int = Query(dados.LIMITE_BUSCA, ge=1, le=TAMANHO_MAXIMO_PAGINA)):
+    # Serviços cujo nome começa com busca, em ordem alfabética
+    return await executar(caminho, _listar_servicos, busca, tamanho)
+
+
+@app.post("/{prestador}/servicos", status_code=201)
+async def incluir_servico(servico: Servico, caminho: str = Depends(banco)):
+    return {"id": await executar(caminho, _incluir_servico, servico, escrita=True)}
+
+
+# ------------------------------------------------------------ agendamentos
+
+_CAMPOS_AGENDAMENTO = ("id", "cliente_id", "servico_id", "data_hora", "fim", "observacoes", "status")
+
+
+def _obter_agendamento(conn, id_agendamento):
+    agendamento = dados.obter_agendamento(conn, id_agendamento)
+    if agendamento is None:
+        raise LookupError(f"Agendamento {id_agendamento} não encontrado.")
+    return dict(zip(_CAMPOS_AGENDAMENTO, agendamento))
+
+
+def _agendar(conn, agendamento):
+    return operacoes.agendar_servico(conn, agendamento.cliente_id, agendamento.servico_id,
+                                     _hora_local(agendamento.inicio), agendamento.pagamento,
+                                     agendamento.observacoes)
+
+
+def _agendar_lote(conn, agendamentos):
+    # Um commit para o lote; cada item tem o seu SAVEPOINT (ver dados.em_lote)
+    resultados = []
+    with dados.em_lote(conn):
+        for agendamento in agendamentos:
+            try:
+                resultados.append({"id": _agendar(conn, agendamento)})
+            except ValueError as erro:
+                resultados.append({"erro": str(erro)})
+    return resultados
+
+
+@app.get("/{prestador}/agendamentos")
+async def listar_agendamentos(inicio: datetime, fim: datetime, caminho: str = Depends(banco)):
+    # Agendamentos com início em [inicio, fim), inclusive os arquivados
+    df = await executar(caminho, dados.agendamentos_periodo, _hora_local(inicio), _hora_local(fim))
+    return _registros(df)
+
+
+@app.get("/{prestador}/agendamentos/{id_agendamento}")
+async def obter_agendamento(id_agendamento: int, caminho: str = Depends(banco)):
+    return await executar(caminho, _obter_agendamento, id_agendamento)
+
+
+@app.post("/{prestador}/agendamentos", status_code=201)
+async def agendar(agendamento: Agendamento, caminho: str = Depends(banco)):
+    # 422 se o horário estiver ocupado; a confirmação entra na caixa de saída
+    return {"id": await executar(caminho, _agendar, agendamento, escrita=True)}
+
+
+@app.post("/{prestador}/agendamentos/lote")
+async def agendar_lote(agendamentos: list[Agendamento] = Body(max_length=MAXIMO_LOTE),
+                       caminho: str = Depends(banco)):
+    # Um resultado por item, na mesma ordem: {"id": ...} ou {"erro": ...}
+    return {"resultados": await executar(caminho, _agendar_lote, agendamentos, escrita=True)}
+
+
+@app.post("/{prestador}/agendamentos/{id_agendamento}/finalizar", status_code=204)
+async def finalizar(id_agendamento: int, finalizacao: Finalizacao, caminho: str = Depends(banco)):
+    # O preço do serviço foi lançado ao agendar; valor é só um acréscimo
+    await executar(caminho, operacoes.finalizar_agendamento, id_agendamento, finalizacao.valor, escrita=True)
+    return Response(status_code=204)
+
+
+# ------------------------------------------------------------------ séries
+
+def _agendar_serie(conn, serie):
+    return operacoes.agendar_serie(conn, serie.cliente_id, serie.servico_id, _hora_local(serie.inicio),
+                                   serie.frequencia, serie.ate, serie.pagamento, serie.observacoes)
+
+
+@app.post("/{prestador}/series", status_code=201)
+async def agendar_serie(serie: Serie, caminho: str = Depends(banco)):
+    # 422 se alguma ocorrência do próximo ano cair num horário ocupado. As
+    # ocorrências aparecem em GET /agendamentos com id nulo e serie_id.
+    return {"id": await executar(caminho, _agendar_serie, serie, escrita=True)}
+
+
+@app.post("/{prestador}/series/{id_serie}/encerrar", status_code=204)
+async def encerrar_serie(id_serie: int, encerramento: Encerramento, caminho: str = Depends(banco)):
+    await executar(caminho, operacoes.encerrar_serie, id_serie, encerramento.ate, escrita=True)
+    return Response(status_code=204)
+
+
+# As ocorrências são identificadas pelo horário original (data_hora em GET /agendamentos)
+
+@app.post("/{prestador}/series/{id_serie}/ocorrencias/{ocorrencia}/cancelar", status_code=204)
+async def cancelar_ocorrencia(id_serie: int, ocorrencia: datetime, caminho: str = Depends(banco)):
+    await executar(caminho, operacoes.cancelar_ocorrencia, id_serie, _hora_local(ocorrencia), escrita=True)
+    return Response(status_code=204)
+
+
+@app.post("/{prestador}/series/{id_serie}/ocorrencias/{ocorrencia}/remarcar", status_code=201)
+async def remarcar_ocorrencia(id_serie: int, ocorrencia: datetime, remarcacao: Remarcacao,
+                              caminho: str = Depends(banco)):
+    # A ocorrência vira um agendamento comum; devolve o id dele
+    return {"id": await executar(caminho, operacoes.remarcar_ocorrencia, id_serie, _hora_local(ocorrencia),
+                                 _hora_local(remarcacao.inicio), remarcacao.observacoes, escrita=True)}
+
+
+@app.post("/{prestador}/series/{id_serie}/ocorrencias/{ocorrencia}/concluir", status_code=201)
+async def concluir_ocorrencia(id_serie: int, ocorrencia: datetime, finalizacao: Finalizacao,
+                              caminho: str = Depends(banco)):
+    # Grava a ocorrência como agendamento concluído e lança o valor
+    return {"id": await executar(caminho, operacoes.concluir_ocorrencia, id_serie, _hora_local(ocorrencia),
+                                 finalizacao.valor, escrita=True)}
+
+
+# -------------------------------------------------------------- financeiro
+
+def _pagina_financeiro(conn, filtros, apos, tamanho):
+    df, chave_ultima, tem_proxima = dados.pagina_financeiro(conn, *filtros, apos=apos, tamanho=tamanho)
+    return {"itens": _registros(df), "proxima": "|".join(map(str, chave_ultima)) if tem_proxima else None}
+
+
+def _lancar_lote(conn, lancamentos):
+    with dados.em_lote(conn):
+        return [operacoes.lancar(conn, **lancamento.model_dump()) for lancamento in lancamentos]
+
+
+@app.get("/{prestador}/financeiro")
+async def listar_lancamentos(caminho: str = Depends(banco), inicio: date | None = None, fim: date | None = None,
+                             tipo: Literal["Entrada", "Saída"] | None = None, categoria: str | None = None,
+                             busca: str | None = None, apos: str | None = None,
+                             tamanho: int = Query(dados.TAMANHO_PAGINA, ge=1, le=TAMANHO_MAXIMO_PAGINA)):
+    # Do mais recente para o mais antigo; apos é o "proxima" da página anterior
+    chave = None
+    if apos:
+        data, _, id_lancamento = apos.rpartition("|")
+        if not data or not id_lancamento.isdigit():
+            raise HTTPException(422, "Valor de apos inválido.")
+        chave = (data, int(id_lancamento))
+    return await executar(caminho, _pagina_financeiro, (inicio, fim, tipo, categoria, busca), chave, tamanho)
+
+
+@app.post("/{prestador}/financeiro", status_code=201)
+async def lancar(lancamento: Lancamento, caminho: str = Depends(banco)):
+    ids = await executar(caminho, _lancar_lote, [lancamento], escrita=True)
+    return {"id": ids[0]}
+
+
+@app.post("/{prestador}/financeiro/lote", status_code=201)
+async def lancar_lote(lancamentos: list[Lancamento] = Body(max_length=MAXIMO_LOTE), caminho: str = Depends(banco)):
+    return {"ids": await executar(caminho, _lancar_lote, lancamentos, escrita=True)}
+
+
+@app.delete("/{prestador}/financeiro", status_code=204)
+async def excluir_lancamentos(ids: list[int] = Query(max_length=MAXIMO_LOTE), caminho: str = Depends(banco)):
+    # 422, sem excluir nada, se algum lançamento já estiver arquivado
+    await executar(caminho, operacoes.excluir_lancamentos, ids, escrita=True)
+    return Response(status_code=204)
@@ -0,0 +1,127 @@
+# Arquivamento dos meses antigos de financeiro e agendamentos.
+#
+# Os meses anteriores aos MESES_QUENTES mais recentes saem do SQLite e vão
+# para os arquivos Parquet de arquivo.py, um por tabela e mês. Cada mês é
+# arquivado numa transação própria: o arquivo é gravado (ou completado, se o
+# mês já tinha sido arquivado antes) e só então as linhas são apagadas e o
+# catálogo atualizado; se algo falhar, as linhas continuam no banco.
+#
+# As linhas saem com os triggers desligados (sem_triggers): saldo_diario e os
+# resumos do dashboard continuam contando o histórico arquivado. Por isso
+# reconstruir_saldo_diario e reconstruir_resumos não devem ser usados depois
+# de arquivar.
+#
+# Uso pela linha de comando (sem --banco, arquiva todos os prestadores):
+#     python -m arquivamento
+#     python -m arquivamento --banco data/banco.db --meses-quentes 6 --compactar
+
+import argparse
+from contextlib import closing
+from datetime import date, datetime
+
+import arquivo
+import dados
+import prestadores
+from conexao import abrir_conexao, caminho_banco
+from migracoes import aplicar_migracoes, sem_triggers
+
+MESES_QUENTES = 12
+
+
+def _somar_meses(dia, meses):
+    total = dia.year * 12 + dia.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def primeiro_mes_quente(hoje=None, meses_quentes=MESES_QUENTES):
+    # Primeiro dia do mês mais antigo que continua no SQLite
+    return _somar_meses(hoje or date.today(), -meses_quentes)
+
+
+def arquivar_mes(conn, tabela, inicio):
+    # Arquiva as linhas de `tabela` do mês que começa em inicio; devolve
+    # quantas saíram do SQLite
+    coluna = arquivo.COLUNA_DATA[tabela]
+    periodo = (inicio.isoformat(), _somar_meses(inicio, 1).isoformat())
+    mes = inicio.isoformat()[:7]
+    with dados.transacao(conn, tabela) as cursor:
+        linhas = cursor.execute(
+            f"SELECT {', '.join(arquivo.ESQUEMAS[tabela].names)} FROM {tabela} "
+            f"WHERE {coluna} >= ? AND {coluna} < ?", periodo
+        ).fetchall()
+        if not linhas:
+            return 0
+        catalogado = cursor.execute("SELECT 1 FROM arquivo_particoes WHERE tabela = ? AND mes = ?",
+                                    (tabela, mes)).fetchone() is not None
+        particao = arquivo.gravar_particao(caminho_banco(conn), tabela, mes, arquivo.tabela_arrow(tabela, linhas),
+                                           completar=catalogado)
+        if tabela == "agendamentos":
+            # Mensagens de agendamentos antigos já não serão enviadas
+            cursor.execute(
+                "DELETE FROM mensagens WHERE agendamento_id IN "
+                "(SELECT id FROM agendamentos WHERE data_hora >= ? AND data_hora < ?)", periodo
+            )
+        with sem_triggers(cursor, tabela):
+            cursor.execute(f"DELETE FROM {tabela} WHERE {coluna} >= ? AND {coluna} < ?", periodo)
+        cursor.execute('''
+            INSERT INTO arquivo_particoes (tabela, mes, arquivo, linhas, primeira, ultima, atualizado_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (tabela, mes) DO UPDATE SET
+                arquivo = excluded.arquivo, linhas = excluded.linhas, primeira = excluded.primeira,
+                ultima = excluded.ultima, atualizado_em = excluded.atualizado_em
+        ''', (tabela, mes) + particao + (datetime.now().isoformat(timespec="seconds"),))
+    return len(linhas)
+
+
+def arquivar(conn, meses_quentes=MESES_QUENTES, hoje=None):
+    # Arquiva, mês a mês, tudo o que for anterior ao primeiro mês quente.
+    # Devolve {(tabela, mês): linhas arquivadas}.
+    limite = primeiro_mes_quente(hoje, meses_quentes)
+    resultado = {}
+    for tabela, coluna in arquivo.COLUNA_DATA.items():
+        inicio = date.min
+        while True:
+            # Próximo mês com linhas, pelo índice da coluna de data
+            proxima = conn.execute(f"SELECT MIN({coluna}) FROM {tabela} WHERE {coluna} >= ?",
+                                   (inicio.isoformat(),)).fetchone()[0]
+            if proxima is None:
+                break
+            inicio = date.fromisoformat(proxima[:7] + "-01")
+            if inicio >= limite:
+                break
+            quantidade = arquivar_mes(conn, tabela, inicio)
+            if quantidade:
+                resultado[(tabela, inicio.isoformat()[:7])] = quantidade
+            inicio = _somar_meses(inicio, 1)
+    return resultado
+
+
+def arquivar_banco(caminho, meses_quentes=MESES_QUENTES, compactar=False):
+    with closing(abrir_conexao(caminho)) as conn:
+        aplicar_migracoes(conn)
+        resultado = arquivar(conn, meses_quentes)
+        if compactar and resultado:
+            # Devolve ao disco as páginas liberadas pelas linhas arquivadas
+            conn.execute("VACUUM")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m arquivamento",
+                                     description="Arquiva em Parquet os meses antigos do banco")
+    parser.add_argument("--banco", action="append",
+                        help="banco a arquivar (pode repetir); sem ele, os de todos os prestadores")
+    parser.add_argument("--meses-quentes", type=int, default=MESES_QUENTES,
+                        help=f"meses recentes que ficam no SQLite (padrão: {MESES_QUENTES})")
+    parser.add_argument("--compactar", action="store_true", help="roda VACUUM depois de arquivar")
+    args = parser.parse_args()
+
+    for caminho in args.banco or prestadores.caminhos_ativos():
+        resultado = arquivar_banco(caminho, args.meses_quentes, args.compactar)
+        print(f"{caminho}: {sum(resultado.values())} linha(s) em {len(resultado)} partição(ões)")
+        for (tabela, mes), quantidade in resultado.items():
+            print(f"  {tabela} {mes}: {quantidade}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# Arquivo histórico: meses fechados de financeiro e agendamentos em Parquet.
+#
+# Cada mês arquivado de uma tabela vira um arquivo Parquet (zstd) em
+# <banco>.arquivo/<tabela>/<AAAA-MM>.parquet e sai do SQLite (ver
+# arquivamento.py). A tabela arquivo_particoes, dentro do próprio banco,
+# lista as partições com o caminho relativo à pasta do banco, o que vale
+# também para a cópia analítica, que fica na mesma pasta.
+#
+# As leituras juntam as linhas "quentes" do SQLite com as "frias" dos
+# arquivos: só as partições dos meses do filtro são abertas e só as colunas
+# pedidas são lidas. Durante o arquivamento de um mês as mesmas linhas podem
+# estar nos dois lugares por um instante; quem junta os dois lados descarta
+# a cópia fria pelo id (sem_repetidos).
+
+import operator
+import os
+from datetime import date, timedelta
+from functools import reduce
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from conexao import caminho_banco
+
+ESQUEMAS = {
+    "financeiro": pa.schema([
+        ("id", pa.int64()),
+        ("data", pa.string()),
+        ("descricao", pa.string()),
+        ("tipo", pa.string()),
+        ("valor", pa.float64()),
+        ("categoria", pa.string()),
+        ("pagamento", pa.string()),
+        ("observacao", pa.string()),
+    ]),
+    "agendamentos": pa.schema([
+        ("id", pa.int64()),
+        ("cliente_id", pa.int64()),
+        ("servico_id", pa.int64()),
+        ("data_hora", pa.string()),
+        ("fim", pa.string()),
+        ("observacoes", pa.string()),
+        ("status", pa.string()),
+    ]),
+}
+
+# Coluna que define o mês de cada linha
+COLUNA_DATA = {"financeiro": "data", "agendamentos": "data_hora"}
+
+
+def pasta(caminho):
+    raiz, _ = os.path.splitext(caminho)
+    return f"{raiz}.arquivo"
+
+
+def tabela_arrow(tabela, linhas):
+    # Linhas (tuplas na ordem do esquema) lidas do SQLite como tabela Arrow
+    esquema = ESQUEMAS[tabela]
+    colunas = list(zip(*linhas)) or [[] for _ in esquema]
+    return pa.Table.from_arrays([pa.array(valores, type=campo.type) for valores, campo in zip(colunas, esquema)],
+                                schema=esquema)
+
+
+def particoes(conn, tabela, inicio=None, fim=None):
+    # (mês, arquivo) das partições de `tabela` com meses entre inicio e fim,
+    # do mais antigo para o mais novo
+    sql = "SELECT mes, arquivo FROM arquivo_particoes WHERE tabela = ?"
+    params = [tabela]
+    if inicio:
+        sql += " AND mes >= ?"
+        params.append(inicio.isoformat()[:7])
+    if fim:
+        sql += " AND mes <= ?"
+        params.append(fim.isoformat()[:7])
+    base = os.path.dirname(caminho_banco(conn))
+    return [(mes, os.path.join(base, arquivo)) for mes, arquivo in conn.execute(sql + " ORDER BY mes", params)]
+
+
+def filtro_financeiro(inicio=None, fim=None, tipo=None, categoria=None, busca=None):
+    # Os filtros de dados.filtros_financeiro como expressão do pyarrow
+    condicoes = []
+    if inicio:
+        condicoes.append(ds.field("data") >= inicio.isoformat())
+    if fim:
+        condicoes.append(ds.field("data") < (fim + timedelta(days=1)).isoformat())
+    if tipo:
+        condicoes.append(ds.field("tipo") == tipo)
+    if categoria:
+        condicoes.append(ds.field("categoria") == categoria)
+    if busca:
+        condicoes.append(pc.match_substring(ds.field("descricao"), busca, ignore_case=True))
+    return reduce(operator.and_, condicoes) if condicoes else None
+
+
+def filtro_periodo(coluna, inicio, fim):
+    # coluna em [inicio, fim)
+    return (ds.field(coluna) >= inicio.isoformat()) & (ds.field(coluna) < fim.isoformat())
+
+
+def distintos(tabela, coluna):
+    return pc.unique(tabela[coluna]).to_pylist()
+
+
+def ler(arquivos, tabela, colunas=None, filtro=None):
+    # Lê as partições como uma tabela Arrow, só com as colunas pedidas
+    esquema = ESQUEMAS[tabela]
+    if not arquivos:
+        vazia = esquema.empty_table()
+        return vazia.select(colunas) if colunas else vazia
+    return ds.dataset(arquivos, schema=esquema, format="parquet").to_table(columns=colunas, filter=filtro)
+
+
+def ler_periodo(conn, tabela, inicio=None, fim=None, colunas=None, filtro=None):
+    arquivos = [arquivo for _, arquivo in particoes(conn, tabela, inicio, fim)]
+    return ler(arquivos, tabela, colunas, filtro)
+
+
+def sem_repetidos(fria, ids_quentes):
+    # Linhas frias cujo id não está entre as quentes
+    if fria.num_rows == 0 or len(ids_quentes) == 0:
+        return fria
+    return fria.filter(pc.invert(pc.is_in(fria["id"], value_set=pa.array(ids_quentes, pa.int64()))))
+
+
+def pagina_financeiro(conn, filtros, apos, quantidade):
+    # Até `quantidade` lançamentos frios, do mais recente para o mais antigo,
+    # anteriores à chave (data, id). Abre as partições do mês da chave para
+    # trás e para assim que junta linhas suficientes.
+    inicio, fim = filtros[0], filtros[1]
+    if apos:
+        limite = date.fromisoformat(apos[0][:10])
+        fim = min(fim, limite) if fim else limite
+    filtro = filtro_financeiro(*filtros)
+    if apos:
+        data, id_lancamento = apos
+        chave = (ds.field("data") < data) | ((ds.field("data") == data) & (ds.field("id") < id_lancamento))
+        filtro = chave if filtro is None else filtro & chave
+    partes = []
+    linhas = 0
+    for _, arquivo in reversed(particoes(conn, "financeiro", inicio, fim)):
+        parte = ler([arquivo], "financeiro", filtro=filtro)
+        partes.append(parte)
+        linhas += parte.num_rows
+        if linhas >= quantidade:
+            break
+    if not partes:
+        return ESQUEMAS["financeiro"].empty_table()
+    return pa.concat_tables(partes).sort_by([("data", "descending"), ("id", "descending")]).slice(0, quantidade)
+
+
+def gravar_particao(caminho, tabela, mes, novas, completar=False):
+    # Grava a partição do mês e devolve (arquivo relativo à pasta do banco,
+    # linhas, primeira data, última data). Com completar, junta as linhas às
+    # que já estão no arquivo; as de mesmo id são substituídas. Sem completar
+    # (mês fora do catálogo), um arquivo que sobrou de outro banco é
+    # sobrescrito. A troca por os.replace é atômica.
+    destino = os.path.join(pasta(caminho), tabela, f"{mes}.parquet")
+    if completar and os.path.exists(destino):
+        anteriores = sem_repetidos(pq.read_table(destino, schema=ESQUEMAS[tabela]), novas["id"].to_pylist())
+        novas = pa.concat_tables([anteriores, novas])
+    novas = novas.sort_by([(COLUNA_DATA[tabela], "ascending"), ("id", "ascending")])
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    pq.write_table(novas, temporario, compression="zstd")
+    os.replace(temporario, destino)
+    limites = pc.min_max(novas[COLUNA_DATA[tabela]]).as_py()
+    return (os.path.relpath(destino, os.path.dirname(os.path.abspath(caminho))), novas.num_rows,
+            limites["min"][:10], limites["max"][:10])
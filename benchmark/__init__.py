@@ -0,0 +1,3 @@
+# Benchmark dos caminhos de dados do app: gerador de banco sintético
+# (gerador.py) e cenários cronometrados por tela (cenarios.py).
+# Uso: python -m benchmark --help
@@ -0,0 +1,119 @@
+# Linha de comando do benchmark.
+#
+#   python -m benchmark                        # gera o banco (se preciso) e mede
+#   python -m benchmark --escala 0.05          # volumes reduzidos, para testes rápidos
+#   python -m benchmark --saida atual.json --comparar base.json
+#
+# O resultado é gravado em JSON; com --comparar, o comando termina com código 1
+# se algum cenário ficou mais lento que a tolerância em relação à referência.
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+
+import streamlit.logger
+
+# Fora de um app, o cache do Streamlit avisa a cada função decorada; o nível
+# precisa ser ajustado antes de importar dados.py (via cenarios)
+streamlit.logger.set_log_level("error")
+
+from conexao import abrir_conexao  # noqa: E402
+from migracoes import aplicar_migracoes  # noqa: E402
+
+from . import cenarios, gerador  # noqa: E402
+
+
+def _versao_app():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _banco_compativel(caminho, escala, semente):
+    # Reaproveita um banco já gerado com os mesmos parâmetros
+    if not os.path.exists(caminho):
+        return False
+    conn = sqlite3.connect(caminho)
+    try:
+        linha = conn.execute("SELECT escala, semente FROM benchmark_origem").fetchone()
+    except sqlite3.Error:
+        linha = None
+    conn.close()
+    return linha == (escala, semente)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="Benchmark dos caminhos de dados do SIPS")
+    parser.add_argument("--banco", default=os.path.join("data", "benchmark.db"))
+    parser.add_argument("--escala", type=float, default=1.0, help="fração dos volumes de referência")
+    parser.add_argument("--semente", type=int, default=gerador.SEMENTE)
+    parser.add_argument("--regerar", action="store_true", help="gera o banco de novo mesmo se já existir")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--cenarios", nargs="*", choices=list(cenarios.CENARIOS))
+    parser.add_argument("--saida", help="arquivo JSON de resultado (padrão: saída padrão)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior usada como referência")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="piora aceita na comparação (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.regerar or not _banco_compativel(args.banco, args.escala, args.semente):
+        print(f"Gerando {args.banco} (escala {args.escala}, semente {args.semente})...", file=sys.stderr)
+        gerador.gerar_banco(
+            args.banco, args.escala, args.semente,
+            ao_progredir=lambda tabela, n: print(f"  {tabela}: {n:,}", file=sys.stderr)
+        )
+        conn = sqlite3.connect(args.banco)
+        conn.execute("CREATE TABLE benchmark_origem (escala REAL, semente INTEGER)")
+        conn.execute("INSERT INTO benchmark_origem VALUES (?, ?)", (args.escala, args.semente))
+        conn.commit()
+        conn.close()
+
+    conn = abrir_conexao(args.banco)
+    aplicar_migracoes(conn)
+    ctx = cenarios.contexto(conn)
+    ctx["caminho"] = args.banco
+
+    resultado = {
+        "versao_app": _versao_app(),
+        "executado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+        },
+        "escala": args.escala,
+        "semente": args.semente,
+        "volumes": {
+            tabela: conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+            for tabela in gerador.VOLUMES
+        },
+        "cenarios": cenarios.executar(conn, ctx, args.cenarios, args.repeticoes),
+    }
+    conn.close()
+
+    codigo = 0
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            referencia = json.load(arquivo)
+        resultado["regressoes"] = cenarios.comparar(resultado, referencia, args.tolerancia)
+        for r in resultado["regressoes"]:
+            print(f"REGRESSÃO {r['cenario']}: {r['antes_ms']} ms -> {r['agora_ms']} ms", file=sys.stderr)
+        codigo = 1 if resultado["regressoes"] else 0
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto + "\n")
+    else:
+        print(texto)
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+# Teste de carga com várias sessões simultâneas do app.
+#
+# Cada sessão é um AppTest (streamlit.testing) do sips.py num processo
+# próprio: o AppTest troca o runtime global do Streamlit a cada execução, e
+# dois não podem rodar ao mesmo tempo no mesmo processo. É como ter vários
+# processos do servidor sobre o mesmo banco: as sessões gravam em paralelo
+# pelas suas próprias conexões, e cada processo tem o seu cache. As sessões
+# sorteiam ações das telas (agendar, lançar no financeiro, localizar
+# cliente e abrir o Dashboard), e cada ação é cronometrada do primeiro
+# widget tocado ao fim da última execução do script.
+#
+# O banco é gerado pelo gerador do benchmark numa pasta temporária. Os
+# agendamentos novos caem nos próximos DIAS_AGENDA dias, para que as sessões
+# disputem os mesmos horários. No final vêm a vazão, as latências (p50, p95
+# e p99) por ação, os erros "database is locked" e as verificações de
+# consistência do banco: integridade do SQLite, agendamentos sobrepostos,
+# gravações perdidas ou duplicadas e tabelas de resumo fora de sincronia.
+#
+#   python -m benchmark.carga --sessoes 8 --duracao 60
+#   python -m benchmark.carga --sessoes 4 --acoes 50 --saida carga.json
+#
+# O resultado sai em JSON; o comando termina com código 1 se houve bloqueio,
+# erro ou inconsistência.
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time as hora, timedelta
+
+from streamlit import config as config_streamlit
+from streamlit.testing.v1 import AppTest
+
+from . import gerador
+
+# Sem servidor, o Streamlit avisa da falta de contexto de execução ao criar
+# cada AppTest. O nível do log é uma opção de linha de comando (logger.level):
+# st.set_option a recusa e as variáveis STREAMLIT_* só valem pelo comando
+# streamlit. Passada como opção de linha de comando, ela continua valendo
+# quando o AppTest lê a configuração de novo. Este import roda também em cada
+# processo das sessões (spawn).
+config_streamlit.get_config_options(force_reparse=True, options_from_flags={"logger.level": "error"})
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(RAIZ, "sips.py")
+
+PESOS = {"agendar": 3, "lancar": 3, "localizar": 2, "dashboard": 1}
+DIAS_AGENDA = 3
+TEMPO_LIMITE = 120
+BLOQUEIO = "database is locked"
+
+
+# ---------------------------------------------------------------- ações
+
+def _rotulo(widgets, rotulo):
+    return next(w for w in widgets if w.label == rotulo)
+
+
+def _ir(at, menu):
+    # Troca de tela pelo menu lateral, como o usuário faria
+    menu_lateral = at.sidebar.selectbox[0]
+    if menu_lateral.value != menu:
+        menu_lateral.select(menu).run()
+
+
+def abrir(at, ctx, rng):
+    at.run()
+
+
+def agendar(at, ctx, rng):
+    _ir(at, "📇 Agendar")
+    at.text_input(key="agendar_cliente_busca").input(rng.choice(ctx["clientes"]))
+    at.text_input(key="agendar_servico_busca").input(rng.choice(ctx["servicos"]))
+    at.date_input(key="agendar_data").set_value(date.today() + timedelta(days=rng.randint(1, DIAS_AGENDA)))
+    at.time_input(key="agendar_hora").set_value(hora(rng.randrange(8, 17), rng.choice([0, 15, 30, 45])))
+    at.run()
+    _rotulo(at.button, "Agendar").click().run()
+    return "Agendamento criado"
+
+
+def lancar(at, ctx, rng):
+    _ir(at, "💰 Financeiro")
+    tipo = rng.choice(["Entrada", "Saída"])
+    _rotulo(at.selectbox, "📈 Tipo").select(tipo)
+    categoria = _rotulo(at.selectbox, "🏷️ Categoria (Serviço)")
+    categoria.select(rng.choice(categoria.options[1:]))
+    _rotulo(at.text_input, "📝 Descrição").input(f"Carga {tipo.lower()} {rng.randrange(10 ** 6)}")
+    _rotulo(at.number_input, "💰 Valor (R$)").set_value(round(rng.uniform(10, 500), 2))
+    _rotulo(at.button, "💾 Salvar Lançamento").click().run()
+    return "Lançamento salvo"
+
+
+def localizar(at, ctx, rng):
+    _ir(at, "👤 Cliente")
+    rotulo = "Digite nome, telefone, CPF, email ou observação para buscar"
+    if not any(w.label == rotulo for w in at.text_input):
+        _rotulo(at.button, "🔍 Localizar").click().run()
+    nome = rng.choice(ctx["clientes"]).split()
+    _rotulo(at.text_input, rotulo).input(" ".join(nome[:rng.randint(1, len(nome))])).run()
+
+
+def dashboard(at, ctx, rng):
+    if at.sidebar.selectbox[0].value == "📊 Dashboard":
+        at.run()
+    else:
+        _ir(at, "📊 Dashboard")
+
+
+ACOES = {"abrir": abrir, "agendar": agendar, "lancar": lancar, "localizar": localizar, "dashboard": dashboard}
+
+
+def _executar(at, ctx, rng, acao):
+    # (resultado, ms, mensagem). resultado: "ok", "recusada" (regra de
+    # negócio, como horário ocupado), "bloqueio" ou "erro"
+    inicio = time.perf_counter()
+    try:
+        sucesso = ACOES[acao](at, ctx, rng)
+    except Exception as erro:
+        mensagem = f"{type(erro).__name__}: {erro}"
+        return ("bloqueio" if BLOQUEIO in mensagem else "erro"), (time.perf_counter() - inicio) * 1000, mensagem
+    ms = (time.perf_counter() - inicio) * 1000
+    excecoes = [e.message for e in at.exception]
+    if excecoes:
+        return ("bloqueio" if any(BLOQUEIO in e for e in excecoes) else "erro"), ms, excecoes[0]
+    if sucesso and not any(sucesso in s.value for s in at.success):
+        return "recusada", ms, next((e.value for e in at.error), None)
+    return "ok", ms, None
+
+
+# -------------------------------------------------------------- sessões
+
+def _sessao(numero, ctx, pasta, largada, duracao, maximo):
+    # Roda num processo à parte; devolve [(sessão, ação, resultado, ms, mensagem)]
+    os.chdir(pasta)  # o app abre data/banco.db a partir da pasta atual
+    rng = random.Random(ctx["semente"] * 1000 + numero)
+    at = AppTest.from_file(APP, default_timeout=TEMPO_LIMITE)
+    registros = [(numero, "abrir") + _executar(at, ctx, rng, "abrir")]
+    largada.wait()
+    prazo = time.monotonic() + duracao if duracao else math.inf
+    acoes, pesos = list(PESOS), list(PESOS.values())
+    while time.monotonic() < prazo and (maximo is None or len(registros) <= maximo):
+        acao = rng.choices(acoes, pesos)[0]
+        registros.append((numero, acao) + _executar(at, ctx, rng, acao))
+    return registros
+
+
+def _percentil(valores, p):
+    # Pelo posto mais próximo
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def _estatisticas(registros, segundos):
+    por_acao = defaultdict(list)
+    for _, acao, resultado, ms, mensagem in registros:
+        por_acao[acao].append((resultado, ms, mensagem))
+    acoes = {}
+    for acao, lista in por_acao.items():
+        tempos = [ms for _, ms, _ in lista]
+        contagem = defaultdict(int)
+        for resultado, _, _ in lista:
+            contagem[resultado] += 1
+        acoes[acao] = {
+            "quantidade": len(lista),
+            **{r: contagem[r] for r in ("ok", "recusada", "bloqueio", "erro")},
+            "p50_ms": round(_percentil(tempos, 50), 1),
+            "p95_ms": round(_percentil(tempos, 95), 1),
+            "p99_ms": round(_percentil(tempos, 99), 1),
+            "max_ms": round(max(tempos), 1),
+        }
+    medidas = [r for r in registros if r[1] != "abrir"]
+    return {
+        "acoes_por_segundo": round(len(medidas) / segundos, 2) if segundos else None,
+        "acoes": acoes,
+        "bloqueios": sum(1 for r in registros if r[2] == "bloqueio"),
+        "erros": sorted({r[4] for r in registros if r[2] in ("bloqueio", "erro")})[:20],
+    }
+
+
+# ---------------------------------------------------------- consistência
+
+def _marcos(conn):
+    # Maiores ids antes da carga: o que vier depois foi gravado pelas sessões
+    return {tabela: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabela}").fetchone()[0]
+            for tabela in ("agendamentos", "financeiro")}
+
+
+def _divergencias(calculado, gravado):
+    # Chaves com valores diferentes (floats comparados ao centavo)
+    diferentes = 0
+    for chave in set(calculado) | set(gravado):
+        a, b = calculado.get(chave), gravado.get(chave)
+        if a is None or b is None or any(abs(x - y) > 0.005 for x, y in zip(a, b)):
+            diferentes += 1
+    return diferentes
+
+
+def verificar(conn, marcos, agendados, lancados):
+    # Problemas encontrados no banco depois da carga: {verificação: detalhe}
+    problemas = {}
+    integridade = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    if integridade != "ok":
+        problemas["integrity_check"] = integridade
+    chaves = conn.execute("PRAGMA foreign_key_check").fetchall()
+    if chaves:
+        problemas["foreign_key_check"] = len(chaves)
+
+    sobrepostos = conn.execute('''
+        SELECT COUNT(*) FROM agendamentos n
+        JOIN agendamentos o ON o.id != n.id AND o.data_hora < n.fim AND o.fim > n.data_hora
+            AND o.data_hora >= datetime(n.data_hora, '-1 day')
+        WHERE n.id > ?
+    ''', (marcos["agendamentos"],)).fetchone()[0]
+    if sobrepostos:
+        problemas["agendamentos_sobrepostos"] = sobrepostos
+
+    # Cada gravação confirmada na tela está no banco uma vez só, com as
+    # linhas que a acompanham na mesma transação
+    novos = conn.execute("SELECT COUNT(*) FROM agendamentos WHERE id > ?", (marcos["agendamentos"],)).fetchone()[0]
+    automaticos, manuais = conn.execute('''
+        SELECT COALESCE(SUM(descricao LIKE 'Agendamento automático:%'), 0),
+               COALESCE(SUM(descricao NOT LIKE 'Agendamento automático:%'), 0)
+        FROM financeiro WHERE id > ?
+    ''', (marcos["financeiro"],)).fetchone()
+    sem_confirmacao = conn.execute('''
+        SELECT COUNT(*) FROM agendamentos a JOIN clientes c ON c.id = a.cliente_id
+        WHERE a.id > ? AND c.telefone != ''
+          AND NOT EXISTS (SELECT 1 FROM mensagens m WHERE m.agendamento_id = a.id AND m.tipo = 'confirmacao')
+    ''', (marcos["agendamentos"],)).fetchone()[0]
+    for nome, gravados, esperados in [("agendamentos", novos, agendados),
+                                      ("lancamentos_automaticos", automaticos, agendados),
+                                      ("lancamentos", manuais, lancados)]:
+        if gravados != esperados:
+            problemas[nome] = f"{gravados} no banco, {esperados} confirmados nas telas"
+    if sem_confirmacao:
+        problemas["agendamentos_sem_confirmacao"] = sem_confirmacao
+
+    # Tabelas mantidas por triggers contra o cálculo direto: (cálculo,
+    # tabela, colunas da chave)
+    fluxo = "CASE WHEN tipo = 'Entrada' THEN valor ELSE -valor END"
+    comparacoes = {
+        "saldo_diario": (
+            f"""SELECT dia, quantidade, SUM(fluxo) OVER (ORDER BY dia)
+                FROM (SELECT substr(data, 1, 10) AS dia, SUM({fluxo}) AS fluxo, COUNT(*) AS quantidade
+                      FROM financeiro GROUP BY dia)""",
+            "SELECT dia, quantidade, saldo FROM saldo_diario WHERE quantidade > 0", 1),
+        "resumo_financeiro": (
+            "SELECT categoria, tipo, COUNT(*), SUM(valor) FROM financeiro GROUP BY categoria, tipo",
+            "SELECT categoria, tipo, quantidade, total FROM resumo_financeiro WHERE quantidade > 0", 2),
+        "agendamentos_dia": (
+            "SELECT substr(data_hora, 1, 10), COUNT(*) FROM agendamentos GROUP BY 1",
+            "SELECT dia, quantidade FROM agendamentos_dia WHERE quantidade > 0", 1),
+        "agendamentos_servico": (
+            "SELECT servico_id, COUNT(*) FROM agendamentos WHERE servico_id IS NOT NULL GROUP BY servico_id",
+            "SELECT servico_id, quantidade FROM agendamentos_servico WHERE quantidade > 0", 1),
+    }
+    for tabela, (calculo, consulta, chave) in comparacoes.items():
+        calculado, gravado = ({l[:chave]: l[chave:] for l in conn.execute(sql)} for sql in (calculo, consulta))
+        diferentes = _divergencias(calculado, gravado)
+        if diferentes:
+            problemas[tabela] = f"{diferentes} linha(s) divergente(s)"
+    return problemas
+
+
+# ----------------------------------------------------------- execução
+
+def _contexto(caminho, semente):
+    # Termos de busca tirados do próprio banco gerado
+    conn = sqlite3.connect(caminho)
+    try:
+        return {
+            "semente": semente,
+            "clientes": [l[0] for l in conn.execute("SELECT nome FROM clientes ORDER BY random() LIMIT 200")],
+            "servicos": [l[0] for l in conn.execute("SELECT nome FROM servicos ORDER BY id LIMIT 20")],
+        }
+    finally:
+        conn.close()
+
+
+def executar(pasta, sessoes, duracao, maximo, escala, semente):
+    caminho = os.path.join(pasta, "data", "banco.db")
+    gerador.gerar_banco(caminho, escala, semente)
+    ctx = _contexto(caminho, semente)
+    conn = sqlite3.connect(caminho)
+    marcos = _marcos(conn)
+    conn.close()
+
+    contexto_processos = multiprocessing.get_context("spawn")
+    with contexto_processos.Manager() as gerente, \
+            ProcessPoolExecutor(sessoes, mp_context=contexto_processos) as executor:
+        # Todas as sessões começam juntas, depois de abrir o app
+        largada = gerente.Barrier(sessoes + 1)
+        futuros = [executor.submit(_sessao, n, ctx, pasta, largada, duracao, maximo) for n in range(sessoes)]
+        largada.wait()
+        inicio = time.monotonic()
+        registros = [registro for futuro in futuros for registro in futuro.result()]
+        segundos = time.monotonic() - inicio
+
+    agendados = sum(1 for r in registros if r[1] == "agendar" and r[2] == "ok")
+    lancados = sum(1 for r in registros if r[1] == "lancar" and r[2] == "ok")
+    conn = sqlite3.connect(caminho)
+    try:
+        problemas = verificar(conn, marcos, agendados, lancados)
+    finally:
+        conn.close()
+    return {
+        "segundos": round(segundos, 1),
+        **_estatisticas(registros, segundos),
+        "gravacoes": {"agendamentos": agendados, "lancamentos": lancados},
+        "inconsistencias": problemas,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark.carga",
+                                     description="Teste de carga com várias sessões simultâneas do SIPS")
+    parser.add_argument("--sessoes", type=int, default=8)
+    parser.add_argument("--duracao", type=float, default=30, help="segundos de carga (0: só --acoes)")
+    parser.add_argument("--acoes", type=int, help="máximo de ações por sessão")
+    parser.add_argument("--escala", type=float, default=0.001, help="fração dos volumes do benchmark")
+    parser.add_argument("--semente", type=int, default=gerador.SEMENTE)
+    parser.add_argument("--pasta", help="pasta do banco de teste (padrão: temporária, apagada no final)")
+    parser.add_argument("--saida", help="arquivo JSON de resultado (padrão: saída padrão)")
+    args = parser.parse_args(argv)
+    if not args.duracao and not args.acoes:
+        parser.error("informe --duracao ou --acoes")
+
+    # Nada de mensagens de verdade nem de outro banco durante o teste
+    for variavel in ("SIPS_ENVIADOR", "SIPS_PRESTADOR"):
+        os.environ.pop(variavel, None)
+    sys.path.insert(0, RAIZ)
+
+    pasta = args.pasta or tempfile.mkdtemp(prefix="sips-carga-")
+    try:
+        resultado = {
+            "executado_em": datetime.now().isoformat(timespec="seconds"),
+            "sqlite": sqlite3.sqlite_version,
+            "sessoes": args.sessoes,
+            "escala": args.escala,
+            "semente": args.semente,
+            **executar(pasta, args.sessoes, args.duracao, args.acoes, args.escala, args.semente),
+        }
+    finally:
+        if not args.pasta:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    for acao, medidas in resultado["acoes"].items():
+        print(f"{acao:10} {medidas['quantidade']:5} ações  p50 {medidas['p50_ms']:8.1f} ms  "
+              f"p95 {medidas['p95_ms']:8.1f} ms  p99 {medidas['p99_ms']:8.1f} ms  "
+              f"bloqueios {medidas['bloqueio']}  erros {medidas['erro']}", file=sys.stderr)
+    print(f"{resultado['acoes_por_segundo']} ações/s; inconsistências: {resultado['inconsistencias'] or 'nenhuma'}",
+          file=sys.stderr)
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto + "\n")
+    else:
+        print(texto)
+    falhou = resultado["bloqueios"] or resultado["inconsistencias"] or any(
+        medidas["erro"] for medidas in resultado["acoes"].values())
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
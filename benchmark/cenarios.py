@@ -0,0 +1,225 @@
+# Cenários cronometrados do benchmark.
+#
+# Cada cenário repete o caminho de dados de uma tela do sips.py: as mesmas
+# funções de dados.py e as mesmas transformações em pandas, sem a parte de
+# desenho do Streamlit. O tempo "frio" é medido com o cache de leituras
+# limpo, como na primeira visita após uma escrita; o "quente" repete a mesma
+# chamada com o cache já preenchido, como numa navegação comum.
+
+import statistics
+import time
+from datetime import datetime, time as hora, timedelta
+
+import pandas as pd
+import streamlit as st
+
+import agenda
+import analitico
+import dados
+import exportacao
+import operacoes
+
+
+def contexto(conn):
+    # Parâmetros dos cenários tirados do próprio banco, para que funcionem
+    # com qualquer escala
+    inicio, fim = dados.periodo_financeiro(conn)
+    nome, telefone = conn.execute(
+        "SELECT nome, telefone FROM clientes ORDER BY id LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM clientes)"
+    ).fetchone()
+    servico = conn.execute("SELECT nome FROM servicos ORDER BY id LIMIT 1").fetchone()[0]
+    return {
+        "inicio": inicio,
+        "fim": fim,
+        "nome": nome,
+        "telefone": telefone,
+        "servico": servico,
+        "categoria": conn.execute(
+            "SELECT categoria FROM resumo_financeiro ORDER BY quantidade DESC LIMIT 1"
+        ).fetchone()[0],
+    }
+
+
+def localizar(conn, ctx):
+    # 👤 Cliente > Localizar: por nome, pelo início do nome e por telefone,
+    # completo e pelo DDD e começo do número. Todos os termos vêm do mesmo
+    # cliente, então uma busca vazia é um erro, e não uma busca rápida.
+    prenome, sobrenome = ctx["nome"].split()[:2]
+    for termo in [ctx["nome"], prenome[:3], f"{prenome} {sobrenome[:2]}", ctx["telefone"], ctx["telefone"][:9]]:
+        resultados = dados.buscar_clientes(conn, termo)
+        if not resultados:
+            raise RuntimeError(f"A busca por {termo!r} não encontrou o cliente.")
+        pd.DataFrame(resultados, columns=["ID", "Nome", "Telefone", "CPF", "Email"])
+
+
+class _Desfazer(Exception):
+    pass
+
+
+def agendar(conn, ctx):
+    # 📇 Agendar: seletores com busca, checagem de disponibilidade com
+    # sugestões e gravação do agendamento e do lançamento, desfeita no final
+    # para não alterar o banco
+    dados.tem_registros(conn, "clientes")
+    dados.tem_registros(conn, "servicos")
+    cliente_id = dados.buscar_clientes(conn, ctx["nome"].split()[0], limite=20)[0][0]
+    dados.buscar_servicos(conn, "", limite=20)
+    servico_id = dados.buscar_servicos(conn, ctx["servico"][:4], limite=20)[0][0]
+    duracao = dados.obter_servico(conn, servico_id)[2]
+    inicio = datetime.combine(ctx["fim"], hora(10, 0))
+    if agenda.conflitos(conn, inicio, inicio + timedelta(minutes=duracao)):
+        inicio = agenda.proximos_horarios(conn, inicio, duracao)[0]
+    try:
+        with dados.em_lote(conn):
+            operacoes.agendar_servico(conn, cliente_id, servico_id, inicio, "Pix")
+            raise _Desfazer
+    except _Desfazer:
+        pass
+
+
+def calendario(conn, ctx):
+    # 📅 Agendamentos: janela do mês com margem e montagem dos eventos, depois
+    # a lista de um dia clicado
+    inicio_mes = ctx["fim"].replace(day=1)
+    proximo_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
+    margem = timedelta(days=14)
+    df = dados.agendamentos_periodo(conn, inicio_mes - margem, proximo_mes + margem)
+    df["start"] = pd.to_datetime(df["data_hora"], format="ISO8601")
+    df["end"] = pd.to_datetime(df["fim"], format="ISO8601")
+    df["title"] = df["cliente"] + " - " + df["servico"]
+    df["start"] = df["start"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+    df["end"] = df["end"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+    df[["id", "title", "start", "end"]].to_dict("records")
+    dados.agendamentos_periodo(conn, inicio_mes, inicio_mes + timedelta(days=1))
+
+
+def _resumo_financeiro(df):
+    # Totais e resumo por categoria calculados pela tela Financeiro
+    entradas = df[df["tipo"] == "Entrada"]["valor"]
+    saidas = df[df["tipo"] == "Saída"]["valor"]
+    entradas.sum(), saidas.sum(), entradas.max(), saidas.max(), entradas.mean(), saidas.mean()
+    resumo = df.groupby(["categoria", "tipo"]).agg(
+        Total_Valor=("valor", "sum"),
+        Quantidade=("valor", "count"),
+        Media_Valor=("valor", "mean")
+    ).reset_index()
+    resumo.pivot(index="categoria", columns="tipo", values="Total_Valor").fillna(0)
+
+
+def financeiro_padrao(conn, ctx):
+    # 💰 Financeiro ao abrir: período inteiro, sem filtros
+    dados.periodo_financeiro(conn)
+    dados.categorias_financeiro(conn)
+    df = dados.consultar_financeiro(conn, ctx["inicio"], ctx["fim"])
+    dados.pagina_financeiro(conn, ctx["inicio"], ctx["fim"])
+    _resumo_financeiro(df)
+
+
+def financeiro_filtros(conn, ctx):
+    # 💰 Financeiro filtrado: último mês, uma categoria e busca na descrição
+    inicio = ctx["fim"] - timedelta(days=30)
+    for filtros in [
+        {},
+        {"tipo": "Entrada", "categoria": ctx["categoria"]},
+        {"busca": ctx["categoria"][:5]},
+    ]:
+        df = dados.consultar_financeiro(conn, inicio, ctx["fim"], **filtros)
+        dados.pagina_financeiro(conn, inicio, ctx["fim"], **filtros)
+        _resumo_financeiro(df)
+
+
+def financeiro_paginacao(conn, ctx):
+    # 💰 Financeiro: cinco páginas seguidas do período inteiro
+    apos = None
+    for _ in range(5):
+        _, apos, tem_proxima = dados.pagina_financeiro(conn, ctx["inicio"], ctx["fim"], apos=apos)
+        if not tem_proxima:
+            break
+
+
+def financeiro_saldo(conn, ctx):
+    # 💰 Financeiro > Evolução do Saldo: período inteiro e último trimestre
+    dados.saldo_diario(conn, ctx["inicio"], ctx["fim"])
+    dados.saldo_diario(conn, ctx["fim"] - timedelta(days=90), ctx["fim"])
+
+
+def financeiro_exportacao(conn, ctx):
+    # 💰 Financeiro > Exportar: último mês em CSV
+    exportacao.exportar("csv", (ctx["fim"] - timedelta(days=30), ctx["fim"], None, None, None),
+                        caminho=ctx["caminho"])
+
+
+def dashboard(conn, ctx):
+    # 📊 Dashboard: agregados financeiros e de agendamentos
+    resumo = dados.resumo_financeiro(conn)
+    resumo.groupby("tipo")["valor"].sum().reset_index()
+    resumo.pivot(index="categoria", columns="tipo", values="valor").fillna(0)
+    dados.agendamentos_por_dia(conn)
+    dados.servicos_mais_agendados(conn, limite=10)
+
+
+def copia_analitica(conn, ctx):
+    # Cópia analítica lida pelo Dashboard e pelos resumos do Financeiro,
+    # refeita pela API de backup
+    analitico.atualizar(ctx["caminho"])
+
+
+CENARIOS = {
+    "localizar": localizar,
+    "agendar": agendar,
+    "calendario": calendario,
+    "financeiro_padrao": financeiro_padrao,
+    "financeiro_filtros": financeiro_filtros,
+    "financeiro_paginacao": financeiro_paginacao,
+    "financeiro_saldo": financeiro_saldo,
+    "financeiro_exportacao": financeiro_exportacao,
+    "dashboard": dashboard,
+    "copia_analitica": copia_analitica,
+}
+
+
+def _estatisticas(tempos):
+    ordenados = sorted(tempos)
+    return {
+        "mediana_ms": round(statistics.median(ordenados) * 1000, 3),
+        "p95_ms": round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))] * 1000, 3),
+        "min_ms": round(ordenados[0] * 1000, 3),
+        "max_ms": round(ordenados[-1] * 1000, 3),
+    }
+
+
+def _cronometrar(cenario, conn, ctx):
+    inicio = time.perf_counter()
+    cenario(conn, ctx)
+    return time.perf_counter() - inicio
+
+
+def executar(conn, ctx, nomes=None, repeticoes=5):
+    # Roda cada cenário `repeticoes` vezes e devolve as estatísticas por cenário
+    resultados = {}
+    for nome, cenario in CENARIOS.items():
+        if nomes and nome not in nomes:
+            continue
+        frio, quente = [], []
+        for _ in range(repeticoes):
+            st.cache_data.clear()
+            frio.append(_cronometrar(cenario, conn, ctx))
+            quente.append(_cronometrar(cenario, conn, ctx))
+        resultados[nome] = {"repeticoes": repeticoes, "frio": _estatisticas(frio), "quente": _estatisticas(quente)}
+    return resultados
+
+
+def comparar(atual, referencia, tolerancia=0.2, minimo_ms=5.0):
+    # Lista os cenários cuja mediana fria piorou mais que a tolerância.
+    # Diferenças abaixo de minimo_ms são ruído de medição e não contam.
+    regressoes = []
+    for nome, resultado in atual["cenarios"].items():
+        anterior = referencia.get("cenarios", {}).get(nome)
+        if not anterior:
+            continue
+        antes = anterior["frio"]["mediana_ms"]
+        agora = resultado["frio"]["mediana_ms"]
+        if antes and agora > antes * (1 + tolerancia) and agora - antes >= minimo_ms:
+            regressoes.append({"cenario": nome, "antes_ms": antes, "agora_ms": agora,
+                               "variacao": round(agora / antes - 1, 3)})
+    return regressoes
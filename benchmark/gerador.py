@@ -0,0 +1,187 @@
+# Gerador de dados sintéticos para o benchmark.
+#
+# Cria um banco novo com as migrações do app e o preenche com volumes
+# realistas a partir de uma semente fixa: a mesma semente e a mesma escala
+# geram sempre o mesmo banco, o que permite comparar versões do app.
+#
+# As linhas são inseridas em lotes com os triggers desligados (sem_triggers);
+# as colunas e tabelas derivadas (fim dos agendamentos, índice de texto,
+# saldo diário, resumos) são reconstruídas de uma vez no final.
+
+import os
+from datetime import date
+
+import numpy as np
+
+from conexao import abrir_conexao
+from migracoes import (aplicar_migracoes, indexar_clientes_em_lote, preencher_fim_agendamentos,
+                       reconstruir_resumos, reconstruir_saldo_diario, sem_triggers)
+
+VOLUMES = {
+    "clientes": 100_000,
+    "servicos": 1_000,
+    "agendamentos": 1_000_000,
+    "financeiro": 2_000_000,
+}
+
+TAMANHO_LOTE = 200_000
+SEMENTE = 42
+
+# Período coberto pelos dados; fixo para que o banco não dependa da data atual
+INICIO = date(2023, 1, 1)
+FIM = date(2025, 12, 31)
+
+PRENOMES = [
+    "Ana", "João", "Maria", "José", "Antônio", "Francisca", "Carlos", "Paula", "Luís", "Márcia",
+    "Pedro", "Juliana", "Lucas", "Fernanda", "Marcos", "Patrícia", "Rafael", "Aline", "Gabriel",
+    "Camila", "Thiago", "Letícia", "Bruno", "Beatriz", "Felipe", "Larissa", "Rodrigo", "Vitória",
+    "Mateus", "Sônia", "André", "Cláudia", "Gustavo", "Renata", "Diego", "Débora",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+    "Gomes", "Ribeiro", "Carvalho", "Araújo", "Martins", "Rocha", "Barbosa", "Conceição", "Melo",
+    "Cardoso", "Teixeira", "Correia", "Fernandes", "Nascimento", "Mendes", "Moreira", "Brandão",
+]
+RUAS = ["Rua das Flores", "Av. Brasil", "Rua São João", "Av. Paulista", "Rua XV de Novembro",
+        "Rua da Paz", "Av. Getúlio Vargas", "Rua Sete de Setembro"]
+SERVICOS = ["Corte", "Escova", "Coloração", "Manicure", "Pedicure", "Hidratação", "Barba",
+            "Depilação", "Massagem", "Limpeza de pele", "Sobrancelha", "Progressiva"]
+VARIACOES = ["Simples", "Completa", "Premium", "Express", "Infantil", "Masculina", "Feminina"]
+DESPESAS = ["Aluguel", "Produtos", "Energia", "Água", "Internet", "Salários", "Manutenção", "Impostos"]
+PAGAMENTOS = ["Pix", "Dinheiro", "Cartão", "Não informado"]
+
+
+def _texto(*partes):
+    # Concatena, elemento a elemento, arrays e textos fixos
+    resultado = ""
+    for parte in partes:
+        resultado = resultado + (parte if isinstance(parte, str) else np.asarray(parte).astype(str).astype(object))
+    return resultado.tolist()
+
+
+def _datas(rng, n, com_hora=False):
+    dias = (FIM - INICIO).days + 1
+    base = np.datetime64(INICIO.isoformat()) + rng.integers(0, dias, n).astype("timedelta64[D]")
+    if not com_hora:
+        return base.astype(str).tolist()
+    # Horários comerciais em intervalos de 30 minutos, das 8h às 18h
+    minutos = (8 * 60 + 30 * rng.integers(0, 20, n)).astype("timedelta64[m]")
+    return (base.astype("datetime64[m]") + minutos).astype("datetime64[s]").astype(str).tolist()
+
+
+def _cpfs(rng, n):
+    # CPFs com dígitos verificadores válidos, formatados como 000.000.000-00
+    digitos = rng.integers(0, 10, (n, 9))
+    dv1 = (digitos @ np.arange(10, 1, -1) * 10 % 11) % 10
+    digitos = np.column_stack([digitos, dv1])
+    dv2 = (digitos @ np.arange(11, 1, -1) * 10 % 11) % 10
+    texto = ["".join(map(str, linha)) for linha in np.column_stack([digitos, dv2])]
+    return [f"{c[:3]}.{c[3:6]}.{c[6:9]}-{c[9:]}" for c in texto]
+
+
+def _clientes(rng, n):
+    prenome = rng.choice(PRENOMES, n)
+    sobrenome = rng.choice(SOBRENOMES, n)
+    nome = _texto(prenome, " ", sobrenome, " ", rng.choice(SOBRENOMES, n))
+    ddd = rng.integers(11, 99, n)
+    numero = rng.integers(0, 100_000_000, n)
+    telefone = [f"({d}) 9{x // 10_000:04d}-{x % 10_000:04d}" for d, x in zip(ddd, numero)]
+    email = _texto(np.char.lower(prenome), ".", np.char.lower(sobrenome),
+                   rng.integers(1, 999, n), "@exemplo.com")
+    endereco = _texto(rng.choice(RUAS, n), ", ", rng.integers(1, 3000, n))
+    dias_nascimento = rng.integers(0, 55 * 365, n).astype("timedelta64[D]")
+    nascimento = (np.datetime64("1950-01-01") + dias_nascimento).astype(str).tolist()
+    observacoes = np.where(rng.random(n) < 0.2, "Cliente frequente", None).tolist()
+    return zip(nome, telefone, _cpfs(rng, n), endereco, email, nascimento, observacoes)
+
+
+def _servicos(rng, n):
+    nome = _texto(rng.choice(SERVICOS, n), " ", rng.choice(VARIACOES, n), " ", np.arange(1, n + 1))
+    duracao = (rng.choice([15, 30, 45, 60, 90, 120], n)).tolist()
+    preco = np.round(rng.uniform(20, 400, n), 2).tolist()
+    return zip(nome, duracao, preco)
+
+
+def _agendamentos(rng, n, total_clientes, total_servicos):
+    cliente = rng.integers(1, total_clientes + 1, n).tolist()
+    # Poucos serviços concentram a maior parte dos agendamentos
+    servico = np.minimum(rng.zipf(1.3, n), total_servicos).tolist()
+    data_hora = _datas(rng, n, com_hora=True)
+    status = np.where(rng.random(n) < 0.7, "Concluído", "Agendado").tolist()
+    observacoes = np.where(rng.random(n) < 0.1, "Primeira vez", None).tolist()
+    return zip(cliente, servico, data_hora, observacoes, status)
+
+
+def _financeiro(rng, n, nomes_servicos):
+    entrada = rng.random(n) < 0.7
+    tipo = np.where(entrada, "Entrada", "Saída")
+    categoria = np.where(entrada, rng.choice(nomes_servicos, n), rng.choice(DESPESAS, n))
+    descricao = _texto(np.where(entrada, "Atendimento: ", "Pagamento: "), categoria)
+    valor = np.round(np.where(entrada, rng.uniform(20, 400, n), rng.uniform(50, 3000, n)), 2).tolist()
+    pagamento = rng.choice(PAGAMENTOS, n).tolist()
+    observacao = np.where(rng.random(n) < 0.05, "Lançamento gerado", None).tolist()
+    return zip(_datas(rng, n), descricao, tipo.tolist(), valor, categoria.tolist(), pagamento, observacao)
+
+
+INSERCOES = {
+    "clientes": "INSERT INTO clientes (nome, telefone, cpf, endereco, email, nascimento, observacoes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+    "servicos": "INSERT INTO servicos (nome, duracao, preco) VALUES (?, ?, ?)",
+    "agendamentos": "INSERT INTO agendamentos (cliente_id, servico_id, data_hora, observacoes, status) "
+                    "VALUES (?, ?, ?, ?, ?)",
+    "financeiro": "INSERT INTO financeiro (data, descricao, tipo, valor, categoria, pagamento, observacao) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?)",
+}
+
+
+def volumes(escala=1.0):
+    return {tabela: max(1, int(total * escala)) for tabela, total in VOLUMES.items()}
+
+
+def gerar_banco(caminho, escala=1.0, semente=SEMENTE, ao_progredir=None):
+    # Cria (ou recria) o banco em caminho e devolve o volume de cada tabela.
+    # ao_progredir(tabela, linhas_inseridas) é chamado após cada lote.
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+
+    rng = np.random.default_rng(semente)
+    total = volumes(escala)
+    conn = abrir_conexao(caminho)
+    aplicar_migracoes(conn)
+    cursor = conn.cursor()
+
+    nomes_servicos = None
+    for tabela in ["servicos", "clientes", "agendamentos", "financeiro"]:
+        inseridas = 0
+        cursor.execute("BEGIN IMMEDIATE")
+        with sem_triggers(cursor, tabela):
+            while inseridas < total[tabela]:
+                n = min(TAMANHO_LOTE, total[tabela] - inseridas)
+                if tabela == "servicos":
+                    linhas = list(_servicos(rng, n))
+                    nomes_servicos = [linha[0] for linha in linhas]
+                elif tabela == "clientes":
+                    linhas = _clientes(rng, n)
+                elif tabela == "agendamentos":
+                    linhas = _agendamentos(rng, n, total["clientes"], total["servicos"])
+                else:
+                    linhas = _financeiro(rng, n, nomes_servicos)
+                cursor.executemany(INSERCOES[tabela], linhas)
+                inseridas += n
+                if ao_progredir:
+                    ao_progredir(tabela, inseridas)
+        conn.commit()
+
+    cursor.execute("BEGIN IMMEDIATE")
+    indexar_clientes_em_lote(cursor, 0)
+    preencher_fim_agendamentos(cursor)
+    reconstruir_saldo_diario(cursor)
+    reconstruir_resumos(cursor)
+    conn.commit()
+    cursor.execute("ANALYZE")
+    conn.close()
+    return total
@@ -0,0 +1,71 @@
+# Componentes de tela reutilizados por mais de uma página.
+
+import re
+
+import streamlit as st
+
+import analitico
+import dados
+from conexao import caminho_banco
+
+LIMITE_SELETOR = 20
+
+
+def format_brl(valor):
+    # Formata número em moeda brasileira com vírgula decimal
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def seletor_cliente(conn, rotulo, chave):
+    # Busca enquanto se digita: consulta o índice de texto dos clientes com
+    # LIMIT e devolve o id escolhido (ou None). Telefone e final do CPF
+    # diferenciam clientes com o mesmo nome.
+    termo = st.text_input(f"🔎 {rotulo}", key=f"{chave}_busca",
+                          placeholder="Digite nome, telefone ou CPF")
+    if not termo:
+        return None
+
+    resultados = dados.buscar_clientes(conn, termo, limite=LIMITE_SELETOR)
+    if not resultados:
+        st.info("Nenhum cliente encontrado.")
+        return None
+
+    clientes = {c[0]: c for c in resultados}
+
+    def descrever(id_cliente):
+        _, nome, telefone, cpf, _ = clientes[id_cliente]
+        final_cpf = re.sub(r"\D", "", cpf)[-4:]
+        return f"{nome} — 📞 {telefone} — CPF final {final_cpf}"
+
+    return st.selectbox(f"Selecione o {rotulo.lower()}", list(clientes), format_func=descrever,
+                        key=f"{chave}_id")
+
+
+def seletor_servico(conn, rotulo, chave):
+    # Mesmo comportamento para serviços, buscando pelo início do nome
+    termo = st.text_input(f"🔎 {rotulo}", key=f"{chave}_busca",
+                          placeholder="Digite o início do nome do serviço")
+    resultados = dados.buscar_servicos(conn, termo, limite=LIMITE_SELETOR)
+    if not resultados:
+        st.info("Nenhum serviço encontrado.")
+        return None
+
+    servicos = {s[0]: s for s in resultados}
+
+    def descrever(id_servico):
+        _, nome, duracao, preco = servicos[id_servico]
+        return f"{nome} — {duracao} min — R$ {preco:,.2f}"
+
+    return st.selectbox(f"Selecione o {rotulo.lower()}", list(servicos), format_func=descrever,
+                        key=f"{chave}_id")
+
+
+def aviso_copia(conn, criada_em, chave):
+    # Momento da cópia analítica em uso e botão para refazê-la na hora
+    col_info, col_botao = st.columns([4, 1])
+    col_info.caption(f"📸 Números da cópia analítica de {criada_em:%d/%m/%Y %H:%M:%S}; "
+                     f"ela é refeita a cada {analitico.IDADE_MAXIMA.seconds // 60} min "
+                     f"ou {analitico.ESCRITAS_MAXIMAS} alterações.")
+    if col_botao.button("🔄 Atualizar", key=chave):
+        analitico.atualizar(caminho_banco(conn))
+        st.rerun()
@@ -0,0 +1,33 @@
+# Abertura de conexões com o SQLite.
+#
+# Cada sessão do Streamlit recebe a sua própria conexão (ver sips.py), em vez
+# de todas compartilharem um único conn/cursor global. As conexões usam WAL:
+# leitores não bloqueiam escritores e vice-versa, e uma escrita concorrente
+# espera até TEMPO_ESPERA_MS antes de falhar com "database is locked".
+
+import os
+import sqlite3
+
+CAMINHO_BANCO = os.path.join("data", "banco.db")
+
+TEMPO_ESPERA_MS = 5000
+CACHE_PAGINAS_KB = 16 * 1024        # cache de páginas por conexão
+MMAP_BYTES = 128 * 1024 * 1024      # leitura via mmap do arquivo do banco
+
+
+def abrir_conexao(caminho=CAMINHO_BANCO, classe=sqlite3.Connection):
+    # classe permite trocar a conexão por uma subclasse (ver profiler.py)
+    conn = sqlite3.connect(caminho, timeout=TEMPO_ESPERA_MS / 1000, check_same_thread=False,
+                           factory=classe)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={TEMPO_ESPERA_MS}")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_PAGINAS_KB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def caminho_banco(conn):
+    # Arquivo do banco principal da conexão
+    return conn.execute("SELECT file FROM pragma_database_list WHERE name = 'main'").fetchone()[0]
@@ -0,0 +1,507 @@
+# Camada de acesso aos dados.
+#
+# Os filtros das telas são passados como parâmetros e aplicados no próprio
+# SQLite, para que apenas as linhas necessárias sejam carregadas no pandas.
+#
+# As leituras ficam em cache (st.cache_data) e a chave inclui a versão das
+# tabelas envolvidas, guardada em versoes_dados. Todo caminho de escrita chama
+# registrar_alteracao() na mesma transação, o que invalida o cache: enquanto
+# nada muda, navegar entre as telas não consulta o banco de novo.
+#
+# Os meses arquivados de financeiro e agendamentos (ver arquivo.py) são lidos
+# dos arquivos Parquet e juntados às linhas que ainda estão no SQLite.
+
+import re
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+import arquivo
+import recorrencia
+
+COLUNAS_FINANCEIRO = "id, data, descricao, tipo, valor, categoria, pagamento, observacao"
+TAMANHO_PAGINA = 50
+LIMITE_BUSCA = 50
+# O gráfico de agendamentos por dia do dashboard mostra JANELA_DASHBOARD
+# antes e depois de hoje; as séries recorrentes só são expandidas nela
+JANELA_DASHBOARD = timedelta(days=90)
+
+
+def versao(conn, *tabelas):
+    # Tupla com o arquivo do banco e a versão atual de cada tabela, na ordem
+    # pedida. O arquivo faz parte da chave do cache para que prestadores
+    # diferentes (ver prestadores.py) nunca recebam as leituras um do outro.
+    linhas = dict(conn.execute(f'''
+        SELECT tabela, versao FROM versoes_dados WHERE tabela IN ({','.join('?' * len(tabelas))})
+        UNION ALL
+        SELECT '', file FROM pragma_database_list WHERE name = 'main'
+    ''', tabelas).fetchall())
+    return (linhas[""],) + tuple(linhas.get(t, 0) for t in tabelas)
+
+
+def _escapar_like(termo):
+    return termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def registrar_alteracao(conn, *tabelas):
+    # Deve ser chamado antes do commit de qualquer INSERT, UPDATE ou DELETE
+    conn.executemany(
+        "UPDATE versoes_dados SET versao = versao + 1 WHERE tabela = ?",
+        [(t,) for t in tabelas]
+    )
+
+
+@contextmanager
+def transacao(conn, *tabelas):
+    # Unidade de trabalho: tudo o que o bloco grava vai num commit só, junto
+    # com a nova versão das tabelas informadas; qualquer erro desfaz tudo.
+    # Dentro de outra transação (uma operação que chama outra, ou em_lote)
+    # o bloco vira um SAVEPOINT e o commit fica para a transação de fora.
+    cursor = conn.cursor()
+    if conn.in_transaction:
+        cursor.execute("SAVEPOINT unidade")
+        try:
+            yield cursor
+            registrar_alteracao(conn, *tabelas)
+        except BaseException:
+            cursor.execute("ROLLBACK TO unidade")
+            cursor.execute("RELEASE unidade")
+            raise
+        cursor.execute("RELEASE unidade")
+        return
+
+    # BEGIN IMMEDIATE pega o bloqueio de escrita já no início, antes das
+    # leituras que decidem o que gravar
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        yield cursor
+        registrar_alteracao(conn, *tabelas)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+@contextmanager
+def em_lote(conn):
+    # Modo em lote: as operações feitas dentro do bloco (cada uma com a sua
+    # transacao) são gravadas num único commit no final. Uma operação que
+    # falha desfaz só o próprio SAVEPOINT; se o erro for tratado dentro do
+    # bloco, as demais seguem no lote.
+    with transacao(conn) as cursor:
+        yield cursor
+
+
+# ---------------------------------------------------------------- clientes
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _tem_registros(_conn, versao, tabela):
+    return _conn.execute(f"SELECT EXISTS (SELECT 1 FROM {tabela})").fetchone()[0] == 1
+
+
+def tem_registros(conn, tabela):
+    return _tem_registros(conn, versao(conn, tabela), tabela)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _obter_cliente(_conn, versao, id_cliente):
+    return _conn.execute("SELECT * FROM clientes WHERE id=?", (id_cliente,)).fetchone()
+
+
+def obter_cliente(conn, id_cliente):
+    return _obter_cliente(conn, versao(conn, "clientes"), id_cliente)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _pagina_clientes(_conn, versao, apos, tamanho):
+    linhas = _conn.execute(
+        "SELECT id, nome, telefone, cpf, endereco, email, nascimento, observacoes FROM clientes "
+        "WHERE id > ? ORDER BY id LIMIT ?", (apos or 0, tamanho + 1)
+    ).fetchall()
+    return linhas[:tamanho], len(linhas) > tamanho
+
+
+def pagina_clientes(conn, apos=None, tamanho=TAMANHO_PAGINA):
+    # Clientes em ordem de id, a partir do id seguinte a apos
+    return _pagina_clientes(conn, versao(conn, "clientes"), apos, tamanho)
+
+
+def consulta_fts(termo):
+    # Converte o texto digitado numa consulta FTS5: cada palavra vira um
+    # prefixo entre aspas (todas precisam aparecer). Números com pontuação,
+    # como telefone e CPF, viram uma única sequência de dígitos.
+    if re.fullmatch(r"[\d\s().\-+/]+", termo):
+        digitos = re.sub(r"\D", "", termo)
+        return f'"{digitos}"*' if digitos else ""
+    partes = []
+    for palavra in termo.split():
+        if re.fullmatch(r"[\d().\-+/]+", palavra):
+            tokens = [re.sub(r"\D", "", palavra)]
+        else:
+            tokens = re.findall(r"\w+", palavra)
+        partes += [f'"{t}"*' for t in tokens if t]
+    return " ".join(partes)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _buscar_clientes(_conn, versao, termo, limite):
+    consulta = consulta_fts(termo)
+    if not consulta:
+        return []
+    return _conn.execute('''
+        SELECT c.id, c.nome, c.telefone, c.cpf, c.email
+        FROM clientes_fts f
+        JOIN clientes c ON c.id = f.rowid
+        WHERE clientes_fts MATCH ?
+        ORDER BY bm25(clientes_fts, 10.0, 5.0, 5.0, 2.0, 1.0)
+        LIMIT ?
+    ''', (consulta, limite)).fetchall()
+
+
+def buscar_clientes(conn, termo, limite=LIMITE_BUSCA):
+    # Busca por nome, telefone, CPF, email ou observações, ordenada por
+    # relevância (bm25, com peso maior para o nome)
+    return _buscar_clientes(conn, versao(conn, "clientes"), termo, limite)
+
+
+# ---------------------------------------------------------------- serviços
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _listar_servicos(_conn, versao):
+    return _conn.execute("SELECT id, nome, preco FROM servicos").fetchall()
+
+
+def listar_servicos(conn):
+    return _listar_servicos(conn, versao(conn, "servicos"))
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _obter_servico(_conn, versao, id_servico):
+    return _conn.execute("SELECT id, nome, duracao, preco FROM servicos WHERE id=?", (id_servico,)).fetchone()
+
+
+def obter_servico(conn, id_servico):
+    return _obter_servico(conn, versao(conn, "servicos"), id_servico)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _buscar_servicos(_conn, versao, termo, limite):
+    return _conn.execute(
+        "SELECT id, nome, duracao, preco FROM servicos WHERE nome LIKE ? ESCAPE '\\' "
+        "ORDER BY nome COLLATE NOCASE LIMIT ?",
+        (_escapar_like(termo) + "%", limite)
+    ).fetchall()
+
+
+def buscar_servicos(conn, termo="", limite=LIMITE_BUSCA):
+    # Serviços cujo nome começa com o termo (pelo índice em servicos(nome))
+    return _buscar_servicos(conn, versao(conn, "servicos"), termo, limite)
+
+
+# ------------------------------------------------------------ agendamentos
+
+def _juntar(quentes, frios, ordem, decrescente=False):
+    # Junta linhas quentes e frias num DataFrame só, na ordem das colunas
+    # `ordem`. Um lado vazio não entra no concat, que trocaria os tipos das
+    # colunas por object.
+    if frios.empty:
+        return quentes
+    juntos = frios if quentes.empty else pd.concat([quentes, frios], ignore_index=True)
+    return juntos.sort_values(ordem, ascending=not decrescente, kind="stable", ignore_index=True)
+
+
+def _nomes(conn, tabela, ids):
+    # {id: nome} dos ids informados, em grupos abaixo do limite de parâmetros
+    ids = list(ids)
+    nomes = {}
+    for i in range(0, len(ids), 500):
+        grupo = ids[i:i + 500]
+        nomes.update(conn.execute(
+            f"SELECT id, nome FROM {tabela} WHERE id IN ({','.join('?' * len(grupo))})", grupo
+        ).fetchall())
+    return nomes
+
+
+def _agendamentos_arquivados(conn, inicio, fim, ids_quentes):
+    fria = arquivo.ler_periodo(conn, "agendamentos", inicio, fim,
+                               ["id", "data_hora", "fim", "cliente_id", "servico_id"],
+                               arquivo.filtro_periodo("data_hora", inicio, fim))
+    df = arquivo.sem_repetidos(fria, ids_quentes).to_pandas()
+    # Mesmo efeito dos JOINs da consulta quente: sem cliente ou serviço, a linha sai
+    df["cliente"] = df["cliente_id"].map(_nomes(conn, "clientes", df["cliente_id"].unique().tolist()))
+    df["servico"] = df["servico_id"].map(_nomes(conn, "servicos", df["servico_id"].unique().tolist()))
+    return df.dropna(subset=["cliente", "servico"])[["id", "data_hora", "fim", "cliente", "servico"]]
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _agendamentos_periodo(_conn, versao, inicio, fim):
+    df = pd.read_sql_query('''
+        SELECT a.id, a.data_hora, a.fim, c.nome AS cliente, s.nome AS servico
+        FROM agendamentos a
+        JOIN clientes c ON a.cliente_id = c.id
+        JOIN servicos s ON a.servico_id = s.id
+        WHERE a.data_hora >= ? AND a.data_hora < ?
+        ORDER BY a.data_hora
+    ''', _conn, params=(inicio.isoformat(), fim.isoformat()))
+    if arquivo.particoes(_conn, "agendamentos", inicio, fim):
+        df = _juntar(df, _agendamentos_arquivados(_conn, inicio, fim, df["id"].tolist()), ["data_hora", "id"])
+    df["serie_id"] = pd.Series(pd.NA, index=df.index, dtype="Int64")
+    ocorrencias = _ocorrencias_periodo(_conn, inicio, fim)
+    if not ocorrencias.empty:
+        df = _juntar(df.astype({"id": "Int64"}), ocorrencias, ["data_hora", "id"])
+    return df
+
+
+def _ocorrencias_periodo(conn, inicio, fim):
+    # Ocorrências de séries no período (ver recorrencia.py), ainda sem
+    # agendamento gravado: id vazio e o id da série em serie_id
+    df = pd.DataFrame(recorrencia.expandir(conn, inicio, fim),
+                      columns=["serie_id", "cliente_id", "servico_id", "data_hora", "fim"])
+    if df.empty:
+        return df
+    df["cliente"] = df["cliente_id"].map(_nomes(conn, "clientes", df["cliente_id"].unique().tolist()))
+    df["servico"] = df["servico_id"].map(_nomes(conn, "servicos", df["servico_id"].unique().tolist()))
+    df["data_hora"] = df["data_hora"].map(datetime.isoformat)
+    df["fim"] = df["fim"].map(datetime.isoformat)
+    df["id"] = pd.Series(pd.NA, index=df.index, dtype="Int64")
+    df["serie_id"] = df["serie_id"].astype("Int64")
+    return df.dropna(subset=["cliente", "servico"])[["id", "data_hora", "fim", "cliente", "servico", "serie_id"]]
+
+
+def agendamentos_periodo(conn, inicio, fim):
+    # Agendamentos com data_hora em [inicio, fim), pelo índice em data_hora,
+    # mais as ocorrências de séries do período (id vazio, serie_id preenchido)
+    return _agendamentos_periodo(conn, versao(conn, "agendamentos", "clientes", "servicos"), inicio, fim)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _obter_agendamento(_conn, versao, id_agendamento):
+    return _conn.execute(
+        "SELECT id, cliente_id, servico_id, data_hora, fim, observacoes, status FROM agendamentos WHERE id=?",
+        (id_agendamento,)
+    ).fetchone()
+
+
+def obter_agendamento(conn, id_agendamento):
+    # Só agendamentos que ainda estão no SQLite (não arquivados)
+    return _obter_agendamento(conn, versao(conn, "agendamentos"), id_agendamento)
+
+
+# -------------------------------------------------------------- financeiro
+
+def filtros_financeiro(inicio=None, fim=None, tipo=None, categoria=None, busca=None):
+    # Monta a cláusula WHERE e os parâmetros correspondentes. O fim do período
+    # é inclusivo: lançamentos com hora no último dia também entram.
+    condicoes = []
+    params = []
+    if inicio:
+        condicoes.append("data >= ?")
+        params.append(inicio.isoformat())
+    if fim:
+        condicoes.append("data < ?")
+        params.append((fim + timedelta(days=1)).isoformat())
+    if tipo:
+        condicoes.append("tipo = ?")
+        params.append(tipo)
+    if categoria:
+        condicoes.append("categoria = ?")
+        params.append(categoria)
+    if busca:
+        condicoes.append("descricao LIKE ? ESCAPE '\\'")
+        params.append(f"%{_escapar_like(busca)}%")
+
+    where = " WHERE " + " AND ".join(condicoes) if condicoes else ""
+    return where, params
+
+
+def _com_arquivados(conn, df, filtros, colunas):
+    # Acrescenta ao DataFrame quente os lançamentos arquivados dos meses do filtro
+    if not arquivo.particoes(conn, "financeiro", filtros[0], filtros[1]):
+        return df
+    fria = arquivo.ler_periodo(conn, "financeiro", filtros[0], filtros[1], list(colunas),
+                               arquivo.filtro_financeiro(*filtros))
+    frios = arquivo.sem_repetidos(fria, df["id"].tolist()).to_pandas()
+    return _juntar(df, frios, ["data", "id"] if "data" in colunas else ["id"], decrescente=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _consultar_financeiro(_conn, versao, inicio, fim, tipo, categoria, busca, colunas):
+    filtros = (inicio, fim, tipo, categoria, busca)
+    where, params = filtros_financeiro(*filtros)
+    df = pd.read_sql_query(
+        f"SELECT {', '.join(colunas)} FROM financeiro{where} ORDER BY data DESC, id DESC",
+        _conn, params=params
+    )
+    df = _com_arquivados(_conn, df, filtros, colunas)
+    if "data" in colunas:
+        df["data"] = pd.to_datetime(df["data"], format="ISO8601")
+    return df
+
+
+def consultar_financeiro(conn, inicio=None, fim=None, tipo=None, categoria=None, busca=None, colunas=None):
+    # colunas limita o que é lido (do SQLite e dos arquivos); o id vem sempre
+    colunas = tuple(dict.fromkeys(("id",) + tuple(colunas))) if colunas else tuple(arquivo.ESQUEMAS["financeiro"].names)
+    return _consultar_financeiro(conn, versao(conn, "financeiro"), inicio, fim, tipo, categoria, busca, colunas)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _pagina_financeiro(_conn, versao, filtros, apos, tamanho):
+    where, params = filtros_financeiro(*filtros)
+    if apos:
+        # Paginação por chave: continua a partir da última linha já exibida,
+        # sem OFFSET, usando o índice em financeiro(data)
+        where += (" AND " if where else " WHERE ") + "(data, id) < (?, ?)"
+        params += list(apos)
+    df = pd.read_sql_query(
+        f"SELECT {COLUNAS_FINANCEIRO} FROM financeiro{where} ORDER BY data DESC, id DESC LIMIT ?",
+        _conn, params=params + [tamanho + 1]
+    )
+    filtros_frios = filtros
+    if len(df) > tamanho:
+        # Página quente cheia: só entram linhas frias a partir do dia da
+        # última linha quente (lançamentos com data retroativa podem cair
+        # num mês arquivado e deixar meses frios entre as linhas quentes)
+        dia = date.fromisoformat(df["data"].iloc[-1][:10])
+        filtros_frios = (max(filtros[0], dia) if filtros[0] else dia,) + tuple(filtros[1:])
+    if arquivo.particoes(_conn, "financeiro", filtros_frios[0], filtros_frios[1]):
+        # Completa com as linhas frias seguintes à mesma chave e reordena
+        frios = arquivo.sem_repetidos(arquivo.pagina_financeiro(_conn, filtros_frios, apos, tamanho + 1),
+                                      df["id"].tolist()).to_pandas()
+        df = _juntar(df, frios, ["data", "id"], decrescente=True).head(tamanho + 1)
+    tem_proxima = len(df) > tamanho
+    df = df.head(tamanho).copy()
+    chave_ultima = (df["data"].iloc[-1], int(df["id"].iloc[-1])) if not df.empty else None
+    df["data"] = pd.to_datetime(df["data"], format="ISO8601")
+    return df, chave_ultima, tem_proxima
+
+
+def pagina_financeiro(conn, inicio=None, fim=None, tipo=None, categoria=None, busca=None,
+                      apos=None, tamanho=TAMANHO_PAGINA):
+    # Uma página do livro-caixa, do mais recente para o mais antigo.
+    # apos é a chave (data, id) devolvida pela página anterior.
+    return _pagina_financeiro(
+        conn, versao(conn, "financeiro"), (inicio, fim, tipo, categoria, busca), apos, tamanho
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _periodo_financeiro(_conn, versao):
+    # Os limites dos meses arquivados vêm do catálogo, sem abrir os arquivos
+    minimo, maximo = _conn.execute('''
+        SELECT MIN(data), MAX(data) FROM (
+            SELECT MIN(data) AS data FROM financeiro
+            UNION ALL SELECT MAX(data) FROM financeiro
+            UNION ALL SELECT primeira FROM arquivo_particoes WHERE tabela = 'financeiro'
+            UNION ALL SELECT ultima FROM arquivo_particoes WHERE tabela = 'financeiro'
+        )
+    ''').fetchone()
+    if minimo is None:
+        return None
+    return date.fromisoformat(minimo[:10]), date.fromisoformat(maximo[:10])
+
+
+def periodo_financeiro(conn):
+    # Primeira e última data do livro-caixa, ou None se estiver vazio
+    return _periodo_financeiro(conn, versao(conn, "financeiro"))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _categorias_financeiro(_conn, versao):
+    categorias = {l[0] for l in _conn.execute("SELECT DISTINCT categoria FROM financeiro")}
+    if arquivo.particoes(_conn, "financeiro"):
+        categorias.update(arquivo.distintos(arquivo.ler_periodo(_conn, "financeiro", colunas=["categoria"]), "categoria"))
+    return sorted(c for c in categorias if c is not None)
+
+
+def categorias_financeiro(conn):
+    return _categorias_financeiro(conn, versao(conn, "financeiro"))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _saldo_diario(_conn, versao, inicio, fim):
+    df = pd.read_sql_query(
+        "SELECT dia, fluxo, saldo FROM saldo_diario WHERE dia >= ? AND dia <= ? ORDER BY dia",
+        _conn, params=(inicio.isoformat(), fim.isoformat())
+    )
+    df["dia"] = pd.to_datetime(df["dia"])
+    return df
+
+
+def saldo_diario(conn, inicio, fim):
+    # Saldo acumulado ao fim de cada dia, lido da tabela materializada
+    # saldo_diario (uma linha por dia com lançamentos)
+    return _saldo_diario(conn, versao(conn, "financeiro"), inicio, fim)
+
+
+# --------------------------------------------------------------- dashboard
+#
+# Lidos das tabelas de resumo mantidas por triggers (migração 8): o custo
+# depende do número de categorias, dias e serviços, não do histórico.
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _resumo_financeiro(_conn, versao):
+    return pd.read_sql_query(
+        "SELECT categoria, tipo, quantidade, total AS valor FROM resumo_financeiro ORDER BY categoria, tipo",
+        _conn
+    )
+
+
+def resumo_financeiro(conn):
+    # Total e quantidade de lançamentos por categoria e tipo
+    return _resumo_financeiro(conn, versao(conn, "financeiro"))
+
+
+def _janela_dashboard(hoje):
+    return hoje - JANELA_DASHBOARD, hoje + JANELA_DASHBOARD
+
+
+def _contagens_series(conn, hoje):
+    # Ocorrências de séries na janela do dashboard, por dia e por serviço; as
+    # gravadas já estão nas tabelas de resumo. O custo depende das séries
+    # ativas na janela, não da idade da série mais antiga.
+    return recorrencia.contagens(conn, *_janela_dashboard(hoje))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _agendamentos_por_dia(_conn, versao, hoje):
+    inicio, fim = _janela_dashboard(hoje)
+    df = pd.read_sql_query(
+        "SELECT dia AS data, quantidade AS Total FROM agendamentos_dia WHERE dia >= ? AND dia < ? ORDER BY dia",
+        _conn, params=(inicio.isoformat(), fim.isoformat())
+    )
+    por_dia, _ = _contagens_series(_conn, hoje)
+    if por_dia:
+        series = pd.DataFrame(list(por_dia.items()), columns=["data", "Total"])
+        df = pd.concat([df, series]).groupby("data", as_index=False)["Total"].sum()
+    df["data"] = pd.to_datetime(df["data"])
+    return df
+
+
+def agendamentos_por_dia(conn):
+    return _agendamentos_por_dia(conn, versao(conn, "agendamentos"), date.today())
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _servicos_mais_agendados(_conn, versao, hoje, limite):
+    # Todos os agendamentos gravados, mais as ocorrências de séries da janela
+    df = pd.read_sql_query('''
+        SELECT r.servico_id, SUM(r.quantidade) AS quantidade
+        FROM agendamentos_servico r
+        GROUP BY r.servico_id
+    ''', _conn)
+    _, por_servico = _contagens_series(_conn, hoje)
+    if por_servico:
+        series = pd.DataFrame(list(por_servico.items()), columns=["servico_id", "quantidade"])
+        df = pd.concat([df, series]).groupby("servico_id", as_index=False)["quantidade"].sum()
+    df["Serviço"] = df["servico_id"].map(_nomes(_conn, "servicos", df["servico_id"].tolist()))
+    return (df.dropna(subset=["Serviço"])
+              .groupby("Serviço", as_index=False)["quantidade"].sum()
+              .rename(columns={"quantidade": "Quantidade"})
+              .sort_values(["Quantidade", "Serviço"], ascending=[False, True], ignore_index=True)
+              .head(limite))
+
+
+def servicos_mais_agendados(conn, limite=10):
+    return _servicos_mais_agendados(conn, versao(conn, "agendamentos", "servicos"), date.today(), limite)
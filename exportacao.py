@@ -0,0 +1,117 @@
+# Exportação do livro-caixa em CSV ou Parquet.
+#
+# As linhas são lidas do cursor em blocos de TAMANHO_BLOCO e gravadas aos
+# poucos num arquivo temporário, então só o arquivo pronto (e não as linhas
+# do livro-caixa) passa pela memória. Os filtros são os mesmos da tela
+# Financeiro, aplicados no SQL.
+# Os meses arquivados (ver arquivo.py) são lidos do Parquet, um mês por vez.
+
+import csv
+import io
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import arquivo
+import dados
+from conexao import abrir_conexao
+
+TAMANHO_BLOCO = 10_000
+
+ESQUEMA_PARQUET = arquivo.ESQUEMAS["financeiro"]
+
+COLUNAS = ESQUEMA_PARQUET.names
+
+FORMATOS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _consulta_quente(filtros, desde=None, ate=None):
+    # SQL das linhas quentes com data em [desde, ate), além dos filtros
+    where, params = dados.filtros_financeiro(*filtros)
+    for condicao, valor in (("data >= ?", desde), ("data < ?", ate)):
+        if valor:
+            where += (" AND " if where else " WHERE ") + condicao
+            params.append(valor)
+    return f"SELECT {', '.join(COLUNAS)} FROM financeiro{where} ORDER BY data, id", params
+
+
+def _blocos_quentes(conn, filtros, desde, ate, tamanho):
+    cursor = conn.execute(*_consulta_quente(filtros, desde, ate))
+    while True:
+        bloco = cursor.fetchmany(tamanho)
+        if not bloco:
+            break
+        yield bloco
+
+
+def _blocos_mes_arquivado(conn, filtros, mes, caminho, tamanho):
+    # O mês do arquivo mais as linhas quentes do mesmo mês (lançadas depois
+    # do arquivamento), na ordem de data e id
+    desde, ate = f"{mes}-01", _mes_seguinte(mes)
+    quentes = arquivo.tabela_arrow("financeiro", conn.execute(*_consulta_quente(filtros, desde, ate)).fetchall())
+    frias = arquivo.sem_repetidos(arquivo.ler([caminho], "financeiro", filtro=arquivo.filtro_financeiro(*filtros)),
+                                  quentes["id"].to_pylist())
+    mes_completo = pa.concat_tables([frias, quentes]).sort_by([("data", "ascending"), ("id", "ascending")])
+    for inicio in range(0, mes_completo.num_rows, tamanho):
+        parte = mes_completo.slice(inicio, tamanho)
+        yield list(zip(*(coluna.to_pylist() for coluna in parte.columns)))
+
+
+def _mes_seguinte(mes):
+    ano, numero = int(mes[:4]), int(mes[5:7])
+    return f"{ano + numero // 12:04d}-{numero % 12 + 1:02d}-01"
+
+
+def blocos_financeiro(conn, inicio=None, fim=None, tipo=None, categoria=None, busca=None,
+                      tamanho=TAMANHO_BLOCO):
+    filtros = (inicio, fim, tipo, categoria, busca)
+    desde = None
+    for mes, caminho in arquivo.particoes(conn, "financeiro", inicio, fim):
+        yield from _blocos_quentes(conn, filtros, desde, f"{mes}-01", tamanho)
+        yield from _blocos_mes_arquivado(conn, filtros, mes, caminho, tamanho)
+        desde = _mes_seguinte(mes)
+    yield from _blocos_quentes(conn, filtros, desde, None, tamanho)
+
+
+def escrever_csv(blocos, destino):
+    texto = io.TextIOWrapper(destino, encoding="utf-8", newline="", write_through=True)
+    escritor = csv.writer(texto)
+    escritor.writerow(COLUNAS)
+    for bloco in blocos:
+        escritor.writerows(bloco)
+    texto.detach()
+
+
+def escrever_parquet(blocos, destino):
+    with pq.ParquetWriter(destino, ESQUEMA_PARQUET, compression="zstd") as escritor:
+        for bloco in blocos:
+            colunas = list(zip(*bloco))
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, ESQUEMA_PARQUET)],
+                schema=ESQUEMA_PARQUET
+            ))
+
+
+def exportar(formato, filtros, caminho):
+    # Gera o arquivo e devolve o seu conteúdo em bytes, um dos tipos que o
+    # st.download_button aceita (ele lê tudo para a memória de qualquer
+    # forma). Usa uma conexão própria: o st.download_button chama esta função
+    # numa thread separada. caminho é o banco do prestador da sessão
+    # (conexao.caminho_banco). O arquivo temporário não tem nome e some ao
+    # ser fechado.
+    with tempfile.TemporaryFile() as destino:
+        conn = abrir_conexao(caminho)
+        try:
+            blocos = blocos_financeiro(conn, *filtros)
+            if formato == "parquet":
+                escrever_parquet(blocos, destino)
+            else:
+                escrever_csv(blocos, destino)
+        finally:
+            conn.close()
+        destino.seek(0)
+        return destino.read()
@@ -0,0 +1,116 @@
+# Gráficos do Financeiro e do Dashboard, em cache.
+#
+# Montar uma figura com plotly.express custa bem mais que ler os dados, que
+# já estão em cache em dados.py. As figuras prontas ficam em
+# st.cache_resource, com a mesma chave das leituras: a versão das tabelas de
+# origem (dados.versao) e os filtros da tela. Trocar de aba ou mexer num
+# widget que não muda os filtros reaproveita a figura; uma gravação muda a
+# versão e a figura é montada de novo. max_entries limita quantas ficam em
+# memória, descartando as usadas há mais tempo.
+#
+# A figura é guardada como objeto, e não serializada (st.cache_data), porque
+# ao desserializar o plotly valida a figura inteira de novo, quase o custo de
+# montá-la. As figuras em cache são compartilhadas entre as sessões e não
+# podem ser alteradas depois de prontas.
+
+from datetime import date
+
+import plotly.express as px
+import streamlit as st
+
+import dados
+
+
+# -------------------------------------------------------------- financeiro
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _categorias_financeiro(_conn, versao, inicio, fim, tipo, categoria, busca):
+    df = dados.consultar_financeiro(_conn, inicio, fim, tipo, categoria, busca, colunas=("tipo", "valor", "categoria"))
+    resumo = df.groupby(["categoria", "tipo"])["valor"].sum().reset_index()
+    return px.bar(
+        resumo.pivot(index="categoria", columns="tipo", values="valor").fillna(0),
+        barmode="group",
+        labels={"value": "Valor (R$)", "categoria": "Categoria"}
+    )
+
+
+def categorias_financeiro(conn, inicio=None, fim=None, tipo=None, categoria=None, busca=None):
+    # Entradas e saídas por categoria dos lançamentos filtrados
+    return _categorias_financeiro(conn, dados.versao(conn, "financeiro"), inicio, fim, tipo, categoria, busca)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _saldo(_conn, versao, inicio, fim):
+    return px.line(
+        dados.saldo_diario(_conn, inicio, fim), x="dia", y="saldo",
+        title="Saldo Acumulado ao longo do tempo",
+        labels={"saldo": "Saldo (R$)", "dia": "Data"}
+    )
+
+
+def saldo(conn, inicio, fim):
+    return _saldo(conn, dados.versao(conn, "financeiro"), inicio, fim)
+
+
+# --------------------------------------------------------------- dashboard
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _distribuicao_financeira(_conn, versao):
+    return px.pie(
+        dados.resumo_financeiro(_conn).groupby("tipo")["valor"].sum().reset_index(),
+        names="tipo",
+        values="valor",
+        title="Distribuição Financeira"
+    )
+
+
+def distribuicao_financeira(conn):
+    return _distribuicao_financeira(conn, dados.versao(conn, "financeiro"))
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _resumo_categorias(_conn, versao):
+    resumo = dados.resumo_financeiro(_conn)
+    return px.bar(
+        resumo.pivot(index="categoria", columns="tipo", values="valor").fillna(0),
+        barmode="group",
+        title="Entradas e Saídas por Categoria",
+        labels={"value": "Valor (R$)", "categoria": "Categoria"}
+    )
+
+
+def resumo_categorias(conn):
+    return _resumo_categorias(conn, dados.versao(conn, "financeiro"))
+
+
+# As contagens de agendamentos dependem de uma janela em volta de hoje
+# (ver dados.py), por isso o dia também entra na chave
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _agendamentos_por_dia(_conn, versao, hoje):
+    return px.bar(
+        dados.agendamentos_por_dia(_conn),
+        x="data",
+        y="Total",
+        title=f"Agendamentos por Dia ({dados.JANELA_DASHBOARD.days} dias antes e depois de hoje)",
+        labels={"data": "Data", "Total": "Agendamentos"}
+    )
+
+
+def agendamentos_por_dia(conn):
+    return _agendamentos_por_dia(conn, dados.versao(conn, "agendamentos"), date.today())
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _servicos_mais_agendados(_conn, versao, hoje, limite):
+    return px.bar(
+        dados.servicos_mais_agendados(_conn, limite=limite),
+        x="Serviço",
+        y="Quantidade",
+        title=f"Top {limite} Serviços Mais Agendados",
+        labels={"Quantidade": "Número de Agendamentos"}
+    )
+
+
+def servicos_mais_agendados(conn, limite=10):
+    return _servicos_mais_agendados(conn, dados.versao(conn, "agendamentos", "servicos"), date.today(), limite)
@@ -0,0 +1,277 @@
+# Importação em lote de clientes, serviços e lançamentos financeiros.
+#
+# O arquivo (CSV ou XLSX) é lido em lotes de TAMANHO_LOTE linhas. Cada lote é
+# validado de forma vetorizada com pandas; as linhas válidas são gravadas com
+# executemany numa única transação por lote e as inválidas vão para o
+# relatório de erros, sem interromper a importação.
+
+import csv
+import io
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+import dados
+from migracoes import (atualizar_resumo_em_lote, atualizar_saldo_em_lote, indexar_clientes_em_lote,
+                       sem_triggers)
+
+TAMANHO_LOTE = 50_000
+MAX_ERROS_RELATORIO = 10_000
+
+# Colunas esperadas no arquivo, na ordem de gravação; as opcionais trazem o
+# valor usado quando a coluna não existe
+LAYOUTS = {
+    "clientes": {
+        "obrigatorias": ["nome", "telefone", "cpf", "endereco", "email", "nascimento"],
+        "opcionais": {"observacoes": None},
+    },
+    "servicos": {
+        "obrigatorias": ["nome", "duracao", "preco"],
+        "opcionais": {},
+    },
+    "financeiro": {
+        "obrigatorias": ["data", "descricao", "tipo", "valor", "categoria"],
+        "opcionais": {"pagamento": "Não informado", "observacao": None},
+    },
+}
+
+
+# ---------------------------------------------------------------- leitura
+
+def _normalizar_coluna(nome):
+    # "Endereço " -> "endereco"
+    nome = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode()
+    return nome.strip().lower().replace(" ", "_")
+
+
+def _ler_csv(arquivo, tamanho):
+    amostra = arquivo.read(64 * 1024)
+    arquivo.seek(0)
+    if isinstance(amostra, bytes):
+        amostra = amostra.decode("utf-8-sig", errors="ignore")
+    try:
+        separador = csv.Sniffer().sniff(amostra.splitlines()[0], delimiters=",;\t|").delimiter
+    except (csv.Error, IndexError):
+        separador = ","
+    yield from pd.read_csv(
+        arquivo, sep=separador, dtype=str, keep_default_na=False,
+        encoding="utf-8-sig", chunksize=tamanho
+    )
+
+
+def _ler_xlsx(arquivo, tamanho):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("Para importar planilhas XLSX instale o pacote openpyxl.")
+
+    # read_only percorre a planilha sem carregá-la inteira na memória
+    planilha = load_workbook(arquivo, read_only=True, data_only=True).active
+    linhas = planilha.iter_rows(values_only=True)
+    cabecalho = [str(c) if c is not None else "" for c in next(linhas, [])]
+    inicio = 0
+    lote = []
+    for linha in linhas:
+        lote.append(["" if v is None else str(v) for v in linha])
+        if len(lote) == tamanho:
+            yield pd.DataFrame(lote, columns=cabecalho, index=range(inicio, inicio + len(lote)))
+            inicio += len(lote)
+            lote = []
+    if lote:
+        yield pd.DataFrame(lote, columns=cabecalho, index=range(inicio, inicio + len(lote)))
+
+
+def ler_em_lotes(arquivo, nome_arquivo, tamanho=TAMANHO_LOTE):
+    if nome_arquivo.lower().endswith((".xlsx", ".xlsm")):
+        lotes = _ler_xlsx(arquivo, tamanho)
+    else:
+        lotes = _ler_csv(arquivo, tamanho)
+    for lote in lotes:
+        lote.columns = [_normalizar_coluna(c) for c in lote.columns]
+        yield lote
+
+
+# -------------------------------------------------------------- validação
+
+def _digitos(serie):
+    return serie.str.replace(r"\D", "", regex=True)
+
+
+def cpf_valido(serie):
+    # Confere os dois dígitos verificadores de todas as linhas de uma vez
+    digitos = _digitos(serie)
+    repetidos = "|".join(f"{d}{{11}}" for d in "0123456789")  # 000.000.000-00 etc.
+    formato_ok = digitos.str.len().eq(11) & ~digitos.str.fullmatch(repetidos)
+    validos = pd.Series(False, index=serie.index)
+    if not formato_ok.any():
+        return validos
+
+    texto = "".join(digitos[formato_ok]).encode("ascii")
+    matriz = (np.frombuffer(texto, dtype=np.uint8).reshape(-1, 11) - ord("0")).astype(np.int64)
+    soma1 = matriz[:, :9] @ np.arange(10, 1, -1)
+    dv1 = (soma1 * 10 % 11) % 10
+    soma2 = matriz[:, :10] @ np.arange(11, 1, -1)
+    dv2 = (soma2 * 10 % 11) % 10
+    validos[formato_ok] = (matriz[:, 9] == dv1) & (matriz[:, 10] == dv2)
+    return validos
+
+
+def telefone_valido(serie):
+    # DDD + número, com ou sem o código do país (55)
+    digitos = _digitos(serie).str.replace(r"^55(?=\d{10,11}$)", "", regex=True)
+    return digitos.str.len().isin([10, 11])
+
+
+def converter_data(serie):
+    # Aceita AAAA-MM-DD (com ou sem hora) e DD/MM/AAAA; inválidas viram NaT
+    iso = pd.to_datetime(serie.where(serie.str.match(r"^\d{4}-\d{2}-\d{2}")), format="ISO8601", errors="coerce")
+    br = pd.to_datetime(serie.where(serie.str.match(r"^\d{2}/\d{2}/\d{4}")), format="%d/%m/%Y", errors="coerce")
+    return iso.fillna(br)
+
+
+def converter_valor(serie):
+    # Aceita "1234.56", "1.234,56" e "R$ 1.234,56"; inválidos viram NaN
+    texto = serie.str.replace(r"[R$\s]", "", regex=True)
+    virgula = texto.str.contains(",", regex=False)
+    texto = texto.where(~virgula, texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(texto, errors="coerce")
+
+
+def _validar_clientes(df):
+    erros = {}
+    erros["CPF inválido"] = ~cpf_valido(df["cpf"])
+    erros["telefone inválido"] = ~telefone_valido(df["telefone"])
+    nascimento = converter_data(df["nascimento"])
+    erros["data de nascimento inválida"] = nascimento.isna() | (nascimento > pd.Timestamp.today())
+    df["nascimento"] = nascimento.dt.strftime("%Y-%m-%d")
+    return df, erros
+
+
+def _validar_servicos(df):
+    erros = {}
+    duracao = pd.to_numeric(df["duracao"], errors="coerce")
+    erros["duração inválida"] = duracao.isna() | (duracao <= 0) | (duracao % 1 != 0)
+    preco = converter_valor(df["preco"])
+    erros["preço inválido"] = preco.isna() | (preco < 0)
+    df["duracao"] = duracao.fillna(0).astype(int)
+    df["preco"] = preco
+    return df, erros
+
+
+def _validar_financeiro(df):
+    erros = {}
+    data = converter_data(df["data"])
+    erros["data inválida"] = data.isna()
+    valor = converter_valor(df["valor"])
+    erros["valor inválido"] = valor.isna() | (valor <= 0)
+    tipo = df["tipo"].str.strip().str.capitalize().replace({"Saida": "Saída"})
+    erros["tipo deve ser Entrada ou Saída"] = ~tipo.isin(["Entrada", "Saída"])
+    df["data"] = data.dt.strftime("%Y-%m-%d")
+    df["valor"] = valor
+    df["tipo"] = tipo
+    return df, erros
+
+
+VALIDADORES = {
+    "clientes": _validar_clientes,
+    "servicos": _validar_servicos,
+    "financeiro": _validar_financeiro,
+}
+
+
+def validar_lote(tabela, lote):
+    # Devolve (linhas válidas prontas para gravar, DataFrame de erros)
+    layout = LAYOUTS[tabela]
+    faltando = [c for c in layout["obrigatorias"] if c not in lote.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes no arquivo: {', '.join(faltando)}")
+
+    df = lote.copy()
+    for coluna, padrao in layout["opcionais"].items():
+        if coluna not in df.columns:
+            df[coluna] = padrao
+    colunas = layout["obrigatorias"] + list(layout["opcionais"])
+    df = df[colunas]
+    for coluna in layout["obrigatorias"]:
+        df[coluna] = df[coluna].str.strip()
+
+    erros = {"campo obrigatório vazio": df[layout["obrigatorias"]].eq("").any(axis=1)}
+    df, erros_tabela = VALIDADORES[tabela](df)
+    erros.update(erros_tabela)
+
+    motivos = pd.Series("", index=df.index)
+    for mensagem, mascara in erros.items():
+        motivos = motivos.where(~mascara, motivos + mensagem + "; ")
+    invalidas = motivos.ne("")
+
+    relatorio = lote[invalidas].copy()
+    relatorio.insert(0, "erro", motivos[invalidas].str.rstrip("; "))
+    relatorio.insert(0, "linha", relatorio.index + 2)  # +1 do cabeçalho, +1 base 1
+
+    validas = df[~invalidas].astype(object).where(df[~invalidas].notna(), None)
+    return validas, relatorio
+
+
+# ---------------------------------------------------------------- gravação
+
+def _gravar_lote(conn, tabela, validas):
+    colunas = list(validas.columns)
+    with dados.transacao(conn, tabela) as cursor:
+        ultimo_id = cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabela}").fetchone()[0]
+        if tabela == "financeiro":
+            # Em ordem de data as inserções no índice financeiro(data) ficam
+            # concentradas em poucas páginas
+            validas = validas.sort_values("data", kind="stable")
+        with sem_triggers(cursor, tabela):
+            cursor.executemany(
+                f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                validas.itertuples(index=False, name=None)
+            )
+        if tabela == "clientes":
+            indexar_clientes_em_lote(cursor, ultimo_id)
+        elif tabela == "financeiro":
+            atualizar_saldo_em_lote(cursor, ultimo_id)
+            atualizar_resumo_em_lote(cursor, ultimo_id)
+
+
+def importar(conn, tabela, arquivo, nome_arquivo, ao_progredir=None):
+    # Importa o arquivo inteiro e devolve um resumo com o relatório de erros.
+    # ao_progredir(linhas_lidas) é chamado após cada lote.
+    inicio = time.perf_counter()
+    inseridas = 0
+    lidas = 0
+    rejeitadas = 0
+    relatorios = []
+
+    for lote in ler_em_lotes(arquivo, nome_arquivo):
+        validas, relatorio = validar_lote(tabela, lote)
+        if len(validas):
+            _gravar_lote(conn, tabela, validas)
+        lidas += len(lote)
+        inseridas += len(validas)
+        rejeitadas += len(relatorio)
+        if sum(len(r) for r in relatorios) < MAX_ERROS_RELATORIO:
+            relatorios.append(relatorio)
+        if ao_progredir:
+            ao_progredir(lidas)
+
+    erros = pd.concat(relatorios) if relatorios else pd.DataFrame(columns=["linha", "erro"])
+    segundos = time.perf_counter() - inicio
+    return {
+        "lidas": lidas,
+        "inseridas": inseridas,
+        "rejeitadas": rejeitadas,
+        "erros": erros.head(MAX_ERROS_RELATORIO),
+        "segundos": segundos,
+        "linhas_por_segundo": lidas / segundos if segundos else 0,
+    }
+
+
+def modelo_csv(tabela):
+    # Cabeçalho de exemplo para o usuário baixar
+    layout = LAYOUTS[tabela]
+    saida = io.StringIO()
+    csv.writer(saida).writerow(layout["obrigatorias"] + list(layout["opcionais"]))
+    return saida.getvalue().encode("utf-8")
@@ -0,0 +1,298 @@
+# Mensagens de WhatsApp: confirmações e lembretes de agendamento.
+#
+# As mensagens passam por uma caixa de saída (tabela mensagens). A
+# confirmação é gravada na mesma transação do agendamento (agenda.agendar),
+# então não existe agendamento sem confirmação nem confirmação de um
+# agendamento que foi desfeito. Os lembretes são gerados em lote, com uma
+# consulta pelo índice de agendamentos por período a cada ciclo.
+#
+# O envio fica com um despachante numa thread de fundo, iniciada uma vez por
+# processo e que passa por todos os bancos de prestadores atendidos pelo
+# processo: a cada ciclo ele reserva um lote de pendentes, envia em paralelo
+# por um ThreadPoolExecutor e grava o resultado. Nenhuma tela espera pelo
+# envio. Falhas voltam para a fila com espera crescente até MAX_TENTATIVAS.
+#
+# O envio é feito por um "enviador", escolhido pela variável SIPS_ENVIADOR:
+#   whatsapp  API oficial (WhatsApp Cloud API), com SIPS_WHATSAPP_TOKEN e
+#             SIPS_WHATSAPP_NUMERO_ID
+#   local     grava as mensagens num arquivo JSONL (SIPS_ENVIADOR_ARQUIVO),
+#             para desenvolvimento e testes
+# Sem SIPS_ENVIADOR o despachante não roda: as mensagens ficam pendentes e a
+# tela de agendamento mostra o link wa.me para o envio manual.
+
+import json
+import logging
+import os
+import re
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta
+
+from conexao import abrir_conexao
+from migracoes import aplicar_migracoes
+
+# O despachante roda em segundo plano, longe de qualquer tela: as falhas vão
+# para o log do processo (Streamlit ou uvicorn)
+log = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 50
+INTERVALO_SEGUNDOS = 30
+TRABALHADORES = 4
+MAX_TENTATIVAS = 5
+ANTECEDENCIA_LEMBRETE = timedelta(hours=24)
+# Agendamentos marcados em cima da hora só recebem a confirmação
+LEMBRETE_MINIMO = timedelta(hours=2)
+# Reservas mais antigas que isso são de um despachante que parou no meio
+RESERVA_EXPIRA = timedelta(minutes=10)
+
+MODELOS = {
+    "confirmacao": "Olá! Seu agendamento de {servico} está confirmado para {inicio:%d/%m/%Y} às {inicio:%H:%M}.",
+    "lembrete": "Olá! Lembrete: seu agendamento de {servico} é em {inicio:%d/%m/%Y} às {inicio:%H:%M}.",
+}
+
+
+def numero_whatsapp(telefone):
+    # Só os dígitos, com o código do Brasil quando faltar
+    digitos = re.sub(r"\D", "", telefone or "")
+    if len(digitos) in (10, 11):
+        digitos = "55" + digitos
+    return digitos
+
+
+def _agora():
+    return datetime.now().replace(microsecond=0)
+
+
+_SELECAO = '''
+    SELECT a.id, a.data_hora, c.telefone, s.nome
+    FROM agendamentos a
+    JOIN clientes c ON c.id = a.cliente_id
+    JOIN servicos s ON s.id = a.servico_id
+'''
+
+_INSERCAO = '''
+    INSERT OR IGNORE INTO mensagens (agendamento_id, tipo, telefone, texto, enviar_em)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+
+def _mensagens(tipo, linhas, enviar_em):
+    for agendamento_id, data_hora, telefone, servico in linhas:
+        numero = numero_whatsapp(telefone)
+        if not numero:
+            continue
+        inicio = datetime.fromisoformat(data_hora)
+        texto = MODELOS[tipo].format(servico=servico, inicio=inicio)
+        yield agendamento_id, tipo, numero, texto, enviar_em(inicio).isoformat()
+
+
+def enfileirar_confirmacao(cursor, agendamento_id):
+    # Chamada dentro da transação do agendamento; quem chama faz o commit
+    linhas = cursor.execute(_SELECAO + " WHERE a.id = ?", (agendamento_id,)).fetchall()
+    agora = _agora()
+    cursor.executemany(_INSERCAO, _mensagens("confirmacao", linhas, lambda inicio: agora))
+
+
+def gerar_lembretes(conn, agora=None):
+    # Lembretes dos agendamentos que começam na janela
+    # [agora + LEMBRETE_MINIMO, agora + ANTECEDENCIA_LEMBRETE). Uma consulta só,
+    # pelo índice de data_hora; os que já têm lembrete são ignorados pela
+    # chave única (agendamento_id, tipo).
+    agora = agora or _agora()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        linhas = cursor.execute(_SELECAO + '''
+            WHERE a.data_hora >= ? AND a.data_hora < ? AND a.status = 'Agendado'
+              AND NOT EXISTS (SELECT 1 FROM mensagens m WHERE m.agendamento_id = a.id AND m.tipo = 'lembrete')
+        ''', ((agora + LEMBRETE_MINIMO).isoformat(), (agora + ANTECEDENCIA_LEMBRETE).isoformat())).fetchall()
+        cursor.executemany(_INSERCAO, _mensagens(
+            "lembrete", linhas, lambda inicio: max(agora, inicio - ANTECEDENCIA_LEMBRETE)))
+        gerados = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return gerados
+
+
+def mensagem(conn, agendamento_id, tipo="confirmacao"):
+    # (telefone, texto, status) da mensagem do agendamento, ou None
+    return conn.execute(
+        "SELECT telefone, texto, status FROM mensagens WHERE agendamento_id = ? AND tipo = ?",
+        (agendamento_id, tipo)
+    ).fetchone()
+
+
+def reservar_lote(conn, agora=None, tamanho=TAMANHO_LOTE):
+    # Marca até `tamanho` mensagens vencidas como "enviando" e devolve
+    # (id, telefone, texto, tentativas). BEGIN IMMEDIATE garante que dois
+    # despachantes não reservem a mesma mensagem.
+    agora = agora or _agora()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute(
+            "UPDATE mensagens SET status = 'pendente', reservada_em = NULL "
+            "WHERE status = 'enviando' AND reservada_em < ?",
+            ((agora - RESERVA_EXPIRA).isoformat(),)
+        )
+        lote = cursor.execute('''
+            UPDATE mensagens SET status = 'enviando', reservada_em = ?, tentativas = tentativas + 1
+            WHERE id IN (
+                SELECT id FROM mensagens
+                WHERE status = 'pendente' AND enviar_em <= ?
+                ORDER BY enviar_em LIMIT ?
+            )
+            RETURNING id, telefone, texto, tentativas
+        ''', (agora.isoformat(), agora.isoformat(), tamanho)).fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return lote
+
+
+def _enviar(enviador, mensagem_lote):
+    id_mensagem, telefone, texto, _ = mensagem_lote
+    try:
+        enviador.enviar(telefone, texto)
+    except Exception as erro:
+        return id_mensagem, str(erro) or type(erro).__name__
+    return id_mensagem, None
+
+
+def despachar_lote(conn, enviador, executor, agora=None):
+    # Envia um lote e grava o resultado; devolve (enviadas, falhas)
+    lote = reservar_lote(conn, agora)
+    if not lote:
+        return 0, 0
+    tentativas = {linha[0]: linha[3] for linha in lote}
+    resultados = list(executor.map(lambda linha: _enviar(enviador, linha), lote))
+
+    agora = _agora()
+    enviadas = [(agora.isoformat(), id_mensagem) for id_mensagem, erro in resultados if erro is None]
+    falhas = []
+    for id_mensagem, erro in resultados:
+        if erro is None:
+            continue
+        n = tentativas[id_mensagem]
+        status = "erro" if n >= MAX_TENTATIVAS else "pendente"
+        # Espera crescente entre as tentativas: 1, 2, 4, 8... minutos
+        proxima = agora + timedelta(minutes=2 ** (n - 1))
+        falhas.append((status, erro, proxima.isoformat(), id_mensagem))
+
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE mensagens SET status = 'enviada', enviada_em = ?, reservada_em = NULL, erro = NULL WHERE id = ?",
+        enviadas
+    )
+    cursor.executemany(
+        "UPDATE mensagens SET status = ?, erro = ?, enviar_em = ?, reservada_em = NULL WHERE id = ?",
+        falhas
+    )
+    conn.commit()
+    return len(enviadas), len(falhas)
+
+
+def resumo_fila(conn):
+    return dict(conn.execute("SELECT status, COUNT(*) FROM mensagens GROUP BY status").fetchall())
+
+
+# ------------------ Enviadores ------------------
+
+class EnviadorLocal:
+    # Não envia nada: guarda as mensagens na memória e, se houver caminho,
+    # acrescenta uma linha JSON por mensagem ao arquivo
+    def __init__(self, caminho=None):
+        self.caminho = caminho
+        self.enviadas = []
+        self._trava = threading.Lock()
+
+    def enviar(self, telefone, texto):
+        registro = {"momento": _agora().isoformat(), "telefone": telefone, "texto": texto}
+        with self._trava:
+            self.enviadas.append(registro)
+            if self.caminho:
+                with open(self.caminho, "a", encoding="utf-8") as arquivo:
+                    arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+class EnviadorWhatsApp:
+    # Mensagem de texto pela WhatsApp Cloud API. Fora da janela de 24 h de
+    # conversa a Meta só aceita mensagens de modelo aprovado; nesse caso a
+    # API devolve erro e a mensagem segue as novas tentativas normais.
+    URL = "https://graph.facebook.com/v20.0/{numero_id}/messages"
+
+    def __init__(self, token, numero_id, tempo_limite=10):
+        self.token = token
+        self.url = self.URL.format(numero_id=numero_id)
+        self.tempo_limite = tempo_limite
+
+    def enviar(self, telefone, texto):
+        corpo = json.dumps({
+            "messaging_product": "whatsapp",
+            "to": telefone,
+            "type": "text",
+            "text": {"body": texto},
+        }).encode("utf-8")
+        requisicao = urllib.request.Request(self.url, data=corpo, method="POST", headers={
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json",
+        })
+        with urllib.request.urlopen(requisicao, timeout=self.tempo_limite) as resposta:
+            resposta.read()
+
+
+def enviador_configurado():
+    # Enviador escolhido pelas variáveis de ambiente, ou None
+    tipo = os.environ.get("SIPS_ENVIADOR")
+    if tipo == "whatsapp":
+        return EnviadorWhatsApp(os.environ["SIPS_WHATSAPP_TOKEN"], os.environ["SIPS_WHATSAPP_NUMERO_ID"])
+    if tipo == "local":
+        return EnviadorLocal(os.environ.get("SIPS_ENVIADOR_ARQUIVO", "data/mensagens_enviadas.jsonl"))
+    return None
+
+
+def envio_automatico():
+    return os.environ.get("SIPS_ENVIADOR") in ("whatsapp", "local")
+
+
+# ------------------ Despachante ------------------
+
+def _ciclo(caminhos, enviador, parar, intervalo):
+    # caminhos() devolve os bancos atendidos (um por prestador); cada um é
+    # migrado na primeira passagem e tratado com a sua própria conexão
+    migrados = set()
+    with ThreadPoolExecutor(max_workers=TRABALHADORES, thread_name_prefix="sips-envio") as executor:
+        while not parar.is_set():
+            try:
+                bancos = caminhos()
+            except Exception:
+                log.exception("Falha ao listar os bancos atendidos")
+                bancos = []
+            for caminho in bancos:
+                if parar.is_set():
+                    break
+                try:
+                    with closing(abrir_conexao(caminho)) as conn:
+                        if caminho not in migrados:
+                            aplicar_migracoes(conn)
+                            migrados.add(caminho)
+                        gerar_lembretes(conn)
+                        # Esvazia a fila vencida antes de passar ao próximo banco
+                        while not parar.is_set() and despachar_lote(conn, enviador, executor) != (0, 0):
+                            pass
+                except Exception:
+                    log.exception("Falha ao despachar as mensagens de %s", caminho)
+            parar.wait(intervalo)
+
+
+def iniciar_despachante(caminhos, enviador, intervalo=INTERVALO_SEGUNDOS):
+    # Inicia a thread do despachante; devolve o Event que a faz parar
+    parar = threading.Event()
+    threading.Thread(target=_ciclo, args=(caminhos, enviador, parar, intervalo),
+                     name="sips-despachante", daemon=True).start()
+    return parar
@@ -0,0 +1,572 @@
+# Migrações versionadas do banco de dados.
+#
+# Cada migração é aplicada uma única vez, em ordem, e registrada na tabela
+# schema_versao. Para alterar o esquema basta acrescentar uma nova função ao
+# final da lista MIGRACOES — bancos já existentes recebem a mudança na próxima
+# inicialização do app.
+
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def _m001_tabelas_iniciais(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            telefone TEXT NOT NULL,
+            cpf TEXT NOT NULL,
+            endereco TEXT NOT NULL,
+            email TEXT NOT NULL,
+            nascimento TEXT NOT NULL,
+            observacoes TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS servicos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            duracao INTEGER NOT NULL,
+            preco REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS agendamentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER,
+            servico_id INTEGER,
+            data_hora TEXT NOT NULL,
+            observacoes TEXT,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id),
+            FOREIGN KEY (servico_id) REFERENCES servicos(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS financeiro (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT NOT NULL,
+            descricao TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            valor REAL NOT NULL,
+            categoria TEXT NOT NULL,
+            pagamento TEXT NOT NULL,
+            observacao TEXT
+        )
+    ''')
+
+
+def _colunas(cursor, tabela):
+    return [c[1] for c in cursor.execute(f"PRAGMA table_info({tabela})").fetchall()]
+
+
+def _m002_status_agendamentos(cursor):
+    # finalizar_servico já grava em agendamentos.status, mas a coluna nunca
+    # foi criada nos bancos antigos
+    if "status" not in _colunas(cursor, "agendamentos"):
+        cursor.execute("ALTER TABLE agendamentos ADD COLUMN status TEXT NOT NULL DEFAULT 'Agendado'")
+
+
+def _m003_indices_consultas(cursor):
+    # Índices para as consultas do Financeiro, Agendamentos e Dashboard
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_financeiro_data ON financeiro(data)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_financeiro_tipo_categoria ON financeiro(tipo, categoria)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agendamentos_data_hora ON agendamentos(data_hora)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agendamentos_cliente ON agendamentos(cliente_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agendamentos_servico ON agendamentos(servico_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clientes_nome ON clientes(nome)")
+    cursor.execute("ANALYZE")
+
+
+def _m004_versoes_dados(cursor):
+    # Contador por tabela, incrementado a cada escrita; usado como chave do
+    # cache de leituras em dados.py
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versoes_dados (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.executemany(
+        "INSERT OR IGNORE INTO versoes_dados (tabela, versao) VALUES (?, 0)",
+        [("clientes",), ("servicos",), ("agendamentos",), ("financeiro",)]
+    )
+
+
+# Valor com sinal de um lançamento no saldo: entradas somam, o resto subtrai
+_FLUXO = "CASE WHEN {0}.tipo = 'Entrada' THEN {0}.valor ELSE -{0}.valor END"
+
+
+def _ajustar_saldo_diario(linha, sinal):
+    # Corpo de trigger que aplica (sinal=+1) ou desfaz (sinal=-1) um
+    # lançamento: cria o dia se preciso, ajusta o fluxo do dia e propaga a
+    # diferença para o saldo acumulado dos dias seguintes
+    dia = f"substr({linha}.data, 1, 10)"
+    delta = f"({sinal}) * ({_FLUXO.format(linha)})"
+    return f'''
+        INSERT OR IGNORE INTO saldo_diario (dia, fluxo, quantidade, saldo)
+        VALUES ({dia}, 0, 0, COALESCE(
+            (SELECT saldo FROM saldo_diario WHERE dia < {dia} ORDER BY dia DESC LIMIT 1), 0));
+        UPDATE saldo_diario SET fluxo = fluxo + {delta}, quantidade = quantidade + ({sinal})
+        WHERE dia = {dia};
+        UPDATE saldo_diario SET saldo = saldo + {delta} WHERE dia >= {dia};
+        DELETE FROM saldo_diario WHERE dia = {dia} AND quantidade = 0;
+    '''
+
+
+def reconstruir_saldo_diario(cursor):
+    # Recalcula a tabela inteira a partir do livro-caixa. Só considera as
+    # linhas do SQLite: não usar num banco com meses arquivados (arquivo.py).
+    cursor.execute("DELETE FROM saldo_diario")
+    cursor.execute(f'''
+        INSERT INTO saldo_diario (dia, fluxo, quantidade, saldo)
+        SELECT dia, fluxo, quantidade, SUM(fluxo) OVER (ORDER BY dia)
+        FROM (
+            SELECT substr(data, 1, 10) AS dia, SUM({_FLUXO.format("financeiro")}) AS fluxo,
+                   COUNT(*) AS quantidade
+            FROM financeiro
+            GROUP BY dia
+        )
+    ''')
+
+
+def _m005_saldo_diario(cursor):
+    # Saldo materializado por dia para o gráfico "Evolução do Saldo",
+    # mantido pelos triggers abaixo a cada escrita no financeiro
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS saldo_diario (
+            dia TEXT PRIMARY KEY,
+            fluxo REAL NOT NULL,
+            quantidade INTEGER NOT NULL,
+            saldo REAL NOT NULL
+        )
+    ''')
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_financeiro_saldo_ins AFTER INSERT ON financeiro
+        BEGIN {_ajustar_saldo_diario("NEW", 1)} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_financeiro_saldo_del AFTER DELETE ON financeiro
+        BEGIN {_ajustar_saldo_diario("OLD", -1)} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_financeiro_saldo_upd AFTER UPDATE OF data, tipo, valor ON financeiro
+        BEGIN {_ajustar_saldo_diario("OLD", -1)} {_ajustar_saldo_diario("NEW", 1)} END
+    """)
+    reconstruir_saldo_diario(cursor)
+
+
+def _digitos(coluna):
+    # Remove a pontuação usual de telefone e CPF: "(11) 9999-0000" -> "1199990000"
+    for c in "()-. +/":
+        coluna = f"replace({coluna}, '{c}', '')"
+    return coluna
+
+
+def _telefone_fts(coluna):
+    # Os dígitos do telefone e, se ele tiver DDD (10 ou 11 dígitos), também o
+    # número sem o DDD, como segundo token: "(11) 91234-5678" ->
+    # "11912345678 912345678". Assim a busca pelo começo do número local
+    # também encontra o cliente.
+    digitos = _digitos(coluna)
+    return f"CASE WHEN length({digitos}) IN (10, 11) THEN {digitos} || ' ' || substr({digitos}, 3) ELSE {digitos} END"
+
+
+def _valores_fts(linha):
+    return (f"{linha}.id, {linha}.nome, {_telefone_fts(linha + '.telefone')}, "
+            f"{_digitos(linha + '.cpf')}, {linha}.email, {linha}.observacoes")
+
+
+_COLUNAS_FTS = "rowid, nome, telefone, cpf, email, observacoes"
+
+
+def _m006_busca_clientes(cursor):
+    # Índice de texto completo para a busca de clientes. Sem acentos
+    # ("joao" encontra "João") e com índices de prefixo para a busca
+    # enquanto se digita. Telefone e CPF são indexados só com os dígitos.
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts USING fts5(
+            nome, telefone, cpf, email, observacoes,
+            tokenize = "unicode61 remove_diacritics 2",
+            prefix = '2 3 4'
+        )
+    ''')
+    _indexar_clientes(cursor)
+
+
+def _indexar_clientes(cursor):
+    # (Re)cria os triggers do índice de texto e o preenche de novo
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_clientes_fts_ins AFTER INSERT ON clientes
+        BEGIN
+            INSERT INTO clientes_fts ({_COLUNAS_FTS}) VALUES ({_valores_fts("NEW")});
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_clientes_fts_del AFTER DELETE ON clientes
+        BEGIN
+            DELETE FROM clientes_fts WHERE rowid = OLD.id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_clientes_fts_upd AFTER UPDATE ON clientes
+        BEGIN
+            DELETE FROM clientes_fts WHERE rowid = OLD.id;
+            INSERT INTO clientes_fts ({_COLUNAS_FTS}) VALUES ({_valores_fts("NEW")});
+        END
+    """)
+    cursor.execute("DELETE FROM clientes_fts")
+    cursor.execute(f"INSERT INTO clientes_fts ({_COLUNAS_FTS}) SELECT {_valores_fts('clientes')} FROM clientes")
+
+
+def _m007_indice_servicos(cursor):
+    # Busca de serviços por prefixo do nome (LIKE 'termo%' sem diferenciar
+    # maiúsculas) no seletor do Agendar
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_servicos_nome ON servicos(nome COLLATE NOCASE)")
+
+
+def _ajustar_resumo_financeiro(linha, sinal):
+    # Soma (sinal=+1) ou subtrai (sinal=-1) um lançamento do total da sua
+    # categoria e tipo; a linha do resumo some quando fica sem lançamentos
+    return f'''
+        INSERT INTO resumo_financeiro (categoria, tipo, quantidade, total)
+        VALUES ({linha}.categoria, {linha}.tipo, 0, 0)
+        ON CONFLICT (categoria, tipo) DO NOTHING;
+        UPDATE resumo_financeiro
+        SET quantidade = quantidade + ({sinal}), total = total + ({sinal}) * {linha}.valor
+        WHERE categoria = {linha}.categoria AND tipo = {linha}.tipo;
+        DELETE FROM resumo_financeiro
+        WHERE categoria = {linha}.categoria AND tipo = {linha}.tipo AND quantidade = 0;
+    '''
+
+
+def _ajustar_resumo_agendamentos(linha, sinal):
+    # Mesma ideia para a contagem de agendamentos por dia e por serviço
+    dia = f"substr({linha}.data_hora, 1, 10)"
+    return f'''
+        INSERT INTO agendamentos_dia (dia, quantidade) VALUES ({dia}, 0)
+        ON CONFLICT (dia) DO NOTHING;
+        UPDATE agendamentos_dia SET quantidade = quantidade + ({sinal}) WHERE dia = {dia};
+        DELETE FROM agendamentos_dia WHERE dia = {dia} AND quantidade = 0;
+        INSERT INTO agendamentos_servico (servico_id, quantidade)
+        SELECT {linha}.servico_id, 0 WHERE {linha}.servico_id IS NOT NULL
+        ON CONFLICT (servico_id) DO NOTHING;
+        UPDATE agendamentos_servico SET quantidade = quantidade + ({sinal})
+        WHERE servico_id = {linha}.servico_id;
+        DELETE FROM agendamentos_servico WHERE servico_id = {linha}.servico_id AND quantidade = 0;
+    '''
+
+
+def reconstruir_resumos(cursor):
+    # Recalcula os resumos do dashboard a partir das tabelas de origem (como
+    # reconstruir_saldo_diario, não vale para bancos com meses arquivados)
+    cursor.execute("DELETE FROM resumo_financeiro")
+    cursor.execute('''
+        INSERT INTO resumo_financeiro (categoria, tipo, quantidade, total)
+        SELECT categoria, tipo, COUNT(*), SUM(valor) FROM financeiro GROUP BY categoria, tipo
+    ''')
+    cursor.execute("DELETE FROM agendamentos_dia")
+    cursor.execute('''
+        INSERT INTO agendamentos_dia (dia, quantidade)
+        SELECT substr(data_hora, 1, 10) AS dia, COUNT(*) FROM agendamentos GROUP BY dia
+    ''')
+    cursor.execute("DELETE FROM agendamentos_servico")
+    cursor.execute('''
+        INSERT INTO agendamentos_servico (servico_id, quantidade)
+        SELECT servico_id, COUNT(*) FROM agendamentos WHERE servico_id IS NOT NULL GROUP BY servico_id
+    ''')
+
+
+def _m008_resumos_dashboard(cursor):
+    # Agregados do Dashboard mantidos por triggers: a tela lê só algumas
+    # linhas já somadas, qualquer que seja o tamanho do histórico
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumo_financeiro (
+            categoria TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            total REAL NOT NULL,
+            PRIMARY KEY (categoria, tipo)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS agendamentos_dia (
+            dia TEXT PRIMARY KEY,
+            quantidade INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS agendamentos_servico (
+            servico_id INTEGER PRIMARY KEY,
+            quantidade INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_financeiro_resumo_ins AFTER INSERT ON financeiro
+        BEGIN {_ajustar_resumo_financeiro("NEW", 1)} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_financeiro_resumo_del AFTER DELETE ON financeiro
+        BEGIN {_ajustar_resumo_financeiro("OLD", -1)} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_financeiro_resumo_upd AFTER UPDATE OF categoria, tipo, valor ON financeiro
+        BEGIN {_ajustar_resumo_financeiro("OLD", -1)} {_ajustar_resumo_financeiro("NEW", 1)} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_agendamentos_resumo_ins AFTER INSERT ON agendamentos
+        BEGIN {_ajustar_resumo_agendamentos("NEW", 1)} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_agendamentos_resumo_del AFTER DELETE ON agendamentos
+        BEGIN {_ajustar_resumo_agendamentos("OLD", -1)} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_agendamentos_resumo_upd AFTER UPDATE OF data_hora, servico_id ON agendamentos
+        BEGIN {_ajustar_resumo_agendamentos("OLD", -1)} {_ajustar_resumo_agendamentos("NEW", 1)} END
+    """)
+    reconstruir_resumos(cursor)
+
+
+# Fim de um agendamento pela duração do serviço (30 minutos se não houver)
+_FIM_AGENDAMENTO = """strftime('%Y-%m-%dT%H:%M:%S', {0}.data_hora, '+' || COALESCE(
+    (SELECT duracao FROM servicos WHERE servicos.id = {0}.servico_id), 30) || ' minutes')"""
+
+
+def preencher_fim_agendamentos(cursor):
+    # Calcula o fim dos agendamentos que ainda não o têm
+    cursor.execute(f"UPDATE agendamentos SET fim = {_FIM_AGENDAMENTO.format('agendamentos')} WHERE fim IS NULL")
+
+
+def _m009_fim_agendamentos(cursor):
+    # Início e fim de cada agendamento, para detectar horários sobrepostos.
+    # O índice (data_hora, fim) cobre a consulta de conflitos e substitui o
+    # índice só em data_hora.
+    if "fim" not in _colunas(cursor, "agendamentos"):
+        cursor.execute("ALTER TABLE agendamentos ADD COLUMN fim TEXT")
+    preencher_fim_agendamentos(cursor)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_agendamentos_fim AFTER INSERT ON agendamentos
+        WHEN NEW.fim IS NULL
+        BEGIN
+            UPDATE agendamentos SET fim = {_FIM_AGENDAMENTO.format("NEW")} WHERE id = NEW.id;
+        END
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agendamentos_periodo ON agendamentos(data_hora, fim)")
+    cursor.execute("DROP INDEX IF EXISTS idx_agendamentos_data_hora")
+
+
+def _m010_fila_mensagens(cursor):
+    # Caixa de saída das mensagens de WhatsApp (ver mensageria.py). Cada
+    # agendamento tem no máximo uma mensagem de cada tipo; o índice parcial
+    # cobre a busca das pendentes pelo horário de envio.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mensagens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            agendamento_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            telefone TEXT NOT NULL,
+            texto TEXT NOT NULL,
+            enviar_em TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pendente',
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            reservada_em TEXT,
+            enviada_em TEXT,
+            erro TEXT,
+            UNIQUE (agendamento_id, tipo),
+            FOREIGN KEY (agendamento_id) REFERENCES agendamentos(id)
+        )
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_mensagens_pendentes ON mensagens(enviar_em) WHERE status = 'pendente'"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_mensagens_reservadas ON mensagens(reservada_em) WHERE status = 'enviando'"
+    )
+
+
+def _m011_corrige_lancamentos_automaticos(cursor):
+    # A tela Agendar gravava o lançamento automático com as colunas trocadas:
+    # "Entrada" ia colado no fim da descrição e o tipo ficava "Serviço". O
+    # UPDATE passa pelos triggers, que acertam saldo_diario e os resumos.
+    cursor.execute('''
+        UPDATE financeiro
+        SET tipo = 'Entrada', descricao = substr(descricao, 1, length(descricao) - length('Entrada'))
+        WHERE tipo = 'Serviço' AND descricao LIKE 'Agendamento automático: %Entrada'
+    ''')
+    if cursor.rowcount:
+        cursor.execute("UPDATE versoes_dados SET versao = versao + 1 WHERE tabela = 'financeiro'")
+
+
+def _m012_arquivo_particoes(cursor):
+    # Catálogo dos meses arquivados em Parquet (ver arquivo.py). arquivo é
+    # relativo à pasta do banco; primeira e ultima são as datas extremas do mês.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS arquivo_particoes (
+            tabela TEXT NOT NULL,
+            mes TEXT NOT NULL,
+            arquivo TEXT NOT NULL,
+            linhas INTEGER NOT NULL,
+            primeira TEXT NOT NULL,
+            ultima TEXT NOT NULL,
+            atualizado_em TEXT NOT NULL,
+            PRIMARY KEY (tabela, mes)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _m013_series(cursor):
+    # Agendamentos recorrentes (ver recorrencia.py). ate é a última data da
+    # série, inclusive; duracao, em minutos, é a do serviço na criação. Em
+    # series_excecoes, ocorrencia é o início original da ocorrência e
+    # agendamento_id, o agendamento que a substituiu (NULL se cancelada).
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS series (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL REFERENCES clientes(id),
+            servico_id INTEGER NOT NULL REFERENCES servicos(id),
+            inicio TEXT NOT NULL,
+            duracao INTEGER NOT NULL,
+            frequencia TEXT NOT NULL CHECK (frequencia IN ('semanal', 'quinzenal', 'mensal')),
+            ate TEXT,
+            pagamento TEXT NOT NULL,
+            observacoes TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS series_excecoes (
+            serie_id INTEGER NOT NULL REFERENCES series(id),
+            ocorrencia TEXT NOT NULL,
+            agendamento_id INTEGER REFERENCES agendamentos(id),
+            PRIMARY KEY (serie_id, ocorrencia)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _m014_telefone_local_fts(cursor):
+    # O telefone passa a ser indexado também sem o DDD (ver _telefone_fts):
+    # os triggers são recriados com a nova expressão e o índice, refeito
+    cursor.execute("DROP TRIGGER IF EXISTS trg_clientes_fts_ins")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_clientes_fts_upd")
+    _indexar_clientes(cursor)
+
+
+@contextmanager
+def sem_triggers(cursor, tabela):
+    # Remove os triggers da tabela durante uma carga em lote e os recria no
+    # final, dentro da mesma transação: outras conexões nunca os veem
+    # ausentes, e a carga atualiza as tabelas derivadas de uma vez só com as
+    # funções abaixo. Em caso de erro o rollback desfaz também o DROP.
+    triggers = cursor.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (tabela,)
+    ).fetchall()
+    for nome, _ in triggers:
+        cursor.execute(f"DROP TRIGGER {nome}")
+    yield
+    for _, sql in triggers:
+        cursor.execute(sql)
+
+
+def indexar_clientes_em_lote(cursor, apos_id):
+    # Inclui no índice de texto os clientes com id > apos_id
+    cursor.execute(
+        f"INSERT INTO clientes_fts ({_COLUNAS_FTS}) SELECT {_valores_fts('clientes')} FROM clientes WHERE id > ?",
+        (apos_id,)
+    )
+
+
+def atualizar_saldo_em_lote(cursor, apos_id):
+    # Aplica ao saldo_diario os lançamentos com id > apos_id: soma o fluxo por
+    # dia e recalcula o saldo acumulado a partir do dia mais antigo afetado
+    primeiro_dia = cursor.execute(
+        "SELECT MIN(substr(data, 1, 10)) FROM financeiro WHERE id > ?", (apos_id,)
+    ).fetchone()[0]
+    if primeiro_dia is None:
+        return
+    cursor.execute(f'''
+        INSERT INTO saldo_diario (dia, fluxo, quantidade, saldo)
+        SELECT substr(data, 1, 10) AS dia, SUM({_FLUXO.format("financeiro")}), COUNT(*), 0
+        FROM financeiro
+        WHERE id > ?
+        GROUP BY dia
+        ON CONFLICT (dia) DO UPDATE SET
+            fluxo = fluxo + excluded.fluxo,
+            quantidade = quantidade + excluded.quantidade
+    ''', (apos_id,))
+    cursor.execute('''
+        UPDATE saldo_diario SET saldo = acumulado.saldo
+        FROM (
+            SELECT dia,
+                   COALESCE((SELECT saldo FROM saldo_diario WHERE dia < :dia ORDER BY dia DESC LIMIT 1), 0)
+                   + SUM(fluxo) OVER (ORDER BY dia) AS saldo
+            FROM saldo_diario
+            WHERE dia >= :dia
+        ) AS acumulado
+        WHERE saldo_diario.dia = acumulado.dia
+    ''', {"dia": primeiro_dia})
+
+
+def atualizar_resumo_em_lote(cursor, apos_id):
+    # Soma ao resumo_financeiro os lançamentos com id > apos_id
+    cursor.execute('''
+        INSERT INTO resumo_financeiro (categoria, tipo, quantidade, total)
+        SELECT categoria, tipo, COUNT(*), SUM(valor)
+        FROM financeiro
+        WHERE id > ?
+        GROUP BY categoria, tipo
+        ON CONFLICT (categoria, tipo) DO UPDATE SET
+            quantidade = quantidade + excluded.quantidade,
+            total = total + excluded.total
+    ''', (apos_id,))
+
+
+MIGRACOES = [
+    (1, "Tabelas iniciais", _m001_tabelas_iniciais),
+    (2, "Coluna status em agendamentos", _m002_status_agendamentos),
+    (3, "Índices das consultas principais", _m003_indices_consultas),
+    (4, "Versões de dados para o cache", _m004_versoes_dados),
+    (5, "Saldo diário materializado", _m005_saldo_diario),
+    (6, "Busca de clientes por texto completo", _m006_busca_clientes),
+    (7, "Índice do nome dos serviços", _m007_indice_servicos),
+    (8, "Resumos do dashboard", _m008_resumos_dashboard),
+    (9, "Fim dos agendamentos", _m009_fim_agendamentos),
+    (10, "Fila de mensagens", _m010_fila_mensagens),
+    (11, "Correção dos lançamentos automáticos", _m011_corrige_lancamentos_automaticos),
+    (12, "Catálogo do arquivo histórico", _m012_arquivo_particoes),
+    (13, "Agendamentos recorrentes", _m013_series),
+    (14, "Telefone sem DDD na busca de clientes", _m014_telefone_local_fts),
+]
+
+
+def versao_atual(conn):
+    return conn.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_versao").fetchone()[0]
+
+
+def aplicar_migracoes(conn):
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_versao (
+            versao INTEGER PRIMARY KEY,
+            descricao TEXT NOT NULL,
+            aplicada_em TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+    for versao, descricao, migracao in MIGRACOES:
+        if versao <= versao_atual(conn):
+            continue
+        # BEGIN IMMEDIATE impede que duas instâncias apliquem a mesma migração
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            if versao > versao_atual(conn):
+                migracao(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_versao (versao, descricao, aplicada_em) VALUES (?, ?, ?)",
+                    (versao, descricao, datetime.now().isoformat())
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return versao_atual(conn)
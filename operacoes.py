@@ -0,0 +1,226 @@
+# Operações de escrita das telas.
+#
+# Cada operação grava todas as linhas de uma ação do usuário numa única
+# transação (dados.transacao): um commit por ação e nada gravado pela metade
+# se uma das instruções falhar. Operações podem chamar outras, e várias
+# podem ser agrupadas num commit só com dados.em_lote:
+#
+#     with dados.em_lote(conn):
+#         for linha in linhas:
+#             operacoes.lancar(conn, ...)
+
+from datetime import date, timedelta
+
+import agenda
+import dados
+import recorrencia
+
+PAGAMENTO_PADRAO = "Não informado"
+
+
+# ---------------------------------------------------------------- clientes
+
+def incluir_cliente(conn, nome, telefone, cpf, endereco, email, nascimento, observacoes=None):
+    with dados.transacao(conn, "clientes") as cursor:
+        cursor.execute("""
+            INSERT INTO clientes (nome, telefone, cpf, endereco, email, nascimento, observacoes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (nome, telefone, cpf, endereco, email, nascimento.isoformat(), observacoes))
+    return cursor.lastrowid
+
+
+def alterar_cliente(conn, id_cliente, nome, telefone, cpf, endereco, email, nascimento, observacoes=None):
+    with dados.transacao(conn, "clientes") as cursor:
+        cursor.execute("""
+            UPDATE clientes SET nome=?, telefone=?, cpf=?, endereco=?, email=?, nascimento=?, observacoes=?
+            WHERE id=?
+        """, (nome, telefone, cpf, endereco, email, nascimento.isoformat(), observacoes, id_cliente))
+
+
+def excluir_cliente(conn, id_cliente):
+    # As séries do cliente saem junto: as ocorrências continuariam ocupando
+    # horários na agenda sem aparecer no calendário
+    with dados.transacao(conn, "clientes", "agendamentos") as cursor:
+        cursor.execute("DELETE FROM series_excecoes WHERE serie_id IN (SELECT id FROM series WHERE cliente_id=?)",
+                       (id_cliente,))
+        cursor.execute("DELETE FROM series WHERE cliente_id=?", (id_cliente,))
+        cursor.execute("DELETE FROM clientes WHERE id=?", (id_cliente,))
+
+
+# ---------------------------------------------------------------- serviços
+
+def incluir_servico(conn, nome, duracao, preco):
+    with dados.transacao(conn, "servicos") as cursor:
+        cursor.execute("INSERT INTO servicos (nome, duracao, preco) VALUES (?, ?, ?)", (nome, duracao, preco))
+    return cursor.lastrowid
+
+
+# -------------------------------------------------------------- financeiro
+
+def lancar(conn, data, descricao, tipo, valor, categoria, pagamento=PAGAMENTO_PADRAO, observacao=None):
+    with dados.transacao(conn, "financeiro") as cursor:
+        cursor.execute("""
+            INSERT INTO financeiro (data, descricao, tipo, valor, categoria, pagamento, observacao)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (data.isoformat(), descricao, tipo, valor, categoria, pagamento, observacao))
+    return cursor.lastrowid
+
+
+def excluir_lancamentos(conn, ids):
+    # Levanta ValueError, sem excluir nada, se algum lançamento já foi
+    # arquivado (ver arquivamento.py): o arquivo histórico não é alterado
+    ids = set(ids)
+    with dados.transacao(conn, "financeiro") as cursor:
+        cursor.executemany("DELETE FROM financeiro WHERE id=?", [(i,) for i in ids])
+        if cursor.rowcount < len(ids):
+            raise ValueError("Lançamentos de meses arquivados não podem ser excluídos.")
+
+
+# ------------------------------------------------------------ agendamentos
+
+def agendar_servico(conn, cliente_id, servico_id, inicio, pagamento=PAGAMENTO_PADRAO, observacoes=None):
+    # Agendamento, confirmação na caixa de saída e lançamento automático no
+    # financeiro, tudo no mesmo commit. Levanta ValueError se o horário
+    # estiver ocupado.
+    servico = dados.obter_servico(conn, servico_id)
+    if servico is None:
+        raise ValueError(f"Serviço {servico_id} não encontrado.")
+    if dados.obter_cliente(conn, cliente_id) is None:
+        raise ValueError(f"Cliente {cliente_id} não encontrado.")
+    _, servico_nome, duracao, servico_preco = servico
+    with dados.transacao(conn):
+        agendamento_id = agenda.agendar(conn, cliente_id, servico_id, inicio, duracao, observacoes)
+        lancar(conn, inicio.date(), f"Agendamento automático: {servico_nome}", "Entrada",
+               servico_preco, "Serviço", pagamento)
+    return agendamento_id
+
+
+def finalizar_servico(conn, id_agendamento, valor, servico_nome):
+    # O preço do serviço já entrou no financeiro ao agendar (agendar_servico);
+    # valor, se informado, é lançado à parte como acréscimo
+    with dados.transacao(conn, "agendamentos"):
+        conn.execute("""
+            UPDATE agendamentos
+            SET status = 'Concluído'
+            WHERE id = ?
+        """, (id_agendamento,))
+        if valor:
+            lancar(conn, date.today(), f"Serviço finalizado: {servico_nome}", "Entrada", valor, "Serviço")
+
+
+def finalizar_agendamento(conn, id_agendamento, valor=None):
+    # Conclui o agendamento, lançando só o acréscimo informado em valor.
+    # LookupError se o agendamento não existir.
+    agendamento = dados.obter_agendamento(conn, id_agendamento)
+    if agendamento is None:
+        raise LookupError(f"Agendamento {id_agendamento} não encontrado.")
+    if agendamento[6] == "Concluído":
+        raise ValueError(f"Agendamento {id_agendamento} já foi concluído.")
+    servico = dados.obter_servico(conn, agendamento[2])
+    if servico is None:
+        raise ValueError(f"Serviço do agendamento {id_agendamento} não encontrado.")
+    finalizar_servico(conn, id_agendamento, valor, servico[1])
+
+
+# ------------------------------------------------------------------ séries
+
+def agendar_serie(conn, cliente_id, servico_id, inicio, frequencia, ate=None,
+                  pagamento=PAGAMENTO_PADRAO, observacoes=None):
+    # Grava a regra da série (ver recorrencia.py). Levanta ValueError se
+    # alguma ocorrência do próximo ano cair num horário ocupado. O valor só
+    # é lançado no financeiro quando cada ocorrência é concluída.
+    servico = dados.obter_servico(conn, servico_id)
+    if servico is None:
+        raise ValueError(f"Serviço {servico_id} não encontrado.")
+    if dados.obter_cliente(conn, cliente_id) is None:
+        raise ValueError(f"Cliente {cliente_id} não encontrado.")
+    if frequencia not in recorrencia.FREQUENCIAS:
+        raise ValueError(f"Frequência inválida: {frequencia}.")
+    if ate is not None and ate < inicio.date():
+        raise ValueError("A data final da série é anterior ao primeiro agendamento.")
+    duracao = servico[2]
+    with dados.transacao(conn, "agendamentos") as cursor:
+        ocupadas = agenda.conflitos_serie(cursor, inicio, duracao, frequencia, ate)
+        if ocupadas:
+            raise ValueError(
+                f"Horário indisponível em {len(ocupadas)} ocorrência(s) da série; "
+                f"a primeira em {ocupadas[0]:%d/%m/%Y às %H:%M}."
+            )
+        cursor.execute('''
+            INSERT INTO series (cliente_id, servico_id, inicio, duracao, frequencia, ate, pagamento, observacoes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (cliente_id, servico_id, inicio.isoformat(), duracao, frequencia,
+              ate.isoformat() if ate else None, pagamento, observacoes))
+    return cursor.lastrowid
+
+
+def _excecao(cursor, id_serie, ocorrencia):
+    # Tira a ocorrência da expansão da série e devolve a série. LookupError
+    # se a série não existir; ValueError se ocorrencia não for uma ocorrência
+    # dela ou já tiver sido cancelada, remarcada ou concluída.
+    serie = recorrencia.obter_serie(cursor, id_serie)
+    if serie is None:
+        raise LookupError(f"Série {id_serie} não encontrada.")
+    if not recorrencia.e_ocorrencia(serie, ocorrencia):
+        raise ValueError(f"A série {id_serie} não tem ocorrência em {ocorrencia:%d/%m/%Y %H:%M}.")
+    inserida = cursor.execute(
+        "INSERT INTO series_excecoes (serie_id, ocorrencia) VALUES (?, ?) ON CONFLICT DO NOTHING",
+        (id_serie, ocorrencia.isoformat())
+    ).rowcount
+    if not inserida:
+        raise ValueError(f"A ocorrência de {ocorrencia:%d/%m/%Y %H:%M} já foi alterada.")
+    return serie
+
+
+def _substituir(cursor, id_serie, ocorrencia, agendamento_id):
+    cursor.execute("UPDATE series_excecoes SET agendamento_id = ? WHERE serie_id = ? AND ocorrencia = ?",
+                   (agendamento_id, id_serie, ocorrencia.isoformat()))
+
+
+def cancelar_ocorrencia(conn, id_serie, ocorrencia):
+    with dados.transacao(conn, "agendamentos") as cursor:
+        _excecao(cursor, id_serie, ocorrencia)
+
+
+def remarcar_ocorrencia(conn, id_serie, ocorrencia, novo_inicio, observacoes=None):
+    # A ocorrência vira um agendamento comum no novo horário, com a
+    # confirmação na caixa de saída. Levanta ValueError se estiver ocupado.
+    with dados.transacao(conn, "agendamentos") as cursor:
+        _, cliente_id, servico_id, _, duracao, _, _ = _excecao(cursor, id_serie, ocorrencia)
+        agendamento_id = agenda.agendar(conn, cliente_id, servico_id, novo_inicio,
+                                        duracao // timedelta(minutes=1), observacoes)
+        _substituir(cursor, id_serie, ocorrencia, agendamento_id)
+    return agendamento_id
+
+
+def concluir_ocorrencia(conn, id_serie, ocorrencia, valor=None):
+    # Grava a ocorrência como agendamento concluído, no mesmo horário, e
+    # lança o valor informado ou, sem ele, o preço atual do serviço
+    with dados.transacao(conn, "agendamentos") as cursor:
+        _, cliente_id, servico_id, _, duracao, _, _ = _excecao(cursor, id_serie, ocorrencia)
+        servico = dados.obter_servico(conn, servico_id)
+        if servico is None:
+            raise ValueError(f"Serviço da série {id_serie} não encontrado.")
+        _, servico_nome, _, servico_preco = servico
+        pagamento, observacoes = cursor.execute("SELECT pagamento, observacoes FROM series WHERE id = ?",
+                                                (id_serie,)).fetchone()
+        cursor.execute('''
+            INSERT INTO agendamentos (cliente_id, servico_id, data_hora, fim, observacoes, status)
+            VALUES (?, ?, ?, ?, ?, 'Concluído')
+        ''', (cliente_id, servico_id, ocorrencia.isoformat(), (ocorrencia + duracao).isoformat(), observacoes))
+        agendamento_id = cursor.lastrowid
+        _substituir(cursor, id_serie, ocorrencia, agendamento_id)
+        lancar(conn, ocorrencia.date(), f"Serviço finalizado: {servico_nome}", "Entrada",
+               servico_preco if valor is None else valor, "Serviço", pagamento)
+    return agendamento_id
+
+
+def encerrar_serie(conn, id_serie, ate):
+    # ate passa a ser o último dia com ocorrências da série
+    with dados.transacao(conn, "agendamentos") as cursor:
+        serie = recorrencia.obter_serie(cursor, id_serie)
+        if serie is None:
+            raise LookupError(f"Série {id_serie} não encontrada.")
+        if serie[6] is not None and serie[6] < ate:
+            raise ValueError(f"A série {id_serie} já termina em {serie[6]:%d/%m/%Y}.")
+        cursor.execute("UPDATE series SET ate = ? WHERE id = ?", (ate.isoformat(), id_serie))
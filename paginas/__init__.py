@@ -0,0 +1,22 @@
+# Uma tela por módulo, cada um com uma função mostrar(conn).
+#
+# O módulo só é importado quando a tela é aberta pela primeira vez no
+# processo: bibliotecas pesadas como plotly e streamlit_calendar não entram
+# na inicialização do app nem nas telas que não as usam.
+
+import importlib
+
+PAGINAS = {
+    "🏠 Início": "inicio",
+    "👤 Cliente": "cliente",
+    "🔧 Serviço": "servico",
+    "📇 Agendar": "agendar",
+    "📅 Agendamentos": "agendamentos",
+    "💰 Financeiro": "financeiro",
+    "📊 Dashboard": "dashboard",
+    "📥 Importar": "importar",
+}
+
+
+def carregar(titulo):
+    return importlib.import_module(f"{__name__}.{PAGINAS[titulo]}")
@@ -0,0 +1,117 @@
+# Calendário de agendamentos.
+
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+from streamlit_calendar import calendar
+
+import dados
+import operacoes
+
+
+def mostrar(conn):
+    st.subheader("📅 Calendário de Agendamentos")
+
+    visoes = {"Mês": "dayGridMonth", "Semana": "timeGridWeek", "Dia": "timeGridDay"}
+    if "cal_referencia" not in st.session_state:
+        st.session_state.cal_referencia = date.today()
+
+    # A navegação é feita pelo app (e não pelos botões do calendário) para que
+    # o período visível seja conhecido aqui e só ele seja consultado
+    def navegar_calendario(sentido):
+        ref = st.session_state.cal_referencia
+        visao_atual = st.session_state.cal_visao
+        if sentido == 0:
+            st.session_state.cal_referencia = date.today()
+        elif visao_atual == "Mês":
+            inicio_mes = ref.replace(day=1)
+            if sentido > 0:
+                st.session_state.cal_referencia = (inicio_mes + timedelta(days=32)).replace(day=1)
+            else:
+                st.session_state.cal_referencia = (inicio_mes - timedelta(days=1)).replace(day=1)
+        else:
+            passo = 7 if visao_atual == "Semana" else 1
+            st.session_state.cal_referencia = ref + timedelta(days=passo * sentido)
+
+    col_ant, col_hoje, col_prox, col_visao = st.columns([1, 1, 1, 3])
+    visao = col_visao.radio("Visualização", list(visoes), horizontal=True,
+                            key="cal_visao", label_visibility="collapsed")
+    col_ant.button("◀", on_click=navegar_calendario, args=(-1,), width="stretch")
+    col_hoje.button("Hoje", on_click=navegar_calendario, args=(0,), width="stretch")
+    col_prox.button("▶", on_click=navegar_calendario, args=(1,), width="stretch")
+    referencia = st.session_state.cal_referencia
+
+    # Janela consultada: o mês da data de referência com uma margem de cada
+    # lado. Cobre os dias de outros meses mostrados na grade mensal, e
+    # semanas/dias do mesmo mês reaproveitam a mesma consulta em cache.
+    margem = timedelta(days=14)
+    inicio_mes = referencia.replace(day=1)
+    proximo_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
+    df = dados.agendamentos_periodo(conn, inicio_mes - margem, proximo_mes + margem)
+
+    # data_hora e fim são gravados no horário local do agendamento, sem fuso;
+    # o fim vem da duração do serviço
+    df["start"] = pd.to_datetime(df["data_hora"], format="ISO8601")
+    df["end"] = pd.to_datetime(df["fim"], format="ISO8601")
+    df["title"] = df["cliente"] + " - " + df["servico"]
+    # Ocorrências de séries recorrentes não têm agendamento gravado: o id do
+    # evento vem da série e do horário
+    da_serie = df["serie_id"].notna()
+    df.loc[da_serie, "title"] = "🔁 " + df.loc[da_serie, "title"]
+    df["id"] = [f"serie-{serie}-{inicio}" if pd.isna(id_agendamento) else str(id_agendamento)
+                for id_agendamento, serie, inicio in zip(df["id"], df["serie_id"], df["data_hora"])]
+
+    df["start"] = df["start"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+    df["end"] = df["end"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+    eventos = df[["id", "title", "start", "end"]].to_dict("records")
+
+    calendar_options = {
+        "initialView": visoes[visao],
+        "initialDate": referencia.isoformat(),
+        "locale": "pt-br",  # ✅ Isso define o idioma como português
+        "headerToolbar": {
+            "left": "",
+            "center": "title",
+            "right": ""
+        },
+        "selectable": True
+    }
+
+    # Ocorrências de séries só entram no financeiro quando concluídas
+    def alterar_ocorrencia(operacao, serie_id, ocorrencia):
+        try:
+            operacao(conn, serie_id, ocorrencia)
+        except (LookupError, ValueError) as erro:
+            st.session_state.cal_erro = str(erro)
+
+    if "cal_erro" in st.session_state:
+        st.error(st.session_state.pop("cal_erro"))
+
+    calendar_data = calendar(events=eventos, options=calendar_options,
+                             key=f"calendario_{visao}_{referencia.isoformat()}")
+
+    if df.empty:
+        st.info("Nenhum agendamento neste período.")
+
+    if calendar_data and calendar_data.get("dateClick"):
+        dia_selecionado = date.fromisoformat(calendar_data["dateClick"]["date"][:10])
+        st.markdown(f"### 📅 Agendamentos em {dia_selecionado.isoformat()}")
+
+        agendamentos_dia = dados.agendamentos_periodo(conn, dia_selecionado, dia_selecionado + timedelta(days=1))
+        if not agendamentos_dia.empty:
+            for i, row in agendamentos_dia.iterrows():
+                hora = pd.to_datetime(row["data_hora"]).strftime("%H:%M")
+                if pd.isna(row["serie_id"]):
+                    st.markdown(f"- 🕒 {hora} - 👤 **{row['cliente']}** - 💼 {row['servico']}")
+                    continue
+                col_texto, col_concluir, col_cancelar = st.columns([4, 1, 1])
+                col_texto.markdown(f"- 🕒 {hora} - 👤 **{row['cliente']}** - 💼 {row['servico']} 🔁")
+                ocorrencia = (int(row["serie_id"]), datetime.fromisoformat(row["data_hora"]))
+                col_concluir.button("Concluir", key=f"concluir_{row['serie_id']}_{row['data_hora']}",
+                                    on_click=alterar_ocorrencia, args=(operacoes.concluir_ocorrencia,) + ocorrencia)
+                col_cancelar.button("Cancelar", key=f"cancelar_{row['serie_id']}_{row['data_hora']}",
+                                    on_click=alterar_ocorrencia, args=(operacoes.cancelar_ocorrencia,) + ocorrencia)
+        else:
+            st.info("Nenhum agendamento neste dia.")
@@ -0,0 +1,105 @@
+# Novo agendamento, com lançamento automático no financeiro e confirmação
+# pelo WhatsApp (pela caixa de saída de mensageria.py), ou nova série
+# recorrente (recorrencia.py).
+
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+import streamlit as st
+
+import agenda
+import dados
+import mensageria
+import operacoes
+import recorrencia
+from componentes import seletor_cliente, seletor_servico
+
+
+def escolher_horario(horario):
+    st.session_state.agendar_data = horario.date()
+    st.session_state.agendar_hora = horario.time()
+
+
+def mostrar(conn):
+    st.subheader("📌 Novo Agendamento")
+
+    if not dados.tem_registros(conn, "clientes") or not dados.tem_registros(conn, "servicos"):
+        st.warning("Cadastre clientes e serviços antes de agendar.")
+    else:
+        # Seletores, data e hora fora do formulário: a busca e a checagem de
+        # disponibilidade acontecem enquanto se digita
+        cliente_id = seletor_cliente(conn, "Cliente", "agendar_cliente")
+        servico_id = seletor_servico(conn, "Serviço", "agendar_servico")
+
+        col_data, col_hora = st.columns(2)
+        data = col_data.date_input("Data", key="agendar_data")
+        hora = col_hora.time_input("Hora", step=timedelta(minutes=agenda.PASSO_MINUTOS), key="agendar_hora")
+        inicio = datetime.combine(data, hora)
+
+        horario_livre = False
+        if servico_id is not None:
+            duracao = dados.obter_servico(conn, servico_id)[2]
+            fim = inicio + timedelta(minutes=duracao)
+            ocupados = agenda.conflitos(conn, inicio, fim)
+            if ocupados:
+                st.warning("⚠️ Horário ocupado: " + ", ".join(
+                    f"{a_inicio:%H:%M}–{a_fim:%H:%M}" for a_inicio, a_fim, _ in ocupados))
+                sugestoes = agenda.proximos_horarios(conn, inicio, duracao)
+                if sugestoes:
+                    st.caption("Próximos horários livres:")
+                    for coluna, sugestao in zip(st.columns(len(sugestoes)), sugestoes):
+                        coluna.button(f"{sugestao:%d/%m %H:%M}", key=f"sugestao_{sugestao:%Y%m%d%H%M}",
+                                      on_click=escolher_horario, args=(sugestao,))
+            else:
+                horario_livre = True
+                st.success(f"✅ Horário livre: {inicio:%H:%M}–{fim:%H:%M} ({duracao} min)")
+
+        with st.form("form_agendamento", clear_on_submit=True):
+            pagamento = st.selectbox("💳 Pagamento", [operacoes.PAGAMENTO_PADRAO, "Pix", "Dinheiro", "Cartão"])
+            col_repetir, col_ate = st.columns(2)
+            repetir = col_repetir.selectbox("🔁 Repetir", [None] + list(recorrencia.FREQUENCIAS),
+                                            format_func=lambda f: recorrencia.FREQUENCIAS.get(f, "Não repetir"))
+            ate = col_ate.date_input("Até (opcional)", value=None, min_value=data)
+            observacoes = st.text_area("Observações")
+            enviar = st.form_submit_button("Agendar")
+
+            if enviar:
+                if cliente_id is None or servico_id is None:
+                    st.warning("Por favor, selecione um cliente e um serviço.")
+                elif not horario_livre:
+                    st.error("❗ Escolha um horário livre.")
+                elif repetir:
+                    # Só a regra é gravada; as ocorrências do próximo ano são
+                    # conferidas na gravação e o valor é lançado a cada conclusão
+                    try:
+                        operacoes.agendar_serie(conn, cliente_id, servico_id, inicio, repetir, ate,
+                                                pagamento, observacoes)
+                    except ValueError as erro:
+                        st.error(f"❗ {erro}")
+                        return
+                    fim_serie = f"até {ate:%d/%m/%Y}" if ate else "sem data final"
+                    st.success(f"Série {recorrencia.FREQUENCIAS[repetir].lower()} criada a partir de "
+                               f"{inicio:%d/%m/%Y %H:%M}, {fim_serie}.")
+                else:
+                    # Agendamento e lançamento automático no financeiro numa
+                    # transação só (a disponibilidade é conferida de novo na gravação)
+                    try:
+                        agendamento_id = operacoes.agendar_servico(conn, cliente_id, servico_id, inicio,
+                                                                   pagamento, observacoes)
+                    except ValueError as erro:
+                        st.error(f"❗ {erro}")
+                        return
+
+                    st.success("Agendamento criado com sucesso! Lançamento financeiro registrado.")
+
+                    # Confirmação pelo WhatsApp: já está na caixa de saída; sem
+                    # envio automático, o link abre a mesma mensagem no WhatsApp
+                    confirmacao = mensageria.mensagem(conn, agendamento_id)
+                    if confirmacao is None:
+                        st.info("Cliente sem telefone: nenhuma confirmação enfileirada.")
+                    elif mensageria.envio_automatico():
+                        st.info("📲 Confirmação enfileirada; será enviada pelo WhatsApp em instantes.")
+                    else:
+                        numero, texto, _ = confirmacao
+                        link = f"https://wa.me/{numero}?text={quote(texto)}"
+                        st.markdown(f"[📲 Enviar confirmação no WhatsApp]({link})", unsafe_allow_html=True)
@@ -0,0 +1,117 @@
+# Cadastro de clientes: inclusão, alteração, exclusão e busca.
+
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+import dados
+import operacoes
+from componentes import seletor_cliente
+
+
+def mostrar(conn):
+    st.header("Gestão de Clientes")
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    if "acao_cliente" not in st.session_state:
+        st.session_state.acao_cliente = "incluir"
+
+    with col1:
+        if st.button("➕ Incluir"):
+            st.session_state.acao_cliente = "incluir"
+
+    with col2:
+        if st.button("✏️ Alterar"):
+            st.session_state.acao_cliente = "alterar"
+
+    with col3:
+        if st.button("🗑️ Excluir"):
+            st.session_state.acao_cliente = "excluir"
+
+    with col4:
+        if st.button("🔍 Localizar"):
+            st.session_state.acao_cliente = "localizar"
+
+    acao = st.session_state.acao_cliente
+
+    if acao == "incluir":
+        st.markdown("### ➕ Incluir Novo Cliente")
+        with st.form("form_incluir", clear_on_submit=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                nome = st.text_input("Nome completo")
+                telefone = st.text_input("Telefone com DDD")
+                cpf = st.text_input("CPF")
+                email = st.text_input("Email")
+            with col2:
+                endereco = st.text_input("Endereço")
+                nascimento = st.date_input(
+                    "Data de nascimento",
+                        value=date(2000, 1, 1),
+                        max_value=date.today(),
+                        format="DD/MM/YYYY")
+                observacoes = st.text_area("Observações")
+            enviado = st.form_submit_button("Salvar Cliente")
+            if enviado:
+                if nome and telefone and cpf and endereco and email:
+                    operacoes.incluir_cliente(conn, nome, telefone, cpf, endereco, email, nascimento, observacoes)
+                    st.success(f"Cliente **{nome}** cadastrado com sucesso!")
+                else:
+                    st.warning("Preencha todos os campos obrigatórios.")
+
+    elif acao == "alterar":
+        st.markdown("### ✏️ Alterar Cliente")
+        id_cliente = seletor_cliente(conn, "Cliente", "alterar_cliente")
+
+        if id_cliente:
+            cliente = dados.obter_cliente(conn, id_cliente)
+
+            with st.form("form_servico", clear_on_submit=True):
+                col1, col2 = st.columns(2)
+                with col1:
+                    nome = st.text_input("Nome completo", cliente[1])
+                    telefone = st.text_input("Telefone com DDD", cliente[2])
+                    cpf = st.text_input("CPF", cliente[3])
+                    email = st.text_input("Email", cliente[5])
+                with col2:
+                    endereco = st.text_input("Endereço", cliente[4])
+                    nascimento = st.date_input(
+                    "Data de nascimento",
+                        value=date(2000, 1, 1),
+                        max_value=date.today(),
+                        format="DD/MM/YYYY")
+                    observacoes = st.text_area("Observações", cliente[7])
+                atualizado = st.form_submit_button("Atualizar Cliente")
+                if atualizado:
+                    operacoes.alterar_cliente(conn, id_cliente, nome, telefone, cpf, endereco, email,
+                                              nascimento, observacoes)
+                    st.success("Cliente atualizado com sucesso!")
+    elif acao == "excluir":
+        st.markdown("### 🗑️ Excluir Cliente")
+        id_cliente = seletor_cliente(conn, "Cliente", "excluir_cliente")
+
+        if id_cliente:
+            cliente = dados.obter_cliente(conn, id_cliente)
+
+            with st.form("form_servico", clear_on_submit=True):
+                st.write(f"**Nome:** {cliente[1]}")
+                st.write(f"**Telefone:** {cliente[2]}")
+                st.write(f"**Email:** {cliente[5]}")
+                confirmar = st.form_submit_button("Confirmar Exclusão")
+                if confirmar:
+                    operacoes.excluir_cliente(conn, id_cliente)
+                    st.success("Cliente excluído com sucesso!")
+    elif acao == "localizar":
+        st.markdown("### 🔍 Localizar Cliente")
+        termo = st.text_input("Digite nome, telefone, CPF, email ou observação para buscar")
+        if termo:
+            resultados = dados.buscar_clientes(conn, termo)
+            if resultados:
+                df_result = pd.DataFrame(resultados, columns=["ID", "Nome", "Telefone", "CPF", "Email"])
+                st.dataframe(df_result.drop(columns="ID"), hide_index=True)
+                if len(resultados) == dados.LIMITE_BUSCA:
+                    st.caption(f"Exibindo os {dados.LIMITE_BUSCA} resultados mais relevantes. Refine a busca para ver outros.")
+            else:
+                st.info("Nenhum cliente encontrado.")
@@ -0,0 +1,64 @@
+# Dashboard com os agregados financeiros e de agendamentos.
+
+import streamlit as st
+
+import analitico
+import dados
+import graficos
+import profiler
+from componentes import aviso_copia
+
+
+def mostrar(conn):
+    st.subheader("📊 Dashboard")
+
+    # Os gráficos leem a cópia analítica, não o banco em que se grava
+    with analitico.leitura(conn) as (copia, criada_em):
+        aviso_copia(conn, criada_em, "dashboard_copia")
+        _painel(copia)
+
+
+def _painel(conn):
+    # Só os agregados são lidos do banco (tabelas de resumo, em cache até a
+    # próxima escrita); os gráficos também ficam em cache (graficos.py)
+    resumo = dados.resumo_financeiro(conn)
+    ag_count = dados.agendamentos_por_dia(conn)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("💼 Financeiro")
+
+        if resumo.empty:
+            st.info("Nenhum dado financeiro registrado.")
+        else:
+            # Resumo financeiro
+            total_entradas = resumo.loc[resumo["tipo"] == "Entrada", "valor"].sum()
+            total_saidas = resumo.loc[resumo["tipo"] == "Saída", "valor"].sum()
+            saldo = total_entradas - total_saidas
+
+            st.metric("💵 Total Entradas", f"R$ {total_entradas:,.2f}")
+            st.metric("💸 Total Saídas", f"R$ {total_saidas:,.2f}")
+            st.metric("💰 Saldo Atual", f"R$ {saldo:,.2f}")
+
+            # Gráfico pizza de Entradas vs Saídas
+            with profiler.medir("grafico", "Distribuição Financeira"):
+                st.plotly_chart(graficos.distribuicao_financeira(conn), width="stretch")
+
+            # Gráfico barras por categoria e tipo
+            with profiler.medir("grafico", "Entradas e Saídas por Categoria"):
+                st.plotly_chart(graficos.resumo_categorias(conn), width="stretch")
+
+    with col2:
+        st.subheader("📆 Agendamentos")
+
+        if ag_count.empty:
+            st.info("Nenhum agendamento registrado.")
+        else:
+            # Agendamentos por data
+            with profiler.medir("grafico", "Total de Agendamentos por Dia"):
+                st.plotly_chart(graficos.agendamentos_por_dia(conn), width="stretch")
+
+            # Serviços mais agendados
+            with profiler.medir("grafico", "Top 10 Serviços Mais Agendados"):
+                st.plotly_chart(graficos.servicos_mais_agendados(conn, limite=10), width="stretch")
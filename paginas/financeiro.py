@@ -0,0 +1,202 @@
+# Controle financeiro: lançamentos, filtros, resumo, gráficos e exportação.
+
+from datetime import datetime
+
+import streamlit as st
+
+import analitico
+import dados
+import exportacao
+import graficos
+import operacoes
+import profiler
+from componentes import aviso_copia
+from conexao import caminho_banco
+
+
+def mostrar(conn):
+    st.subheader("💰 Controle Financeiro de Prestadores de Serviço")
+
+    # Carrega os serviços cadastrados para a categoria
+    categorias_servicos = [s[1] for s in dados.listar_servicos(conn)]
+
+    with st.form("form_financeiro", clear_on_submit=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            data = st.date_input("📅 Data", value=datetime.today())
+            tipo = st.selectbox("📈 Tipo", ["Selecione um Tipo...", "Entrada", "Saída"])
+            categoria = st.selectbox("🏷️ Categoria (Serviço)", ["Selecione um Serviço..."] + categorias_servicos)
+            pagamento = st.selectbox("💳 Pagamento", [operacoes.PAGAMENTO_PADRAO, "Pix", "Dinheiro", "Cartão"])
+        with col2:
+            descricao = st.text_input("📝 Descrição")
+            valor = st.number_input("💰 Valor (R$)", min_value=0.01, format="%.2f")
+            observacao = st.text_area("🗒️ Observação (opcional)", height=80)
+
+        enviado = st.form_submit_button("💾 Salvar Lançamento")
+
+        if enviado:
+            if tipo == "Selecione um Tipo...":
+                st.error("❗ Selecione um tipo válido.")
+            elif categoria == "Selecione um Serviço...":
+                st.error("❗ Selecione uma categoria válida.")
+            elif not descricao:
+                st.error("❗ Por favor, preencha a descrição.")
+            elif valor <= 0:
+                st.error("❗ Valor deve ser maior que zero.")
+            else:
+                operacoes.lancar(conn, data, descricao, tipo, valor, categoria, pagamento, observacao)
+                st.success("✅ Lançamento salvo com sucesso!")
+    st.write("### 🔍 Filtrar Lançamentos")
+    periodo = dados.periodo_financeiro(conn)
+    if periodo:
+        data_min, data_max = periodo
+        selecao_periodo = st.date_input("Período", [data_min, data_max])
+        if len(selecao_periodo) != 2:
+            st.info("Selecione a data final do período.")
+            return
+        dt_inicio, dt_fim = selecao_periodo
+
+        col_tipo, col_categoria = st.columns(2)
+        tipo_filtro = col_tipo.selectbox("Tipo", ["Todos", "Entrada", "Saída"])
+        categoria_filtro = col_categoria.selectbox("Categoria", ["Todas"] + dados.categorias_financeiro(conn))
+        busca = st.text_input("🔎 Buscar na descrição")
+
+        # Listagem paginada: apenas uma página é lida do banco por vez.
+        # fin_paginas guarda a chave inicial de cada página visitada.
+        filtros = (dt_inicio, dt_fim, tipo_filtro, categoria_filtro, busca)
+        if st.session_state.get("fin_filtros") != filtros:
+            st.session_state.fin_filtros = filtros
+            st.session_state.fin_paginas = [None]
+        paginas = st.session_state.fin_paginas
+        # Os mesmos filtros como os parâmetros de dados.py
+        filtros_consulta = (
+            dt_inicio, dt_fim,
+            None if tipo_filtro == "Todos" else tipo_filtro,
+            None if categoria_filtro == "Todas" else categoria_filtro,
+            busca or None
+        )
+
+        df_pagina, chave_ultima, tem_proxima = dados.pagina_financeiro(conn, *filtros_consulta, apos=paginas[-1])
+        if df_pagina.empty and len(paginas) == 1:
+            st.info("Nenhum lançamento encontrado para os filtros selecionados.")
+            return
+
+        if "fin_mensagem" in st.session_state:
+            st.success(st.session_state.pop("fin_mensagem"))
+
+        df_display = df_pagina[["data", "descricao", "tipo", "valor", "categoria", "pagamento", "observacao"]]
+        selecao = st.dataframe(
+            df_display,
+            hide_index=True,
+            on_select="rerun",
+            selection_mode="multi-row",
+            key=f"grade_financeiro_{len(paginas)}_{dados.versao(conn, 'financeiro')[1]}",
+            column_config={
+                "data": st.column_config.DateColumn("📅 Data", format="DD/MM/YYYY"),
+                "descricao": "📝 Descrição",
+                "tipo": "📈 Tipo",
+                "valor": st.column_config.NumberColumn("💰 Valor", format="R$ %.2f"),
+                "categoria": "🏷️ Categoria",
+                "pagamento": "💳 Pagamento",
+                "observacao": "🗒️ Observação",
+            }
+        )
+
+        col_ant, col_pag, col_prox = st.columns([1, 2, 1])
+        if col_ant.button("⬅️ Anterior", disabled=len(paginas) == 1):
+            paginas.pop()
+            st.rerun()
+        col_pag.caption(f"Página {len(paginas)}")
+        if col_prox.button("Próxima ➡️", disabled=not tem_proxima):
+            paginas.append(chave_ultima)
+            st.rerun()
+
+        linhas_selecionadas = selecao.selection.rows
+        if st.button(f"🗑️ Excluir selecionados ({len(linhas_selecionadas)})", disabled=not linhas_selecionadas):
+            ids_excluir = [int(df_pagina.iloc[i]["id"]) for i in linhas_selecionadas]
+            try:
+                operacoes.excluir_lancamentos(conn, ids_excluir)
+            except ValueError as erro:
+                st.error(f"❗ {erro}")
+            else:
+                st.session_state.fin_mensagem = f"🗑️ {len(ids_excluir)} lançamento(s) excluído(s)!"
+                st.rerun()
+
+        # Resumos e gráficos leem a cópia analítica, não o banco em que se
+        # grava. Filtros aplicados no SQLite: só as linhas do período, e só as
+        # colunas usadas nos resumos, são carregadas
+        with analitico.leitura(conn) as (copia, criada_em):
+            df = dados.consultar_financeiro(copia, *filtros_consulta, colunas=("tipo", "valor", "categoria"))
+            if not df.empty:
+                # Gráficos em cache pela versão da cópia e pelos filtros; o
+                # saldo é o de todo o livro-caixa ao fim de cada dia do período
+                figuras = (graficos.categorias_financeiro(copia, *filtros_consulta),
+                           graficos.saldo(copia, dt_inicio, dt_fim))
+        aviso_copia(conn, criada_em, "financeiro_copia")
+        if df.empty:
+            st.info("Os lançamentos deste filtro ainda não estão na cópia analítica.")
+        else:
+            _resumo(df, *figuras)
+
+        # O arquivo só é gerado quando o botão é clicado, lendo o banco em
+        # blocos com os mesmos filtros da tela
+        formato = st.radio("Formato da exportação", ["CSV", "Parquet"], horizontal=True)
+        extensao = formato.lower()
+        banco = caminho_banco(conn)
+        st.download_button(
+            label=f"📥 Exportar lançamentos filtrados para {formato}",
+            data=lambda: exportacao.exportar(extensao, filtros_consulta, banco),
+            file_name=f"lancamentos_financeiros.{extensao}", mime=exportacao.FORMATOS[extensao]
+        )
+    else:
+        st.info("ℹ️ Nenhum lançamento cadastrado ainda.")
+
+
+def _resumo(df, fig_cat, fig_saldo):
+    # Totais, resumo por categoria e gráficos dos lançamentos filtrados
+    entradas = df[df["tipo"] == "Entrada"]["valor"]
+    saidas = df[df["tipo"] == "Saída"]["valor"]
+
+    total_entradas = entradas.sum()
+    total_saidas = saidas.sum()
+    saldo = total_entradas - total_saidas
+
+    maior_entrada = entradas.max() if not entradas.empty else 0
+    maior_saida = saidas.max() if not saidas.empty else 0
+    media_entrada = entradas.mean() if not entradas.empty else 0
+    media_saida = saidas.mean() if not saidas.empty else 0
+
+    st.markdown("### 📊 Resumo Financeiro")
+    col1, col2, col3 = st.columns(3)
+    col1.metric(label="💵 Total Entradas", value=f"R$ {total_entradas:,.2f}")
+    col2.metric(label="💸 Total Saídas", value=f"R$ {total_saidas:,.2f}")
+    col3.metric(label="💰 Saldo Atual", value=f"R$ {saldo:,.2f}")
+
+    st.markdown("---")
+
+    col4, col5, col6 = st.columns(3)
+    col4.metric(label="⬆️ Maior Entrada", value=f"R$ {maior_entrada:,.2f}")
+    col5.metric(label="⬇️ Maior Saída", value=f"R$ {maior_saida:,.2f}")
+    col6.metric(label="📊 Média Entrada / Saída", value=f"R$ {media_entrada:,.2f} / R$ {media_saida:,.2f}")
+
+    resumo = df.groupby(["categoria", "tipo"]).agg(
+        Total_Valor=("valor", "sum"),
+        Quantidade=("valor", "count"),
+        Media_Valor=("valor", "mean")
+    ).reset_index()
+
+    st.markdown("### 📋 Resumo por Categoria e Tipo")
+    for _, row in resumo.iterrows():
+        with st.expander(f"🏷️ {row['categoria']} - {row['tipo']}"):
+            col1, col2, col3 = st.columns(3)
+            col1.metric("💰 Total", f"R$ {row['Total_Valor']:,.2f}")
+            col2.metric("🔢 Quantidade", row['Quantidade'])
+            col3.metric("📊 Média", f"R$ {row['Media_Valor']:,.2f}")
+
+    st.markdown("### 📈 Entradas e Saídas por Categoria")
+    with profiler.medir("grafico", "Entradas e Saídas por Categoria"):
+        st.plotly_chart(fig_cat, width="stretch")
+
+    st.markdown("### 📉 Evolução do Saldo")
+    with profiler.medir("grafico", "Saldo Acumulado ao longo do tempo"):
+        st.plotly_chart(fig_saldo, width="stretch")
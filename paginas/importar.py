@@ -0,0 +1,51 @@
+# Importação em lote de arquivos CSV/XLSX.
+
+import streamlit as st
+
+import importacao
+
+
+def mostrar(conn):
+    st.subheader("📥 Importação em Lote")
+
+    tabelas = {
+        "👤 Clientes": "clientes",
+        "🔧 Serviços": "servicos",
+        "💰 Lançamentos financeiros": "financeiro"
+    }
+    tabela = tabelas[st.selectbox("O que deseja importar?", list(tabelas))]
+    layout = importacao.LAYOUTS[tabela]
+
+    st.caption(
+        f"Colunas obrigatórias: {', '.join(layout['obrigatorias'])}"
+        + (f" — opcionais: {', '.join(layout['opcionais'])}" if layout["opcionais"] else "")
+        + ". Datas em AAAA-MM-DD ou DD/MM/AAAA; valores com vírgula ou ponto decimal."
+    )
+    st.download_button("📄 Baixar modelo CSV", importacao.modelo_csv(tabela),
+                       file_name=f"modelo_{tabela}.csv", mime="text/csv")
+
+    arquivo = st.file_uploader("Arquivo CSV ou XLSX", type=["csv", "xlsx"])
+    if arquivo and st.button("🚀 Importar"):
+        andamento = st.empty()
+        try:
+            resultado = importacao.importar(
+                conn, tabela, arquivo, arquivo.name,
+                ao_progredir=lambda lidas: andamento.info(f"⏳ {lidas:,} linhas processadas...")
+            )
+        except (ValueError, RuntimeError) as erro:
+            andamento.empty()
+            st.error(f"❗ {erro}")
+        else:
+            andamento.empty()
+            st.success(
+                f"✅ {resultado['inseridas']:,} de {resultado['lidas']:,} linhas importadas em "
+                f"{resultado['segundos']:.1f}s ({resultado['linhas_por_segundo']:,.0f} linhas/s)."
+            )
+            if resultado["rejeitadas"]:
+                st.warning(f"⚠️ {resultado['rejeitadas']:,} linhas rejeitadas.")
+                st.dataframe(resultado["erros"], hide_index=True)
+                st.download_button(
+                    "📥 Baixar relatório de erros",
+                    resultado["erros"].to_csv(index=False).encode("utf-8"),
+                    file_name=f"erros_importacao_{tabela}.csv", mime="text/csv"
+                )
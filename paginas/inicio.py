@@ -0,0 +1,66 @@
+# Tela inicial: apresentação do sistema.
+
+import streamlit as st
+
+
+def mostrar(conn):
+    st.markdown("<h2 style='text-align: center; color: #4CAF50;'>👋 Bem-vindo ao <b>SIPS</b> — Sistema Integrado de Prestação de Serviços!</h2>", unsafe_allow_html=True)
+
+    st.markdown("""
+    <div style="text-align: center;">
+        <img src="https://images.unsplash.com/photo-1556740749-887f6717d7e4?auto=format&fit=crop&w=800&q=80" width="500" style="border-radius: 15px;"/>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("""
+    ### O que você pode fazer no SIPS:
+    - 📇 **Gerenciar clientes:** cadastre, edite e controle seus clientes facilmente.
+    - 🛠️ **Gerenciar serviços:** mantenha seu catálogo de serviços sempre atualizado.
+    - 📅 **Agendar serviços:** crie agendamentos rápidos e receba confirmações.
+    - 📊 **Visualizar agendamentos:** acompanhe todos os seus compromissos em um só lugar.
+    - 💰 **Controle financeiro:** registre entradas e saídas automaticamente.
+    - 📈 **Dashboard interativo:** gráficos para entender melhor seus negócios.
+    """)
+
+    st.markdown("---")
+
+    st.markdown("## 📰 Últimas notícias e dicas para empreendedores")
+    st.markdown("""
+    - [5 Dicas para Pequenos Negócios Crescerem em 2025](https://www.example.com/noticia1)
+      Aprenda estratégias simples para impulsionar seu negócio e aumentar as vendas.
+    - [Como Fidelizar Clientes e Aumentar a Receita](https://www.example.com/noticia2)
+      Entenda a importância da experiência do cliente e como criar um relacionamento duradouro.
+    - [Tendências de Mercado para o Setor de Serviços](https://www.example.com/noticia3)
+      Fique por dentro das novidades que vão movimentar o mercado este ano.
+    """)
+
+    st.markdown("---")
+
+    st.markdown("## 🎥 Vídeos recomendados sobre Empreendedorismo")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.video("https://www.youtube.com/watch?v=znz7ibyObhA")  # Exemplo vídeo motivacional
+        st.caption("Como começar um negócio do zero - Dicas essenciais")
+
+    with col2:
+        st.video("https://www.youtube.com/watch?v=nKW8tvM3mSc")  # Exemplo vídeo de gestão
+        st.caption("Como Organizar o Financeiro de Sua Empresa")
+
+    st.markdown("---")
+
+    st.markdown("""
+    <div style="text-align:center; margin-top: 20px;">
+        <a href="mailto:support@sips.com" style="
+            background-color: #4CAF50;
+            color: white;
+            padding: 10px 25px;
+            border-radius: 8px;
+            text-decoration: none;
+            font-weight: bold;
+            font-size: 16px;">
+            📩 Contate o Suporte
+        </a>
+    </div>
+    """, unsafe_allow_html=True)
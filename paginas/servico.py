@@ -0,0 +1,20 @@
+# Cadastro de serviços.
+
+import streamlit as st
+
+import operacoes
+
+
+def mostrar(conn):
+    st.subheader("🔧 Novo Serviço")
+    with st.form("form_servico", clear_on_submit=True):
+        nome_serv = st.text_input("Nome do Serviço")
+        duracao = st.number_input("Duração (minutos)", min_value=5, max_value=300, step=5)
+        preco = st.number_input("Preço (R$)", min_value=0.0, format="%.2f")
+        salvar = st.form_submit_button("Salvar Serviço")
+        if salvar:
+            if nome_serv and duracao > 0 and preco >= 0:
+                operacoes.incluir_servico(conn, nome_serv, duracao, preco)
+                st.success(f"Serviço **{nome_serv}** cadastrado com sucesso!")
+            else:
+                st.warning("Preencha todos os campos corretamente.")
@@ -0,0 +1,249 @@
+# Um banco por prestador de serviço.
+#
+# Cada prestador tem o seu próprio arquivo SQLite (um "shard"): escritas de
+# um não disputam o bloqueio do banco de outro, e um arquivo corrompido ou
+# restaurado de backup afeta um prestador só. O catálogo (data/prestadores.db)
+# guarda o arquivo de cada prestador e os e-mails dos usuários que entram
+# como ele.
+#
+# Os arquivos novos vão para a pasta com menos prestadores entre as de
+# SIPS_PASTAS_PRESTADORES (separadas por os.pathsep), o que permite espalhar
+# os bancos por vários discos. Para usar vários servidores, cada um roda o app
+# com o seu próprio catálogo e um proxy na frente encaminha cada prestador
+# para o seu servidor.
+#
+# Sem catálogo o app continua com o banco único de sempre (PRESTADOR_PADRAO).
+#
+# Uso pela linha de comando:
+#     python -m prestadores provisionar salao-da-ana "Salão da Ana" --usuario ana@exemplo.com
+#     python -m prestadores provisionar antigo "Banco atual" --caminho data/banco.db
+#     python -m prestadores vincular joao@exemplo.com salao-da-ana
+#     python -m prestadores migrar
+#     python -m prestadores listar
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+from conexao import CAMINHO_BANCO, abrir_conexao
+from migracoes import aplicar_migracoes
+
+CAMINHO_CATALOGO = os.path.join("data", "prestadores.db")
+PASTA_PADRAO = os.path.join("data", "prestadores")
+PRESTADOR_PADRAO = "padrao"
+MAXIMO_CONEXOES = 64
+
+_IDENTIFICADOR = re.compile(r"^[a-z0-9][a-z0-9-]{0,62}$")
+
+
+# ---------------------------------------------------------------- catálogo
+
+def _catalogo():
+    conn = sqlite3.connect(CAMINHO_CATALOGO, timeout=5)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS prestadores (
+            id TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            caminho TEXT NOT NULL UNIQUE,
+            criado_em TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            email TEXT PRIMARY KEY COLLATE NOCASE,
+            prestador TEXT NOT NULL REFERENCES prestadores(id)
+        )
+    ''')
+    return conn
+
+
+def multiprestador():
+    return os.path.exists(CAMINHO_CATALOGO)
+
+
+def prestador_fixo():
+    # SIPS_PRESTADOR prende o processo a um prestador (um processo por
+    # prestador, ou testes locais sem login)
+    return os.environ.get("SIPS_PRESTADOR")
+
+
+@lru_cache(maxsize=1024)
+def caminho(prestador):
+    # Arquivo do banco do prestador; KeyError se ele não existir
+    if prestador == PRESTADOR_PADRAO and not multiprestador():
+        return CAMINHO_BANCO
+    with closing(_catalogo()) as conn:
+        linha = conn.execute("SELECT caminho FROM prestadores WHERE id = ?", (prestador,)).fetchone()
+    if linha is None:
+        raise KeyError(prestador)
+    return linha[0]
+
+
+def prestador_do_usuario(email):
+    with closing(_catalogo()) as conn:
+        linha = conn.execute("SELECT prestador FROM usuarios WHERE email = ?", (email,)).fetchone()
+    return linha[0] if linha else None
+
+
+def listar():
+    with closing(_catalogo()) as conn:
+        return conn.execute("SELECT id, nome, caminho, criado_em FROM prestadores ORDER BY id").fetchall()
+
+
+def caminhos_ativos():
+    # Bancos atendidos por este processo
+    if prestador_fixo():
+        return [caminho(prestador_fixo())]
+    if not multiprestador():
+        return [CAMINHO_BANCO]
+    return [linha[2] for linha in listar()]
+
+
+# ------------------------------------------------------------ provisionamento
+
+def _pastas():
+    pastas = os.environ.get("SIPS_PASTAS_PRESTADORES", PASTA_PADRAO)
+    return [p for p in pastas.split(os.pathsep) if p]
+
+
+def _escolher_pasta(conn):
+    # Pasta com menos prestadores
+    ocupacao = {pasta: 0 for pasta in _pastas()}
+    for (arquivo,) in conn.execute("SELECT caminho FROM prestadores"):
+        pasta = os.path.dirname(arquivo)
+        if pasta in ocupacao:
+            ocupacao[pasta] += 1
+    return min(ocupacao, key=ocupacao.get)
+
+
+def migrar(arquivo):
+    # Aplica as migrações pendentes num banco; devolve a versão final
+    with closing(abrir_conexao(arquivo)) as conn:
+        return aplicar_migracoes(conn)
+
+
+def provisionar(prestador, nome, usuarios=(), arquivo=None):
+    # Cria o banco do prestador (ou adota um existente em `arquivo`) e o
+    # registra no catálogo
+    if not _IDENTIFICADOR.match(prestador):
+        raise ValueError("Identificador inválido: use letras minúsculas, números e hífens.")
+    os.makedirs(os.path.dirname(CAMINHO_CATALOGO), exist_ok=True)
+    with closing(_catalogo()) as conn:
+        if conn.execute("SELECT 1 FROM prestadores WHERE id = ?", (prestador,)).fetchone():
+            raise ValueError(f"Prestador {prestador} já existe.")
+        if arquivo is None:
+            pasta = _escolher_pasta(conn)
+            os.makedirs(pasta, exist_ok=True)
+            arquivo = os.path.join(pasta, f"{prestador}.db")
+            if os.path.exists(arquivo):
+                raise ValueError(f"{arquivo} já existe.")
+        elif not os.path.exists(arquivo):
+            raise ValueError(f"{arquivo} não encontrado.")
+
+        migrar(arquivo)
+        with conn:
+            conn.execute(
+                "INSERT INTO prestadores (id, nome, caminho, criado_em) VALUES (?, ?, ?, ?)",
+                (prestador, nome, arquivo, datetime.now().isoformat(timespec="seconds"))
+            )
+            conn.executemany("INSERT OR REPLACE INTO usuarios (email, prestador) VALUES (?, ?)",
+                             [(email, prestador) for email in usuarios])
+    return arquivo
+
+
+def vincular(email, prestador):
+    caminho(prestador)
+    with closing(_catalogo()) as conn, conn:
+        conn.execute("INSERT OR REPLACE INTO usuarios (email, prestador) VALUES (?, ?)", (email, prestador))
+
+
+def migrar_todos():
+    # Migra cada banco separadamente; um banco com erro não impede os outros
+    resultado = {}
+    for prestador, _, arquivo, _ in listar():
+        try:
+            resultado[prestador] = migrar(arquivo)
+        except Exception as erro:
+            resultado[prestador] = erro
+    return resultado
+
+
+# ---------------------------------------------------------------- conexões
+
+class ConexoesLRU:
+    # Conexões abertas, no máximo `capacidade`, reaproveitadas entre as
+    # execuções do script. Uma conexão emprestada nunca é fechada; quando o
+    # limite é passado, fecham-se as menos usadas recentemente entre as livres.
+    def __init__(self, capacidade=MAXIMO_CONEXOES):
+        self.capacidade = capacidade
+        self._conexoes = OrderedDict()
+        self._em_uso = {}
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._conexoes)
+
+    def _despejar(self):
+        excesso = len(self._conexoes) - self.capacidade
+        for chave in [c for c in self._conexoes if not self._em_uso.get(c)][:max(excesso, 0)]:
+            self._conexoes.pop(chave).close()
+
+    @contextmanager
+    def emprestar(self, chave, abrir):
+        with self._trava:
+            conn = self._conexoes.pop(chave, None)
+            if conn is None:
+                conn = abrir()
+            self._conexoes[chave] = conn
+            self._em_uso[chave] = self._em_uso.get(chave, 0) + 1
+            self._despejar()
+        try:
+            yield conn
+        finally:
+            with self._trava:
+                self._em_uso[chave] -= 1
+                if not self._em_uso[chave]:
+                    del self._em_uso[chave]
+                self._despejar()
+
+    def fechar(self):
+        with self._trava:
+            while self._conexoes:
+                self._conexoes.popitem()[1].close()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m prestadores", description="Bancos dos prestadores")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    p = comandos.add_parser("provisionar", help="cria o banco de um prestador")
+    p.add_argument("prestador")
+    p.add_argument("nome")
+    p.add_argument("--usuario", action="append", default=[], help="e-mail de quem entra como o prestador")
+    p.add_argument("--caminho", help="adota um banco existente em vez de criar um novo")
+    p = comandos.add_parser("vincular", help="associa um e-mail a um prestador")
+    p.add_argument("email")
+    p.add_argument("prestador")
+    comandos.add_parser("migrar", help="aplica as migrações em todos os bancos")
+    comandos.add_parser("listar", help="lista os prestadores")
+    args = parser.parse_args()
+
+    if args.comando == "provisionar":
+        print(provisionar(args.prestador, args.nome, args.usuario, args.caminho))
+    elif args.comando == "vincular":
+        vincular(args.email, args.prestador)
+    elif args.comando == "migrar":
+        for prestador, resultado in migrar_todos().items():
+            print(f"{prestador}: {resultado if isinstance(resultado, Exception) else f'versão {resultado}'}")
+    else:
+        for prestador, nome, arquivo, criado_em in listar():
+            print(f"{prestador}\t{nome}\t{arquivo}\t{criado_em}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# Profiler opcional das telas.
+#
+# Ligado com a variável de ambiente SIPS_PROFILER=1 ou com ?perfil=1 na URL.
+# A conexão da sessão passa a ser uma ConexaoInstrumentada, que cronometra
+# cada execute (inclusive os feitos pelo pd.read_sql_query) e conta as linhas
+# lidas. Cada tela e cada gráfico são medidos com medir(), e ao final da
+# execução um painel na barra lateral mostra as consultas mais lentas com o
+# EXPLAIN QUERY PLAN. Com SIPS_PROFILER_LOG=arquivo.jsonl cada execução
+# também é gravada numa linha JSON para análise posterior.
+#
+# Execuções interrompidas por st.stop() ou st.rerun() não mostram o painel;
+# elas vão para o log no início da execução seguinte, marcadas como não
+# concluídas.
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+LIMITE_PAINEL = 10
+
+
+def ativo():
+    return os.environ.get("SIPS_PROFILER") == "1" or st.query_params.get("perfil") == "1"
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._consulta = None
+
+    def _registrar(self, sql, parametros, inicio):
+        registro = getattr(self.connection, "registro", None)
+        if registro is None:
+            self._consulta = None
+            return
+        self._consulta = {
+            "sql": " ".join(sql.split()),
+            "parametros": parametros,
+            "ms": (time.perf_counter() - inicio) * 1000,
+            "linhas": max(self.rowcount, 0),
+        }
+        registro["consultas"].append(self._consulta)
+
+    def _contar(self, inicio, linhas):
+        # Tempo e linhas dos fetch* somados à última consulta deste cursor
+        if self._consulta is not None:
+            self._consulta["ms"] += (time.perf_counter() - inicio) * 1000
+            self._consulta["linhas"] += linhas
+
+    def execute(self, sql, parametros=()):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            self._registrar(sql, parametros, inicio)
+
+    def executemany(self, sql, parametros):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, parametros)
+        finally:
+            self._registrar(sql, "executemany", inicio)
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        linha = super().fetchone()
+        self._contar(inicio, linha is not None)
+        return linha
+
+    def fetchmany(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        linhas = super().fetchmany(*args, **kwargs)
+        self._contar(inicio, len(linhas))
+        return linhas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        linhas = super().fetchall()
+        self._contar(inicio, len(linhas))
+        return linhas
+
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    # registro é o dicionário da execução atual (ver iniciar); None desliga
+    registro = None
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    # Connection.execute do sqlite3 não passa por cursor(), então os atalhos
+    # são refeitos aqui para que também sejam medidos
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+
+def classe_conexao():
+    return ConexaoInstrumentada if ativo() else sqlite3.Connection
+
+
+def _gravar_log(registro):
+    caminho = os.environ.get("SIPS_PROFILER_LOG")
+    if not caminho:
+        return
+    with open(caminho, "a", encoding="utf-8") as arquivo:
+        arquivo.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+
+
+def iniciar(conn, pagina):
+    # Começa o registro da execução atual do script
+    anterior = st.session_state.pop("perfil_registro", None)
+    if anterior and not anterior["concluida"]:
+        del anterior["_inicio"]
+        _gravar_log(anterior)
+    if not isinstance(conn, ConexaoInstrumentada):
+        return
+    registro = {
+        "momento": datetime.now().isoformat(timespec="seconds"),
+        "pagina": pagina,
+        "concluida": False,
+        "ms": None,
+        "etapas": [],
+        "consultas": [],
+        "_inicio": time.perf_counter(),
+    }
+    conn.registro = registro
+    st.session_state.perfil_registro = registro
+
+
+@contextmanager
+def medir(tipo, nome):
+    # Cronometra um trecho da tela (ex.: a montagem de um gráfico)
+    registro = st.session_state.get("perfil_registro")
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if registro is not None and not registro["concluida"]:
+            registro["etapas"].append({"tipo": tipo, "nome": nome, "ms": (time.perf_counter() - inicio) * 1000})
+
+
+def _plano(conn, sql, parametros):
+    # EXPLAIN QUERY PLAN pela classe base, para não entrar no próprio registro
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+        return ""
+    if not isinstance(parametros, (tuple, list, dict)):
+        return ""
+    try:
+        linhas = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parametros).fetchall()
+    except sqlite3.Error as erro:
+        return f"(sem plano: {erro})"
+    return "\n".join(f"{'  ' * nivel}{detalhe}" for nivel, detalhe in _niveis(linhas))
+
+
+def _niveis(linhas):
+    # Linhas do EXPLAIN QUERY PLAN são (id, pai, _, detalhe); indenta pela árvore
+    profundidade = {0: -1}
+    for id_no, pai, _, detalhe in linhas:
+        profundidade[id_no] = profundidade.get(pai, -1) + 1
+        yield profundidade[id_no], detalhe
+
+
+def _agrupar(consultas):
+    # Mesma SQL executada várias vezes vira uma linha só. O pandas é
+    # importado aqui para não pesar na inicialização com o profiler desligado.
+    import pandas as pd
+
+    if not consultas:
+        return pd.DataFrame(columns=["sql", "execucoes", "ms_total", "ms_max", "linhas"])
+    df = pd.DataFrame(consultas)
+    return df.groupby("sql", sort=False).agg(
+        execucoes=("ms", "size"), ms_total=("ms", "sum"), ms_max=("ms", "max"), linhas=("linhas", "sum")
+    ).reset_index().sort_values("ms_total", ascending=False)
+
+
+def finalizar(conn):
+    # Fecha o registro da execução, grava o log e mostra o painel
+    registro = st.session_state.get("perfil_registro")
+    if registro is None or registro["concluida"]:
+        return
+    registro["ms"] = (time.perf_counter() - registro.pop("_inicio")) * 1000
+    registro["concluida"] = True
+    conn.registro = None
+    _gravar_log(registro)
+
+    consultas = registro["consultas"]
+    ms_sql = sum(c["ms"] for c in consultas)
+    with st.sidebar.expander("🐞 Perfil da execução", expanded=True):
+        st.metric("Tela", f"{registro['ms']:,.0f} ms")
+        st.caption(f"SQL: {ms_sql:,.1f} ms em {len(consultas)} consulta(s) — "
+                   f"restante (pandas, gráficos, Streamlit): {registro['ms'] - ms_sql:,.1f} ms")
+        if registro["etapas"]:
+            st.dataframe([{**e, "ms": round(e["ms"], 1)} for e in registro["etapas"]], hide_index=True)
+
+        agrupadas = _agrupar(consultas).head(LIMITE_PAINEL)
+        st.markdown(f"**{len(agrupadas)} consultas mais lentas**")
+        parametros = {c["sql"]: c["parametros"] for c in consultas}
+        for linha in agrupadas.itertuples():
+            st.markdown(f"`{linha.ms_total:,.1f} ms` · {linha.execucoes}× · {linha.linhas:,} linha(s)")
+            st.code(linha.sql, language="sql")
+            plano = _plano(conn, linha.sql, parametros[linha.sql])
+            if plano:
+                st.code(plano, language="text")
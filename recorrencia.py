@@ -0,0 +1,119 @@
+# Agendamentos recorrentes (séries).
+#
+# Uma série guarda a regra num registro só: cliente, serviço, primeiro
+# horário, duração, frequência (semanal, quinzenal ou mensal) e, se houver,
+# a última data. As ocorrências não são gravadas em agendamentos: cada
+# consulta expande só as da janela pedida (calendário, verificação de
+# conflitos em agenda.py e contadores do dashboard), a partir do índice da
+# primeira ocorrência da janela, sem percorrer as anteriores.
+#
+# Viram linhas de verdade apenas as exceções: uma ocorrência remarcada ou
+# concluída ganha um agendamento próprio e uma cancelada não ganha nenhum.
+# As duas ficam em series_excecoes, que tira a ocorrência original da
+# expansão. As gravações estão em operacoes.py.
+#
+# Ocorrências de séries não recebem lembretes pelo WhatsApp: a caixa de
+# saída (mensageria.py) só trata agendamentos gravados.
+
+import calendar
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+FREQUENCIAS = {"semanal": "Semanal", "quinzenal": "Quinzenal", "mensal": "Mensal"}
+PASSOS = {"semanal": timedelta(weeks=1), "quinzenal": timedelta(weeks=2)}
+
+
+def momento(valor):
+    # date ou datetime como datetime (uma data vale a partir da meia-noite)
+    return valor if isinstance(valor, datetime) else datetime.combine(valor, time.min)
+
+
+def _mes_seguinte(inicio, n):
+    # n-ésima ocorrência mensal: mesmo dia do mês, ou o último dia nos meses
+    # mais curtos
+    total = inicio.month - 1 + n
+    ano, mes = inicio.year + total // 12, total % 12 + 1
+    return inicio.replace(year=ano, month=mes, day=min(inicio.day, calendar.monthrange(ano, mes)[1]))
+
+
+def ocorrencias(inicio, frequencia, ate, janela_inicio, janela_fim):
+    # Inícios das ocorrências em [janela_inicio, janela_fim), sem exceções.
+    # ate é a última data da série (inclusive) ou None.
+    limite = janela_fim if ate is None else min(janela_fim, datetime.combine(ate + timedelta(days=1), time.min))
+    if frequencia == "mensal":
+        n = max(0, (janela_inicio.year - inicio.year) * 12 + janela_inicio.month - inicio.month - 1)
+        n_esima = lambda n: _mes_seguinte(inicio, n)
+    else:
+        passo = PASSOS[frequencia]
+        n = max(0, (janela_inicio - inicio) // passo)
+        n_esima = lambda n: inicio + n * passo
+    while True:
+        atual = n_esima(n)
+        if atual >= limite:
+            return
+        if atual >= janela_inicio:
+            yield atual
+        n += 1
+
+
+def e_ocorrencia(serie, instante):
+    # Se instante é o início de uma ocorrência da regra da série
+    _, _, _, inicio, _, frequencia, ate = serie
+    return instante in ocorrencias(inicio, frequencia, ate, instante, instante + timedelta(microseconds=1))
+
+
+def _serie(linha):
+    id_serie, cliente_id, servico_id, inicio, duracao, frequencia, ate = linha
+    return (id_serie, cliente_id, servico_id, datetime.fromisoformat(inicio), timedelta(minutes=duracao),
+            frequencia, date.fromisoformat(ate) if ate else None)
+
+
+_CAMPOS = "id, cliente_id, servico_id, inicio, duracao, frequencia, ate"
+
+
+def obter_serie(conn, id_serie):
+    # (id, cliente_id, servico_id, inicio, duração, frequência, até), já convertidos
+    linha = conn.execute(f"SELECT {_CAMPOS} FROM series WHERE id = ?", (id_serie,)).fetchone()
+    return _serie(linha) if linha else None
+
+
+def expandir(conn, inicio, fim, sobrepondo=False):
+    # Ocorrências (serie_id, cliente_id, servico_id, início, fim) com início
+    # em [inicio, fim) ou, com sobrepondo, que ocupam algum momento do período
+    inicio, fim = momento(inicio), momento(fim)
+    series = [_serie(l) for l in conn.execute(f'''
+        SELECT {_CAMPOS} FROM series
+        WHERE inicio < ? AND (ate IS NULL OR ate >= ?)
+    ''', (fim.isoformat(), (inicio - timedelta(days=1)).date().isoformat()))]
+    if not series:
+        return []
+    maior_duracao = max(s[4] for s in series) if sobrepondo else timedelta(0)
+    excecoes = set(conn.execute(f'''
+        SELECT serie_id, ocorrencia FROM series_excecoes
+        WHERE serie_id IN ({','.join('?' * len(series))}) AND ocorrencia >= ? AND ocorrencia < ?
+    ''', [s[0] for s in series] + [(inicio - maior_duracao).isoformat(), fim.isoformat()]))
+    encontradas = []
+    for id_serie, cliente_id, servico_id, primeira, duracao, frequencia, ate in series:
+        desde = inicio - duracao if sobrepondo else inicio
+        for atual in ocorrencias(primeira, frequencia, ate, desde, fim):
+            if sobrepondo and atual + duracao <= inicio:
+                continue
+            if (id_serie, atual.isoformat()) not in excecoes:
+                encontradas.append((id_serie, cliente_id, servico_id, atual, atual + duracao))
+    return sorted(encontradas, key=lambda o: (o[3], o[0]))
+
+
+def primeiro_conflito(conn, inicio, fim):
+    # (início, fim) da primeira ocorrência que se sobrepõe a [inicio, fim), ou None
+    encontradas = expandir(conn, inicio, fim, sobrepondo=True)
+    return encontradas[0][3:] if encontradas else None
+
+
+def contagens(conn, inicio, fim):
+    # Ocorrências com início em [inicio, fim), contadas por dia e por serviço
+    por_dia = Counter()
+    por_servico = Counter()
+    for _, _, servico_id, atual, _ in expandir(conn, inicio, fim):
+        por_dia[atual.date().isoformat()] += 1
+        por_servico[servico_id] += 1
+    return por_dia, por_servico
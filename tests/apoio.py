@@ -0,0 +1,39 @@
+# Apoio dos testes: um banco novo, já migrado, numa pasta temporária.
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+# Fora do Streamlit, o st.cache_data de dados.py guarda o cache em memória e
+# avisa disso a cada função decorada (ver api.py)
+logging.getLogger("streamlit.runtime.caching.cache_data_api").addFilter(
+    lambda registro: registro.levelno >= logging.ERROR)
+
+import operacoes  # noqa: E402
+from conexao import abrir_conexao  # noqa: E402
+from migracoes import aplicar_migracoes  # noqa: E402
+
+
+class BancoTemporario(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(prefix="sips-teste-")
+        self.caminho = os.path.join(self.pasta, "banco.db")
+        self.conn = abrir_conexao(self.caminho)
+        aplicar_migracoes(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def cliente(self, nome="Ana Souza", telefone="(11) 91234-5678", cpf="123.456.789-09"):
+        return operacoes.incluir_cliente(self.conn, nome, telefone, cpf, "Rua A, 1", "ana@exemplo.com",
+                                         date(1990, 1, 1))
+
+    def servico(self, nome="Corte", duracao=30, preco=50.0):
+        return operacoes.incluir_servico(self.conn, nome, duracao, preco)
+
+    def contar(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchone()[0]
@@ -0,0 +1,76 @@
+# Conflitos de horário e próximos horários livres (agenda.py).
+#
+#   python -m unittest discover tests
+
+import unittest
+from datetime import datetime, timedelta
+
+from apoio import BancoTemporario  # antes de dados: filtra os avisos do cache
+import agenda
+
+
+def _h(dia, hora, minuto=0):
+    return datetime(2030, 1, dia, hora, minuto)
+
+
+class Agenda(BancoTemporario):
+    def setUp(self):
+        super().setUp()
+        self.id_cliente = self.cliente()
+        self.id_servico = self.servico()
+
+    def agendar(self, inicio, minutos=30):
+        return agenda.agendar(self.conn, self.id_cliente, self.id_servico, inicio, minutos)
+
+    def test_horarios_encostados_nao_conflitam(self):
+        self.agendar(_h(7, 10))
+        self.agendar(_h(7, 10, 30))
+        self.agendar(_h(7, 9, 30))
+        self.assertEqual(agenda.conflitos(self.conn, _h(7, 11), _h(7, 11, 30)), [])
+        self.assertEqual(self.contar("SELECT COUNT(*) FROM agendamentos"), 3)
+
+    def test_sobreposicoes(self):
+        id_agendamento = self.agendar(_h(7, 10))
+        for inicio, fim in [(_h(7, 10, 15), _h(7, 10, 45)), (_h(7, 9, 45), _h(7, 10, 15)),
+                            (_h(7, 10, 5), _h(7, 10, 10)), (_h(7, 9), _h(7, 12))]:
+            self.assertEqual(agenda.conflitos(self.conn, inicio, fim), [(_h(7, 10), _h(7, 10, 30), id_agendamento)])
+            self.assertEqual(agenda.primeiro_ocupado(self.conn, inicio, fim), (_h(7, 10), _h(7, 10, 30)))
+        with self.assertRaises(ValueError):
+            self.agendar(_h(7, 10, 15))
+
+    def test_agendamento_que_passa_da_meia_noite(self):
+        id_agendamento = self.agendar(_h(7, 23), minutos=120)
+        self.assertEqual(agenda.conflitos(self.conn, _h(8, 0, 30), _h(8, 0, 45)),
+                         [(_h(7, 23), _h(8, 1), id_agendamento)])
+        with self.assertRaises(ValueError):
+            self.agendar(_h(8, 0, 30))
+        self.agendar(_h(8, 1))
+        self.assertEqual(agenda.conflitos(self.conn, _h(7, 22), _h(8, 2)),
+                         [(_h(7, 23), _h(8, 1), id_agendamento), (_h(8, 1), _h(8, 1, 30), id_agendamento + 1)])
+
+    def test_duracao_invalida(self):
+        for minutos in (0, -30, 24 * 60 + 1):
+            with self.assertRaises(ValueError):
+                self.agendar(_h(7, 10), minutos=minutos)
+
+    def test_proximos_horarios_pula_os_ocupados(self):
+        self.agendar(_h(7, 8), minutos=60)
+        self.agendar(_h(7, 9, 30))
+        self.assertEqual(agenda.proximos_horarios(self.conn, _h(7, 7), 30, quantidade=3),
+                         [_h(7, 9), _h(7, 10), _h(7, 10, 15)])
+
+    def test_proximos_horarios_arredonda_e_respeita_o_expediente(self):
+        self.assertEqual(agenda.proximos_horarios(self.conn, _h(7, 8, 7), 30, quantidade=1), [_h(7, 8, 15)])
+        fechamento = agenda.EXPEDIENTE[1]
+        perto_do_fechamento = datetime.combine(_h(7, 0).date(), fechamento) - timedelta(minutes=20)
+        self.assertEqual(agenda.proximos_horarios(self.conn, perto_do_fechamento, 30, quantidade=1),
+                         [datetime.combine(_h(8, 0).date(), agenda.EXPEDIENTE[0])])
+
+    def test_proximos_horarios_apos_agendamento_da_noite_anterior(self):
+        # Um agendamento que termina às 9h do dia seguinte bloqueia o começo do expediente
+        self.agendar(_h(7, 20), minutos=13 * 60)
+        self.assertEqual(agenda.proximos_horarios(self.conn, _h(8, 0), 30, quantidade=1), [_h(8, 9)])
+
+
+if __name__ == "__main__":
+    unittest.main()
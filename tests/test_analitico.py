@@ -0,0 +1,119 @@
+# Cópia analítica do banco: criação, atualização e espera após falhas
+# (analitico.py).
+#
+#   python -m unittest discover tests
+
+import os
+import threading
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from apoio import BancoTemporario  # antes de dados: filtra os avisos do cache
+import analitico
+import operacoes
+from conexao import caminho_banco
+
+
+def _esperar_atualizacoes():
+    for thread in threading.enumerate():
+        if thread.name == "sips-copia-analitica":
+            thread.join(5)
+
+
+class CopiaAnalitica(BancoTemporario):
+    def setUp(self):
+        super().setUp()
+        self.banco = caminho_banco(self.conn)
+        self.addCleanup(analitico._falhas.pop, self.banco, None)
+
+    def lancar(self, quantidade=1):
+        for _ in range(quantidade):
+            operacoes.lancar(self.conn, date(2030, 1, 7), "Venda", "Entrada", 10.0, "Produto")
+
+    def ler(self):
+        with analitico.leitura(self.conn) as (copia, criada_em):
+            return copia.execute("SELECT COUNT(*) FROM financeiro").fetchone()[0], criada_em
+
+    def test_primeira_leitura_cria_a_copia(self):
+        self.lancar()
+        self.assertFalse(os.path.exists(analitico.caminho_copia(self.banco)))
+        self.assertEqual(self.ler()[0], 1)
+        # A cópia não acompanha o banco até ser refeita
+        self.lancar()
+        self.assertEqual(self.ler()[0], 1)
+        analitico.atualizar(self.banco)
+        self.assertEqual(self.ler()[0], 2)
+
+    def test_copia_somente_leitura(self):
+        self.ler()
+        with analitico.leitura(self.conn) as (copia, _):
+            with self.assertRaises(Exception):
+                copia.execute("DELETE FROM financeiro")
+
+    def test_atualiza_em_segundo_plano_apos_muitas_escritas(self):
+        self.ler()
+        with mock.patch.object(analitico, "_atualizar_em_segundo_plano") as atualizar:
+            self.lancar(analitico.ESCRITAS_MAXIMAS - 1)
+            self.ler()
+            atualizar.assert_not_called()
+            self.lancar()
+            self.ler()
+            atualizar.assert_called_once_with(self.banco)
+
+        analitico._atualizar_em_segundo_plano(self.banco)
+        _esperar_atualizacoes()
+        self.assertEqual(self.ler()[0], analitico.ESCRITAS_MAXIMAS)
+
+    def test_atualiza_copia_velha(self):
+        _, criada_em = self.ler()
+        depois = criada_em + analitico.IDADE_MAXIMA + timedelta(seconds=1)
+        with mock.patch.object(analitico, "datetime", wraps=datetime) as relogio, \
+                mock.patch.object(analitico, "_atualizar_em_segundo_plano") as atualizar:
+            relogio.now.return_value = depois
+            relogio.fromisoformat.side_effect = datetime.fromisoformat
+            self.ler()
+            atualizar.assert_called_once_with(self.banco)
+
+    def test_espera_crescente_apos_falhas(self):
+        with mock.patch.object(analitico, "atualizar", side_effect=OSError("disco cheio")) as atualizar, \
+                self.assertLogs("analitico", "ERROR"):
+            def tentar(ha):
+                # Tenta como se a última falha tivesse sido `ha` atrás
+                if self.banco in analitico._falhas:
+                    seguidas = analitico._falhas[self.banco][1]
+                    analitico._falhas[self.banco] = (datetime.now() - ha, seguidas)
+                analitico._atualizar_em_segundo_plano(self.banco)
+                _esperar_atualizacoes()
+                return atualizar.call_count
+
+            espera = analitico.ESPERA_APOS_FALHA
+            self.assertEqual(tentar(timedelta(0)), 1)
+            self.assertEqual(tentar(espera - timedelta(seconds=1)), 1)
+            self.assertEqual(tentar(espera + timedelta(seconds=1)), 2)
+            self.assertEqual(tentar(espera * 2 - timedelta(seconds=1)), 2)
+            self.assertEqual(tentar(espera * 2 + timedelta(seconds=1)), 3)
+            self.assertEqual(analitico._falhas[self.banco][1], 3)
+
+            # A espera para de crescer em ESPERA_MAXIMA
+            analitico._falhas[self.banco] = (datetime.now(), 20)
+            self.assertEqual(tentar(analitico.ESPERA_MAXIMA + timedelta(seconds=1)), 4)
+
+            # Um sucesso zera a contagem
+            atualizar.side_effect = None
+            self.assertEqual(tentar(analitico.ESPERA_MAXIMA + timedelta(seconds=1)), 5)
+        self.assertNotIn(self.banco, analitico._falhas)
+
+    def test_nao_repete_atualizacao_em_andamento(self):
+        with mock.patch.object(analitico, "atualizar") as atualizar:
+            with analitico._trava(self.banco):
+                analitico._atualizar_em_segundo_plano(self.banco)
+                _esperar_atualizacoes()
+            atualizar.assert_not_called()
+        with analitico._trava(self.banco):
+            self.assertFalse(analitico.atualizar(self.banco, esperar=False))
+        self.assertFalse(os.path.exists(analitico.caminho_copia(self.banco)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+# Rotas da API HTTP (api.py), pelo TestClient do FastAPI. Cada teste roda
+# numa pasta vazia, com o banco único (data/banco.db) criado pela própria API.
+#
+#   python -m unittest discover tests
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+import apoio  # noqa: F401  antes de dados: filtra os avisos do cache
+import api
+import prestadores
+
+TOKEN = "segredo"
+CLIENTE = {"nome": "Ana Souza", "telefone": "(11) 91234-5678", "cpf": "123.456.789-09",
+           "endereco": "Rua A, 1", "email": "ana@exemplo.com", "nascimento": "1990-03-15"}
+
+
+class Api(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(prefix="sips-teste-")
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.pasta)
+        ambiente = mock.patch.dict(os.environ, {"SIPS_API_TOKEN": TOKEN})
+        ambiente.start()
+        self.addCleanup(ambiente.stop)
+        for variavel in ("SIPS_ENVIADOR", "SIPS_PRESTADOR"):
+            os.environ.pop(variavel, None)
+        # Os caminhos são relativos à pasta de trabalho, que muda a cada teste
+        for cache in (api._preparar, prestadores.caminho):
+            cache.cache_clear()
+            self.addCleanup(cache.cache_clear)
+
+        self.cliente = TestClient(api.app, headers={"Authorization": f"Bearer {TOKEN}"})
+        self.cliente.__enter__()
+        self.addCleanup(self.cliente.__exit__, None, None, None)
+
+    def post(self, rota, json, status=201):
+        resposta = self.cliente.post(f"/padrao{rota}", json=json)
+        self.assertEqual(resposta.status_code, status, resposta.text)
+        return resposta.json() if resposta.content else None
+
+    def get(self, rota, status=200, **params):
+        resposta = self.cliente.get(f"/padrao{rota}", params=params)
+        self.assertEqual(resposta.status_code, status, resposta.text)
+        return resposta.json()
+
+    def preparar(self):
+        id_cliente = self.post("/clientes", CLIENTE)["id"]
+        id_servico = self.post("/servicos", {"nome": "Corte", "duracao": 30, "preco": 50.0})["id"]
+        return id_cliente, id_servico
+
+    def test_token(self):
+        for autorizacao in ("", "Bearer errado", TOKEN):
+            resposta = self.cliente.get("/padrao/servicos", headers={"Authorization": autorizacao})
+            self.assertEqual(resposta.status_code, 401)
+        self.assertEqual(self.get("/servicos"), [])
+
+    def test_banco_criado_na_primeira_requisicao(self):
+        self.assertFalse(os.path.exists(os.path.join("data", "banco.db")))
+        self.get("/clientes")
+        self.assertTrue(os.path.exists(os.path.join("data", "banco.db")))
+
+    def test_clientes(self):
+        id_cliente, _ = self.preparar()
+        self.assertEqual(self.get(f"/clientes/{id_cliente}")["nome"], "Ana Souza")
+        self.assertEqual([c["id"] for c in self.get("/clientes", busca="ana")["itens"]], [id_cliente])
+        self.assertEqual(self.get("/clientes/999", status=404), {"detail": "Cliente 999 não encontrado."})
+        self.post("/clientes", CLIENTE | {"nascimento": "ontem"}, status=422)
+
+        ids = self.post("/clientes/lote", [CLIENTE | {"nome": f"Cliente {i}"} for i in range(3)])["ids"]
+        pagina = self.get("/clientes", tamanho=2)
+        self.assertEqual([c["id"] for c in pagina["itens"]], [id_cliente, ids[0]])
+        pagina = self.get("/clientes", tamanho=2, apos=pagina["proxima"])
+        self.assertEqual(([c["id"] for c in pagina["itens"]], pagina["proxima"]), (ids[1:], None))
+
+    def test_agendamento_conflito_e_finalizacao(self):
+        id_cliente, id_servico = self.preparar()
+        agendamento = {"cliente_id": id_cliente, "servico_id": id_servico, "inicio": "2030-01-07T10:00:00"}
+        id_agendamento = self.post("/agendamentos", agendamento)["id"]
+
+        erro = self.post("/agendamentos", agendamento | {"inicio": "2030-01-07T10:15:00"}, status=422)
+        self.assertTrue(erro["detail"].startswith("Horário indisponível"))
+
+        resultados = self.post("/agendamentos/lote", [
+            agendamento | {"inicio": "2030-01-07T10:30:00"},
+            agendamento | {"inicio": "2030-01-07T10:45:00"},
+        ], status=200)["resultados"]
+        self.assertEqual(list(resultados[0]), ["id"])
+        self.assertEqual(list(resultados[1]), ["erro"])
+
+        self.post(f"/agendamentos/{id_agendamento}/finalizar", {"valor": 10.0}, status=204)
+        self.assertEqual(self.get(f"/agendamentos/{id_agendamento}")["status"], "Concluído")
+        self.post(f"/agendamentos/{id_agendamento}/finalizar", {}, status=422)
+        self.post("/agendamentos/999/finalizar", {}, status=404)
+
+        # Dois agendamentos a 50,00 e o acréscimo da finalização
+        valores = sorted(item["valor"] for item in self.get("/financeiro")["itens"])
+        self.assertEqual(valores, [10.0, 50.0, 50.0])
+
+    def test_financeiro_paginado(self):
+        ids = self.post("/financeiro/lote", [
+            {"data": f"2030-01-{dia:02d}", "descricao": f"Venda {dia}", "tipo": "Entrada", "valor": 10.0,
+             "categoria": "Produto"} for dia in range(1, 6)])["ids"]
+        vistos = []
+        pagina = self.get("/financeiro", tamanho=2)
+        while True:
+            vistos += [item["id"] for item in pagina["itens"]]
+            if pagina["proxima"] is None:
+                break
+            pagina = self.get("/financeiro", tamanho=2, apos=pagina["proxima"])
+        self.assertEqual(vistos, ids[::-1])
+        self.get("/financeiro", status=422, apos="sem-separador")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# Busca de clientes pelo índice de texto completo (clientes_fts).
+#
+#   python -m unittest discover tests
+
+import unittest
+from datetime import date
+
+from apoio import BancoTemporario  # antes de dados: filtra os avisos do cache
+import dados
+import operacoes
+from migracoes import aplicar_migracoes
+
+
+class BuscaClientes(BancoTemporario):
+    def setUp(self):
+        super().setUp()
+        self.ana = self.cliente("Ana Souza", "(11) 91234-5678", "123.456.789-09")
+        self.joao = self.cliente("João Conceição", "(21) 3456-7890", "987.654.321-00")
+
+    def encontrados(self, termo):
+        return [linha[0] for linha in dados.buscar_clientes(self.conn, termo)]
+
+    def test_telefone_local_sem_ddd(self):
+        for termo in ("91234", "91234-5678", "912345678"):
+            self.assertEqual(self.encontrados(termo), [self.ana], termo)
+        self.assertEqual(self.encontrados("3456-78"), [self.joao])
+
+    def test_telefone_com_ddd(self):
+        for termo in ("(11) 91234-5678", "(11) 912", "11 9123", "119"):
+            self.assertEqual(self.encontrados(termo), [self.ana], termo)
+
+    def test_cpf(self):
+        self.assertEqual(self.encontrados("123.456"), [self.ana])
+        self.assertEqual(self.encontrados("98765432100"), [self.joao])
+
+    def test_nome_sem_acento_e_por_prefixo(self):
+        for termo in ("joao", "JOÃO", "concei", "joa conc", "Conceicao"):
+            self.assertEqual(self.encontrados(termo), [self.joao], termo)
+        self.assertEqual(self.encontrados("sou"), [self.ana])
+        self.assertEqual(self.encontrados("ana xyz"), [])
+
+    def test_alteracao_e_exclusao_atualizam_o_indice(self):
+        operacoes.alterar_cliente(self.conn, self.ana, "Ana Souza", "(11) 98888-7777", "123.456.789-09",
+                                  "Rua A, 1", "ana@exemplo.com", date(1990, 1, 1))
+        self.assertEqual(self.encontrados("91234"), [])
+        self.assertEqual(self.encontrados("98888"), [self.ana])
+        operacoes.excluir_cliente(self.conn, self.joao)
+        self.assertEqual(self.encontrados("joao"), [])
+
+    def test_migracao_reindexa_telefones_sem_ddd(self):
+        # Índice como antes da migração 14: o telefone só com os dígitos
+        self.conn.execute("DELETE FROM clientes_fts")
+        self.conn.execute("INSERT INTO clientes_fts (rowid, nome, telefone) VALUES (?, 'Ana Souza', '11912345678')",
+                          (self.ana,))
+        self.conn.execute("DELETE FROM schema_versao WHERE versao = 14")
+        self.conn.commit()
+        aplicar_migracoes(self.conn)
+        self.assertEqual(self.encontrados("91234"), [self.ana])
+        self.assertEqual(self.encontrados("joao"), [self.joao])
+
+
+if __name__ == "__main__":
+    unittest.main()
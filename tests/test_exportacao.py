@@ -0,0 +1,79 @@
+# Exportação do livro-caixa pelo botão de download do Financeiro.
+#
+#   python -m unittest discover tests
+
+import csv
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+import pyarrow.parquet as pq
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+import apoio  # noqa: F401  antes de dados: filtra os avisos do cache
+import arquivamento
+import exportacao
+import operacoes
+from conexao import abrir_conexao
+from migracoes import aplicar_migracoes
+
+
+class Exportacao(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(prefix="sips-teste-")
+        self.caminho = os.path.join(self.pasta, "banco.db")
+        conn = abrir_conexao(self.caminho)
+        aplicar_migracoes(conn)
+        # Um mês arquivado e um quente
+        for dia in range(1, 4):
+            operacoes.lancar(conn, date(2023, 1, dia), "antigo", "Entrada", 10.0, "Corte")
+            operacoes.lancar(conn, date(2024, 6, dia), "recente", "Saída", 5.0, "Corte")
+        arquivamento.arquivar(conn, meses_quentes=12, hoje=date(2024, 7, 15))
+        conn.close()
+        self.filtros = (None, None, None, None, None)
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def baixar(self, formato):
+        # O st.download_button converte o que a função devolve com esta
+        # função, e recusa tipos que não sabe ler
+        conteudo, _ = convert_data_to_bytes_and_infer_mime(
+            exportacao.exportar(formato, self.filtros, self.caminho), RuntimeError("tipo não suportado")
+        )
+        return conteudo
+
+    def test_csv(self):
+        linhas = list(csv.DictReader(io.StringIO(self.baixar("csv").decode("utf-8"))))
+        self.assertEqual([linha["descricao"] for linha in linhas], ["antigo"] * 3 + ["recente"] * 3)
+
+    def test_parquet(self):
+        tabela = pq.read_table(io.BytesIO(self.baixar("parquet")))
+        self.assertEqual(tabela.num_rows, 6)
+        self.assertEqual(tabela.schema, exportacao.ESQUEMA_PARQUET)
+
+    def test_filtros_valem_para_os_meses_arquivados(self):
+        self.filtros = (None, None, "Entrada", None, None)
+        linhas = list(csv.DictReader(io.StringIO(self.baixar("csv").decode("utf-8"))))
+        self.assertEqual([linha["descricao"] for linha in linhas], ["antigo"] * 3)
+        self.filtros = (date(2023, 1, 2), date(2024, 6, 2), None, None, None)
+        tabela = pq.read_table(io.BytesIO(self.baixar("parquet")))
+        self.assertEqual(tabela.column("data").to_pylist(), ["2023-01-02", "2023-01-03", "2024-06-01", "2024-06-02"])
+
+    def test_lancamento_novo_num_mes_arquivado(self):
+        # Entra na ordem de data do mês, junto com as linhas do arquivo
+        conn = abrir_conexao(self.caminho)
+        operacoes.lancar(conn, date(2023, 1, 2), "atrasado", "Entrada", 10.0, "Corte")
+        blocos = list(exportacao.blocos_financeiro(conn, tamanho=2))
+        conn.close()
+        self.assertTrue(all(len(bloco) <= 2 for bloco in blocos))
+        descricoes = [linha[2] for bloco in blocos for linha in bloco]
+        self.assertEqual(descricoes[:4], ["antigo", "antigo", "atrasado", "antigo"])
+        self.assertEqual(len(descricoes), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
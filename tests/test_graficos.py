@@ -0,0 +1,63 @@
+# Figuras em cache (graficos.py): reaproveitadas enquanto a versão das
+# tabelas de origem não muda e montadas de novo depois de uma gravação.
+#
+#   python -m unittest discover tests
+
+import unittest
+from datetime import date, datetime, timedelta
+
+from apoio import BancoTemporario  # antes de dados: filtra os avisos do cache
+import graficos
+import operacoes
+
+JANEIRO = (date(2030, 1, 1), date(2030, 1, 31))
+
+
+class Graficos(BancoTemporario):
+    def lancar(self, valor=10.0, tipo="Entrada"):
+        operacoes.lancar(self.conn, date(2030, 1, 7), "Venda", tipo, valor, "Produto")
+
+    def test_figuras_do_financeiro(self):
+        self.lancar()
+        categorias = graficos.categorias_financeiro(self.conn)
+        saldo = graficos.saldo(self.conn, *JANEIRO)
+        self.assertIs(graficos.categorias_financeiro(self.conn), categorias)
+        self.assertIs(graficos.saldo(self.conn, *JANEIRO), saldo)
+        # Outro filtro é outra figura
+        self.assertIsNot(graficos.categorias_financeiro(self.conn, tipo="Entrada"), categorias)
+
+        self.lancar(5.0, "Saída")
+        novo_saldo = graficos.saldo(self.conn, *JANEIRO)
+        self.assertIsNot(novo_saldo, saldo)
+        self.assertEqual(list(novo_saldo.data[0].y), [5.0])
+        self.assertIsNot(graficos.categorias_financeiro(self.conn), categorias)
+
+    def test_figuras_do_dashboard(self):
+        self.lancar()
+        distribuicao = graficos.distribuicao_financeira(self.conn)
+        self.assertIs(graficos.distribuicao_financeira(self.conn), distribuicao)
+
+        id_cliente, id_servico = self.cliente(), self.servico()
+        por_dia = graficos.agendamentos_por_dia(self.conn)
+        servicos = graficos.servicos_mais_agendados(self.conn)
+        self.assertIs(graficos.agendamentos_por_dia(self.conn), por_dia)
+        self.assertIs(graficos.servicos_mais_agendados(self.conn), servicos)
+
+        amanha = datetime.combine(date.today() + timedelta(days=1), datetime.min.time()).replace(hour=10)
+        operacoes.agendar_servico(self.conn, id_cliente, id_servico, amanha)
+        self.assertIsNot(graficos.agendamentos_por_dia(self.conn), por_dia)
+        self.assertIsNot(graficos.servicos_mais_agendados(self.conn), servicos)
+        # O agendamento lança o preço do serviço no financeiro
+        self.assertIsNot(graficos.distribuicao_financeira(self.conn), distribuicao)
+
+    def test_bancos_diferentes_nao_compartilham_figuras(self):
+        self.lancar()
+        outro = BancoTemporario("run")
+        outro.setUp()
+        self.addCleanup(outro.tearDown)
+        operacoes.lancar(outro.conn, date(2030, 1, 7), "Venda", "Entrada", 10.0, "Produto")
+        self.assertIsNot(graficos.saldo(outro.conn, *JANEIRO), graficos.saldo(self.conn, *JANEIRO))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# Importação em lote: validadores de CPF, telefone, data e valor, e o
+# relatório de linhas rejeitadas (importacao.py).
+#
+#   python -m unittest discover tests
+
+import io
+import unittest
+
+import pandas as pd
+
+from apoio import BancoTemporario  # antes de dados: filtra os avisos do cache
+import importacao
+
+
+def _serie(*valores):
+    return pd.Series(valores, dtype=str)
+
+
+class Validadores(unittest.TestCase):
+    def test_cpf(self):
+        validos = importacao.cpf_valido(_serie(
+            "123.456.789-09", "52998224725", "123.456.789-00", "111.111.111-11", "000.000.000-00",
+            "1234567890", "123456789012", "", "abc.def.ghi-jk"))
+        self.assertEqual(validos.tolist(), [True, True, False, False, False, False, False, False, False])
+
+    def test_cpf_sem_nenhum_no_formato(self):
+        self.assertEqual(importacao.cpf_valido(_serie("", "123")).tolist(), [False, False])
+
+    def test_telefone(self):
+        validos = importacao.telefone_valido(_serie(
+            "(11) 91234-5678", "11 3333-4444", "+55 (11) 91234-5678", "1133334444555",
+            "91234-5678", "", "(11) 91234-56789"))
+        self.assertEqual(validos.tolist(), [True, True, True, False, False, False, False])
+
+    def test_data(self):
+        datas = importacao.converter_data(_serie(
+            "2024-02-29", "29/02/2024", "2024-06-15 10:30", "2023-02-29", "31/04/2024", "15-06-2024", ""))
+        self.assertEqual(datas.dt.strftime("%Y-%m-%d").tolist()[:3], ["2024-02-29", "2024-02-29", "2024-06-15"])
+        self.assertTrue(datas[3:].isna().all())
+
+    def test_valor(self):
+        valores = importacao.converter_valor(_serie("1234.56", "1.234,56", "R$ 1.234,56", "10", "dez", ""))
+        self.assertEqual(valores[:4].tolist(), [1234.56, 1234.56, 1234.56, 10.0])
+        self.assertTrue(valores[4:].isna().all())
+
+
+class Importar(BancoTemporario):
+    def importar(self, tabela, texto, nome="arquivo.csv"):
+        return importacao.importar(self.conn, tabela, io.BytesIO(texto.encode("utf-8")), nome)
+
+    def test_clientes_com_relatorio_de_erros(self):
+        resumo = self.importar("clientes", "\n".join([
+            "Nome;Telefone;CPF;Endereço;Email;Nascimento",
+            "Ana Souza;(11) 91234-5678;123.456.789-09;Rua A, 1;ana@exemplo.com;15/03/1990",
+            "Bruno Lima;1234;123.456.789-00;Rua B, 2;bruno@exemplo.com;1985-07-01",
+            "Carla Dias;(21) 99876-5432;529.982.247-25;Rua C, 3;carla@exemplo.com;01/01/2999",
+            ";(21) 99876-5432;529.982.247-25;Rua D, 4;sem@nome.com;1990-01-01",
+        ]))
+        self.assertEqual((resumo["lidas"], resumo["inseridas"], resumo["rejeitadas"]), (4, 1, 3))
+        erros = dict(zip(resumo["erros"]["linha"], resumo["erros"]["erro"]))
+        self.assertEqual(erros, {
+            3: "CPF inválido; telefone inválido",
+            4: "data de nascimento inválida",
+            5: "campo obrigatório vazio",
+        })
+        self.assertEqual(self.conn.execute("SELECT nome, nascimento, observacoes FROM clientes").fetchall(),
+                         [("Ana Souza", "1990-03-15", None)])
+        # Os clientes importados entram na busca
+        self.assertEqual(self.contar("SELECT COUNT(*) FROM clientes_fts WHERE clientes_fts MATCH '912345678*'"), 1)
+
+    def test_financeiro_atualiza_os_resumos(self):
+        resumo = self.importar("financeiro", "\n".join([
+            "data,descricao,tipo,valor,categoria",
+            "2024-06-01,Corte,entrada,\"R$ 1.234,56\",Corte",
+            "02/06/2024,Aluguel,saida,500,Aluguel",
+            "2024-06-03,Estorno,Entrada,-10,Corte",
+            "2024-06-04,Outro,Transferência,10,Corte",
+        ]))
+        self.assertEqual((resumo["inseridas"], resumo["rejeitadas"]), (2, 2))
+        self.assertEqual(resumo["erros"]["erro"].tolist(), ["valor inválido", "tipo deve ser Entrada ou Saída"])
+        self.assertEqual(self.conn.execute("SELECT tipo, pagamento FROM financeiro ORDER BY data").fetchall(),
+                         [("Entrada", "Não informado"), ("Saída", "Não informado")])
+        self.assertEqual(self.conn.execute("SELECT dia, saldo FROM saldo_diario ORDER BY dia").fetchall(),
+                         [("2024-06-01", 1234.56), ("2024-06-02", 734.56)])
+
+    def test_colunas_ausentes(self):
+        with self.assertRaises(ValueError):
+            self.importar("servicos", "nome,preco\nCorte,50")
+        self.assertEqual(self.contar("SELECT COUNT(*) FROM servicos"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# Caixa de saída de mensagens: reserva de lotes, novas tentativas e espera
+# crescente (mensageria.py).
+#
+#   python -m unittest discover tests
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import mock
+
+from apoio import BancoTemporario  # antes de dados: filtra os avisos do cache
+import agenda
+import mensageria
+
+AGORA = datetime(2030, 1, 7, 9, 0)
+
+
+class EnviadorComFalhas(mensageria.EnviadorLocal):
+    # Falha nas primeiras `falhas` chamadas
+    def __init__(self, falhas):
+        super().__init__()
+        self.falhas = falhas
+
+    def enviar(self, telefone, texto):
+        if self.falhas:
+            self.falhas -= 1
+            raise ConnectionError("sem conexão")
+        super().enviar(telefone, texto)
+
+
+class Mensageria(BancoTemporario):
+    def setUp(self):
+        super().setUp()
+        self.agora = AGORA
+        relogio = mock.patch.object(mensageria, "_agora", lambda: self.agora)
+        relogio.start()
+        self.addCleanup(relogio.stop)
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.executor.shutdown)
+        self.id_cliente = self.cliente()
+        self.id_servico = self.servico()
+
+    def agendar(self, inicio=datetime(2030, 1, 10, 10, 0)):
+        return agenda.agendar(self.conn, self.id_cliente, self.id_servico, inicio, 30)
+
+    def linha(self, agendamento_id):
+        return self.conn.execute(
+            "SELECT status, tentativas, enviar_em, erro FROM mensagens WHERE agendamento_id = ?",
+            (agendamento_id,)).fetchone()
+
+    def test_confirmacao_enviada(self):
+        id_agendamento = self.agendar()
+        enviador = mensageria.EnviadorLocal()
+        self.assertEqual(mensageria.despachar_lote(self.conn, enviador, self.executor, self.agora), (1, 0))
+        self.assertEqual(self.linha(id_agendamento)[:2], ("enviada", 1))
+        self.assertEqual([m["telefone"] for m in enviador.enviadas], ["5511912345678"])
+        self.assertEqual(mensageria.despachar_lote(self.conn, enviador, self.executor, self.agora), (0, 0))
+
+    def test_espera_crescente_ate_desistir(self):
+        id_agendamento = self.agendar()
+        enviador = EnviadorComFalhas(falhas=mensageria.MAX_TENTATIVAS)
+        for tentativa in range(1, mensageria.MAX_TENTATIVAS + 1):
+            self.assertEqual(mensageria.despachar_lote(self.conn, enviador, self.executor, self.agora), (0, 1))
+            status, tentativas, enviar_em, erro = self.linha(id_agendamento)
+            self.assertEqual((tentativas, erro), (tentativa, "sem conexão"))
+            espera = timedelta(minutes=2 ** (tentativa - 1))
+            self.assertEqual(datetime.fromisoformat(enviar_em), self.agora + espera)
+            if tentativa < mensageria.MAX_TENTATIVAS:
+                self.assertEqual(status, "pendente")
+                # Antes de vencer a espera a mensagem não é reservada de novo
+                self.agora += espera - timedelta(seconds=1)
+                self.assertEqual(mensageria.reservar_lote(self.conn, self.agora), [])
+                self.agora += timedelta(seconds=1)
+        self.assertEqual(status, "erro")
+        self.assertEqual(mensageria.reservar_lote(self.conn, self.agora + timedelta(days=1)), [])
+        self.assertEqual(enviador.enviadas, [])
+
+    def test_nova_tentativa_com_sucesso(self):
+        id_agendamento = self.agendar()
+        enviador = EnviadorComFalhas(falhas=1)
+        self.assertEqual(mensageria.despachar_lote(self.conn, enviador, self.executor, self.agora), (0, 1))
+        self.agora += timedelta(minutes=1)
+        self.assertEqual(mensageria.despachar_lote(self.conn, enviador, self.executor, self.agora), (1, 0))
+        status, tentativas, _, erro = self.linha(id_agendamento)
+        self.assertEqual((status, tentativas, erro), ("enviada", 2, None))
+
+    def test_lotes_nao_repetem_mensagens(self):
+        ids = {self.agendar(datetime(2030, 1, 10, hora, 0)) for hora in (10, 11, 12)}
+        primeiro = mensageria.reservar_lote(self.conn, self.agora, tamanho=2)
+        segundo = mensageria.reservar_lote(self.conn, self.agora, tamanho=2)
+        self.assertEqual((len(primeiro), len(segundo)), (2, 1))
+        self.assertEqual(len({linha[0] for linha in primeiro + segundo}), 3)
+        self.assertEqual(mensageria.resumo_fila(self.conn), {"enviando": len(ids)})
+
+    def test_reserva_expirada_volta_para_a_fila(self):
+        # Um despachante que reservou e parou no meio não prende a mensagem
+        self.agendar()
+        (reservada,) = mensageria.reservar_lote(self.conn, self.agora)
+        self.assertEqual(mensageria.reservar_lote(self.conn, self.agora + mensageria.RESERVA_EXPIRA), [])
+        (de_novo,) = mensageria.reservar_lote(
+            self.conn, self.agora + mensageria.RESERVA_EXPIRA + timedelta(seconds=1))
+        self.assertEqual((de_novo[0], de_novo[3]), (reservada[0], 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+# Paginação do livro-caixa com meses arquivados (arquivamento.py).
+#
+#   python -m unittest discover tests
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+import arquivamento
+import dados
+import operacoes
+from conexao import abrir_conexao
+from migracoes import aplicar_migracoes
+
+
+class PaginacaoComArquivo(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(prefix="sips-teste-")
+        self.conn = abrir_conexao(os.path.join(self.pasta, "banco.db"))
+        aplicar_migracoes(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def lancar(self, dia, descricao):
+        return operacoes.lancar(self.conn, dia, descricao, "Entrada", 10.0, "Corte")
+
+    def paginas(self, tamanho):
+        linhas, apos = [], None
+        while True:
+            df, apos, tem_proxima = dados.pagina_financeiro(self.conn, apos=apos, tamanho=tamanho)
+            linhas += list(zip(df["data"].dt.strftime("%Y-%m-%d"), df["id"]))
+            if not tem_proxima:
+                return linhas
+
+    def test_lancamentos_retroativos_nao_escondem_meses_arquivados(self):
+        # 42 lançamentos de jan a jun de 2023, arquivados; 3 recentes; e 5
+        # lançados depois do arquivamento com data de jan de 2023, que ficam
+        # no SQLite e fecham a página quente depois dos recentes
+        for mes in range(1, 7):
+            for dia in range(1, 8):
+                self.lancar(date(2023, mes, dia + 10), "antigo")
+        for dia in (1, 2, 3):
+            self.lancar(date(2024, 6, dia), "recente")
+        arquivados = arquivamento.arquivar(self.conn, meses_quentes=12, hoje=date(2024, 7, 15))
+        self.assertEqual(sum(q for (tabela, _), q in arquivados.items() if tabela == "financeiro"), 42)
+        for dia in range(1, 6):
+            self.lancar(date(2023, 1, dia), "retroativo")
+
+        linhas = self.paginas(tamanho=5)
+        self.assertEqual(len(linhas), 50)
+        self.assertEqual(len({id_lancamento for _, id_lancamento in linhas}), 50)
+        self.assertEqual(linhas, sorted(linhas, reverse=True))
+
+    def test_pagina_sem_arquivo(self):
+        for dia in range(1, 8):
+            self.lancar(date(2024, 6, dia), "recente")
+        self.assertEqual([d for d, _ in self.paginas(tamanho=3)],
+                         [date(2024, 6, dia).isoformat() for dia in range(7, 0, -1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
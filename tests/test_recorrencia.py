@@ -0,0 +1,164 @@
+# Séries recorrentes: expansão por janela, exceções e operações.
+#
+#   python -m unittest discover tests
+
+import unittest
+from datetime import date, datetime, timedelta
+
+from apoio import BancoTemporario  # antes de dados: filtra os avisos do cache
+import agenda
+import dados
+import operacoes
+import recorrencia
+
+
+def _dias(inicios):
+    return [i.date().isoformat() for i in inicios]
+
+
+class Ocorrencias(unittest.TestCase):
+    def test_semanal_na_janela(self):
+        inicio = datetime(2030, 1, 7, 10)
+        self.assertEqual(_dias(recorrencia.ocorrencias(inicio, "semanal", None,
+                                                       datetime(2030, 3, 1), datetime(2030, 3, 15))),
+                         ["2030-03-04", "2030-03-11"])
+
+    def test_janela_antes_da_serie(self):
+        inicio = datetime(2030, 1, 7, 10)
+        self.assertEqual(_dias(recorrencia.ocorrencias(inicio, "semanal", None,
+                                                       datetime(2029, 12, 1), datetime(2030, 1, 15))),
+                         ["2030-01-07", "2030-01-14"])
+
+    def test_quinzenal_com_data_final_inclusive(self):
+        inicio = datetime(2030, 1, 7, 10)
+        self.assertEqual(_dias(recorrencia.ocorrencias(inicio, "quinzenal", date(2030, 2, 4),
+                                                       datetime(2030, 1, 1), datetime(2030, 12, 1))),
+                         ["2030-01-07", "2030-01-21", "2030-02-04"])
+
+    def test_mensal_usa_o_ultimo_dia_dos_meses_curtos(self):
+        inicio = datetime(2030, 1, 31, 9)
+        self.assertEqual(_dias(recorrencia.ocorrencias(inicio, "mensal", None,
+                                                       datetime(2030, 1, 1), datetime(2030, 5, 1))),
+                         ["2030-01-31", "2030-02-28", "2030-03-31", "2030-04-30"])
+
+    def test_mensal_em_janela_distante(self):
+        inicio = datetime(2030, 1, 31, 9)
+        self.assertEqual(list(recorrencia.ocorrencias(inicio, "mensal", None,
+                                                      datetime(2032, 2, 1), datetime(2032, 3, 1))),
+                         [datetime(2032, 2, 29, 9)])
+
+    def test_e_ocorrencia(self):
+        serie = (1, 1, 1, datetime(2030, 1, 7, 10), timedelta(minutes=30), "semanal", None)
+        self.assertTrue(recorrencia.e_ocorrencia(serie, datetime(2030, 1, 21, 10)))
+        self.assertFalse(recorrencia.e_ocorrencia(serie, datetime(2030, 1, 21, 11)))
+        self.assertFalse(recorrencia.e_ocorrencia(serie, datetime(2030, 1, 22, 10)))
+
+
+class Series(BancoTemporario):
+    inicio = datetime(2030, 1, 7, 10)
+
+    def setUp(self):
+        super().setUp()
+        self.id_cliente = self.cliente()
+        self.id_servico = self.servico(duracao=30, preco=50.0)
+        self.id_serie = operacoes.agendar_serie(self.conn, self.id_cliente, self.id_servico, self.inicio,
+                                                "semanal", pagamento="Pix")
+
+    def inicios(self, inicio=datetime(2030, 1, 1), fim=datetime(2030, 2, 1)):
+        return [o[3] for o in recorrencia.expandir(self.conn, inicio, fim)]
+
+    def test_expandir(self):
+        self.assertEqual(_dias(self.inicios()), ["2030-01-07", "2030-01-14", "2030-01-21", "2030-01-28"])
+        self.assertEqual(recorrencia.expandir(self.conn, datetime(2030, 1, 7), datetime(2030, 1, 8)),
+                         [(self.id_serie, self.id_cliente, self.id_servico, self.inicio,
+                           self.inicio + timedelta(minutes=30))])
+
+    def test_expandir_sobrepondo(self):
+        # Só a ocorrência que ainda ocupa o período, e não a que começa nele
+        self.assertEqual(recorrencia.expandir(self.conn, datetime(2030, 1, 7, 10, 15), datetime(2030, 1, 7, 10, 20)),
+                         [])
+        self.assertEqual(len(recorrencia.expandir(self.conn, datetime(2030, 1, 7, 10, 15),
+                                                  datetime(2030, 1, 7, 10, 20), sobrepondo=True)), 1)
+        self.assertIsNone(recorrencia.primeiro_conflito(self.conn, datetime(2030, 1, 7, 10, 30),
+                                                        datetime(2030, 1, 7, 11)))
+
+    def test_serie_ocupa_a_agenda(self):
+        with self.assertRaises(ValueError):
+            operacoes.agendar_servico(self.conn, self.id_cliente, self.id_servico, datetime(2030, 1, 14, 10, 15))
+        with self.assertRaises(ValueError):
+            operacoes.agendar_serie(self.conn, self.id_cliente, self.id_servico, datetime(2029, 12, 31, 10),
+                                    "quinzenal")
+
+    def test_cancelar(self):
+        operacoes.cancelar_ocorrencia(self.conn, self.id_serie, datetime(2030, 1, 14, 10))
+        self.assertEqual(_dias(self.inicios()), ["2030-01-07", "2030-01-21", "2030-01-28"])
+        # O horário da ocorrência cancelada fica livre
+        operacoes.agendar_servico(self.conn, self.id_cliente, self.id_servico, datetime(2030, 1, 14, 10))
+        with self.assertRaises(ValueError):
+            operacoes.cancelar_ocorrencia(self.conn, self.id_serie, datetime(2030, 1, 14, 10))
+
+    def test_excecao_invalida(self):
+        with self.assertRaises(ValueError):
+            operacoes.cancelar_ocorrencia(self.conn, self.id_serie, datetime(2030, 1, 15, 10))
+        with self.assertRaises(LookupError):
+            operacoes.cancelar_ocorrencia(self.conn, self.id_serie + 1, datetime(2030, 1, 14, 10))
+
+    def test_remarcar(self):
+        novo = datetime(2030, 1, 15, 14)
+        id_agendamento = operacoes.remarcar_ocorrencia(self.conn, self.id_serie, datetime(2030, 1, 14, 10), novo)
+        self.assertEqual(_dias(self.inicios()), ["2030-01-07", "2030-01-21", "2030-01-28"])
+        self.assertEqual(dados.obter_agendamento(self.conn, id_agendamento)[3], novo.isoformat())
+        self.assertEqual(self.contar("SELECT agendamento_id FROM series_excecoes"), id_agendamento)
+
+    def test_remarcar_para_horario_ocupado_nao_altera_nada(self):
+        with self.assertRaises(ValueError):
+            operacoes.remarcar_ocorrencia(self.conn, self.id_serie, datetime(2030, 1, 14, 10),
+                                          datetime(2030, 1, 21, 10))
+        self.assertEqual(len(self.inicios()), 4)
+        self.assertEqual(self.contar("SELECT COUNT(*) FROM agendamentos"), 0)
+        self.assertEqual(self.contar("SELECT COUNT(*) FROM series_excecoes"), 0)
+
+    def test_concluir(self):
+        ocorrencia = datetime(2030, 1, 14, 10)
+        id_agendamento = operacoes.concluir_ocorrencia(self.conn, self.id_serie, ocorrencia)
+        agendamento = dados.obter_agendamento(self.conn, id_agendamento)
+        self.assertEqual((agendamento[3], agendamento[6]), (ocorrencia.isoformat(), "Concluído"))
+        self.assertEqual(self.conn.execute("SELECT data, valor, pagamento FROM financeiro").fetchall(),
+                         [("2030-01-14", 50.0, "Pix")])
+        # Continua ocupando o horário, agora como agendamento
+        self.assertEqual(agenda.primeiro_ocupado(self.conn, ocorrencia, ocorrencia + timedelta(minutes=5)),
+                         (ocorrencia, ocorrencia + timedelta(minutes=30)))
+        with self.assertRaises(ValueError):
+            operacoes.concluir_ocorrencia(self.conn, self.id_serie, ocorrencia)
+
+    def test_encerrar(self):
+        operacoes.encerrar_serie(self.conn, self.id_serie, date(2030, 1, 14))
+        self.assertEqual(_dias(self.inicios()), ["2030-01-07", "2030-01-14"])
+        with self.assertRaises(ValueError):
+            operacoes.encerrar_serie(self.conn, self.id_serie, date(2030, 1, 21))
+
+    def test_excluir_cliente_exclui_as_series(self):
+        operacoes.cancelar_ocorrencia(self.conn, self.id_serie, datetime(2030, 1, 14, 10))
+        operacoes.excluir_cliente(self.conn, self.id_cliente)
+        self.assertEqual(self.inicios(), [])
+        self.assertEqual(self.contar("SELECT COUNT(*) FROM series_excecoes"), 0)
+
+
+class ContagensDashboard(BancoTemporario):
+    def test_series_antigas_so_contam_na_janela(self):
+        hoje = date(2030, 6, 15)
+        inicio = datetime(2027, 1, 4, 10)
+        operacoes.agendar_serie(self.conn, self.cliente(), self.servico(), inicio, "semanal")
+        por_dia, por_servico = dados._contagens_series(self.conn, hoje)
+        janela = list(recorrencia.ocorrencias(inicio, "semanal", None,
+                                              datetime(2030, 3, 17), datetime(2030, 9, 13)))
+        self.assertEqual(sorted(por_dia), _dias(janela))
+        self.assertEqual(sum(por_servico.values()), len(janela))
+
+        df = dados._agendamentos_por_dia(self.conn, dados.versao(self.conn, "agendamentos"), hoje)
+        self.assertEqual(int(df["Total"].sum()), len(janela))
+        self.assertGreaterEqual(df["data"].min().date(), hoje - dados.JANELA_DASHBOARD)
+
+
+if __name__ == "__main__":
+    unittest.main()
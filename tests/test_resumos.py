@@ -0,0 +1,126 @@
+# Migrações sobre um banco do esquema original e tabelas mantidas por
+# triggers (saldo_diario e resumos do dashboard) contra um recálculo.
+#
+#   python -m unittest discover tests
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import date, datetime
+
+from apoio import BancoTemporario  # antes de dados: filtra os avisos do cache
+import dados
+import operacoes
+from conexao import abrir_conexao
+from migracoes import (MIGRACOES, _m001_tabelas_iniciais, aplicar_migracoes, reconstruir_resumos,
+                       reconstruir_saldo_diario, versao_atual)
+
+
+def derivadas(conn):
+    # Conteúdo das tabelas derivadas, com os valores arredondados a centavos
+    return {
+        "saldo_diario": [(dia, round(fluxo, 2), quantidade, round(saldo, 2)) for dia, fluxo, quantidade, saldo
+                         in conn.execute("SELECT dia, fluxo, quantidade, saldo FROM saldo_diario ORDER BY dia")],
+        "resumo_financeiro": [(categoria, tipo, quantidade, round(total, 2)) for categoria, tipo, quantidade, total
+                              in conn.execute("SELECT * FROM resumo_financeiro ORDER BY categoria, tipo")],
+        "agendamentos_dia": conn.execute("SELECT * FROM agendamentos_dia ORDER BY dia").fetchall(),
+        "agendamentos_servico": conn.execute("SELECT * FROM agendamentos_servico ORDER BY servico_id").fetchall(),
+    }
+
+
+def recalculadas(conn):
+    # As mesmas tabelas recalculadas do zero, sem alterar o banco
+    cursor = conn.cursor()
+    cursor.execute("SAVEPOINT recalculo")
+    try:
+        reconstruir_saldo_diario(cursor)
+        reconstruir_resumos(cursor)
+        return derivadas(conn)
+    finally:
+        cursor.execute("ROLLBACK TO recalculo")
+        cursor.execute("RELEASE recalculo")
+
+
+class MigracaoDoBancoOriginal(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(prefix="sips-teste-")
+        self.caminho = os.path.join(self.pasta, "banco.db")
+        # Banco como o app original o criava e gravava, sem schema_versao
+        conn = sqlite3.connect(self.caminho)
+        _m001_tabelas_iniciais(conn.cursor())
+        conn.execute("INSERT INTO clientes VALUES (1, 'João Silva', '(11) 91234-5678', '123.456.789-09', "
+                     "'Rua A', 'joao@exemplo.com', '1990-01-01', NULL)")
+        conn.execute("INSERT INTO servicos VALUES (1, 'Corte', 45, 50.0)")
+        conn.executemany("INSERT INTO agendamentos (cliente_id, servico_id, data_hora) VALUES (1, 1, ?)",
+                         [("2024-03-05T10:00:00",), ("2024-03-05T14:00:00",), ("2024-03-06T09:30:00",)])
+        conn.executemany("INSERT INTO financeiro (data, descricao, tipo, valor, categoria, pagamento) "
+                         "VALUES (?, ?, ?, ?, ?, 'Pix')", [
+                             ("2024-03-05", "Agendamento automático: CorteEntrada", "Serviço", 50.0, "Corte"),
+                             ("2024-03-04", "Aluguel", "Saída", 800.0, "Despesas"),
+                             ("2024-03-06T18:22:10.123456", "Serviço finalizado: Corte", "Entrada", 50.0, "Corte"),
+                         ])
+        conn.commit()
+        conn.close()
+        self.conn = abrir_conexao(self.caminho)
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def test_aplica_todas_as_migracoes(self):
+        self.assertEqual(aplicar_migracoes(self.conn), MIGRACOES[-1][0])
+        self.assertEqual(versao_atual(self.conn), MIGRACOES[-1][0])
+        # Aplicar de novo não faz nada
+        self.assertEqual(aplicar_migracoes(self.conn), MIGRACOES[-1][0])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM schema_versao").fetchone()[0], len(MIGRACOES))
+
+        self.assertEqual(self.conn.execute("SELECT DISTINCT status FROM agendamentos").fetchall(), [("Agendado",)])
+        self.assertEqual(self.conn.execute("SELECT fim FROM agendamentos ORDER BY id LIMIT 1").fetchone(),
+                         ("2024-03-05T10:45:00",))
+        # Migração 11: o lançamento automático com as colunas trocadas
+        self.assertEqual(self.conn.execute("SELECT descricao, tipo FROM financeiro WHERE id = 1").fetchone(),
+                         ("Agendamento automático: Corte", "Entrada"))
+        self.assertEqual([linha[0] for linha in dados.buscar_clientes(self.conn, "joao 91234")], [1])
+
+    def test_tabelas_derivadas_da_migracao(self):
+        aplicar_migracoes(self.conn)
+        self.assertEqual(derivadas(self.conn), recalculadas(self.conn))
+        self.assertEqual(derivadas(self.conn)["saldo_diario"], [
+            ("2024-03-04", -800.0, 1, -800.0),
+            ("2024-03-05", 50.0, 1, -750.0),
+            ("2024-03-06", 50.0, 1, -700.0),
+        ])
+
+
+class TabelasMantidasPorTriggers(BancoTemporario):
+    def test_gravacoes_mantem_as_tabelas_iguais_ao_recalculo(self):
+        id_cliente = self.cliente()
+        corte = self.servico("Corte", 30, 50.0)
+        barba = self.servico("Barba", 20, 30.0)
+        ids = [operacoes.lancar(self.conn, date(2024, 3, dia), f"Lançamento {dia}", tipo, valor, categoria)
+               for dia, tipo, valor, categoria in [(10, "Entrada", 100.0, "Corte"), (12, "Saída", 40.5, "Produtos"),
+                                                   (11, "Entrada", 75.25, "Barba"), (12, "Entrada", 20.0, "Corte")]]
+        agendamentos = [operacoes.agendar_servico(self.conn, id_cliente, servico, inicio)
+                        for servico, inicio in [(corte, datetime(2024, 3, 10, 9)), (barba, datetime(2024, 3, 10, 10)),
+                                                (corte, datetime(2024, 3, 11, 9))]]
+        self.assertEqual(derivadas(self.conn), recalculadas(self.conn))
+
+        # Exclusão, lançamento retroativo e alterações de data, valor,
+        # categoria, horário e serviço
+        operacoes.excluir_lancamentos(self.conn, [ids[1]])
+        operacoes.lancar(self.conn, date(2024, 3, 1), "Retroativo", "Saída", 10.0, "Produtos")
+        with dados.transacao(self.conn, "financeiro", "agendamentos") as cursor:
+            cursor.execute("UPDATE financeiro SET data = '2024-03-09', valor = 90.0 WHERE id = ?", (ids[0],))
+            cursor.execute("UPDATE financeiro SET categoria = 'Corte', tipo = 'Saída' WHERE id = ?", (ids[2],))
+            cursor.execute("UPDATE agendamentos SET data_hora = '2024-03-15T09:00:00' WHERE id = ?",
+                           (agendamentos[0],))
+            cursor.execute("UPDATE agendamentos SET servico_id = ? WHERE id = ?", (corte, agendamentos[1]))
+            cursor.execute("DELETE FROM agendamentos WHERE id = ?", (agendamentos[2],))
+        self.assertEqual(derivadas(self.conn), recalculadas(self.conn))
+        self.assertNotIn(barba, [servico for servico, _ in derivadas(self.conn)["agendamentos_servico"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
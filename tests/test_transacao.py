@@ -0,0 +1,95 @@
+# Unidade de trabalho: dados.transacao e dados.em_lote.
+#
+#   python -m unittest discover tests
+
+import unittest
+from datetime import date, datetime
+from unittest import mock
+
+from apoio import BancoTemporario  # antes de dados: filtra os avisos do cache
+import dados
+import operacoes
+from conexao import abrir_conexao
+
+
+class Falha(Exception):
+    pass
+
+
+class Transacao(BancoTemporario):
+    def lancar(self, descricao):
+        return operacoes.lancar(self.conn, date(2024, 3, 10), descricao, "Entrada", 10.0, "Corte")
+
+    def descricoes(self):
+        return [l[0] for l in self.conn.execute("SELECT descricao FROM financeiro ORDER BY id")]
+
+    def versao_financeiro(self):
+        return dados.versao(self.conn, "financeiro")[1]
+
+    def test_erro_desfaz_tudo_e_mantem_a_versao(self):
+        versao = self.versao_financeiro()
+        with self.assertRaises(Falha):
+            with dados.transacao(self.conn, "financeiro"):
+                self.lancar("primeiro")
+                raise Falha
+        self.assertEqual(self.descricoes(), [])
+        self.assertEqual(self.versao_financeiro(), versao)
+        self.assertFalse(self.conn.in_transaction)
+
+    def test_erro_tratado_desfaz_so_o_bloco_de_dentro(self):
+        with dados.transacao(self.conn, "financeiro"):
+            self.lancar("fora")
+            try:
+                with dados.transacao(self.conn, "financeiro"):
+                    self.lancar("dentro")
+                    raise Falha
+            except Falha:
+                pass
+            self.lancar("depois")
+        self.assertEqual(self.descricoes(), ["fora", "depois"])
+
+    def test_erro_de_dentro_nao_tratado_desfaz_a_transacao_de_fora(self):
+        with self.assertRaises(Falha):
+            with dados.transacao(self.conn, "financeiro"):
+                self.lancar("fora")
+                with dados.transacao(self.conn, "financeiro"):
+                    self.lancar("dentro")
+                    raise Falha
+        self.assertEqual(self.descricoes(), [])
+        self.assertFalse(self.conn.in_transaction)
+
+    def test_outras_conexoes_so_veem_depois_do_commit(self):
+        outra = abrir_conexao(self.caminho)
+        try:
+            with dados.em_lote(self.conn):
+                self.lancar("a")
+                self.lancar("b")
+                self.assertEqual(outra.execute("SELECT COUNT(*) FROM financeiro").fetchone()[0], 0)
+            self.assertEqual(outra.execute("SELECT COUNT(*) FROM financeiro").fetchone()[0], 2)
+        finally:
+            outra.close()
+
+    def test_em_lote_segue_depois_de_uma_operacao_que_falha(self):
+        versao = self.versao_financeiro()
+        with dados.em_lote(self.conn):
+            self.lancar("a")
+            with self.assertRaises(ValueError):
+                operacoes.excluir_lancamentos(self.conn, [999])
+            self.lancar("b")
+        self.assertEqual(self.descricoes(), ["a", "b"])
+        self.assertGreater(self.versao_financeiro(), versao)
+
+    def test_agendamento_e_lancamento_no_mesmo_commit(self):
+        id_cliente, id_servico = self.cliente(), self.servico()
+        with mock.patch.object(operacoes, "lancar", side_effect=Falha):
+            with self.assertRaises(Falha):
+                operacoes.agendar_servico(self.conn, id_cliente, id_servico, datetime(2030, 1, 7, 10))
+        for tabela in ("agendamentos", "financeiro", "mensagens"):
+            self.assertEqual(self.contar(f"SELECT COUNT(*) FROM {tabela}"), 0, tabela)
+        operacoes.agendar_servico(self.conn, id_cliente, id_servico, datetime(2030, 1, 7, 10))
+        for tabela in ("agendamentos", "financeiro", "mensagens"):
+            self.assertEqual(self.contar(f"SELECT COUNT(*) FROM {tabela}"), 1, tabela)
+
+
+if __name__ == "__main__":
+    unittest.main()